@@ -30,7 +30,7 @@ from custom_components.supernotify.archive import NotificationArchive
 from custom_components.supernotify.common import DupeChecker
 from custom_components.supernotify.const import CONF_MOBILE_APP_ID, CONF_MOBILE_DEVICES, CONF_MOBILE_DISCOVERY, CONF_PERSON
 from custom_components.supernotify.context import Context
-from custom_components.supernotify.delivery import Delivery, DeliveryRegistry
+from custom_components.supernotify.delivery import Delivery, DeliveryRegistry, SelectionPlanCache
 from custom_components.supernotify.hass_api import HomeAssistantAPI
 from custom_components.supernotify.media_grab import MediaStorage
 from custom_components.supernotify.people import PeopleRegistry
@@ -145,6 +145,7 @@ def mock_delivery_registry() -> DeliveryRegistry:
     registry = AsyncMock(spec=DeliveryRegistry)
     registry.deliveries = {}
     registry.transports = {}
+    registry.selection_plans = SelectionPlanCache()
     return registry
 
 
@@ -25,6 +25,7 @@ from .const import (
     CONF_ARCHIVE_MQTT_TOPIC,
     CONF_ARCHIVE_PATH,
     CONF_ARCHIVE_PURGE_INTERVAL,
+    CONF_ARCHIVE_TRACE_SAMPLE,
 )
 from .schema import DeliveryOutcome, OutcomeSelection
 
@@ -261,6 +262,9 @@ class NotificationArchive:
         self.mqtt_qos: int = int(config.get(CONF_ARCHIVE_MQTT_QOS, 0))
         self.mqtt_retain: bool = bool(config.get(CONF_ARCHIVE_MQTT_RETAIN, True))
         self.debug: bool = bool(config.get(CONF_DEBUG, False))
+        # trace only 1 in N notifications, unless debug set on the notification
+        self.trace_sample: int = max(1, int(config.get(CONF_ARCHIVE_TRACE_SAMPLE, 1)))
+        self._trace_candidates: int = 0
 
         self.purge_minute_interval = int(config.get(CONF_ARCHIVE_PURGE_INTERVAL, ARCHIVE_PURGE_MIN_INTERVAL))
 
@@ -282,6 +286,19 @@ class NotificationArchive:
 
         self.event_archiver = EventArchiver(self.hass_api, self.archive_event_name, self.diagnostics)
 
+    def trace_required(self, debug: bool = False) -> bool:
+        """Decide up front if a notification needs a full debug trace
+
+        Always for a notification with debug set, otherwise only if archived diagnostics could include it,
+        sampled to 1 in `trace_sample` notifications
+        """
+        if debug:
+            return True
+        if not self.enabled or self.diagnostics == OutcomeSelection.NONE:
+            return False
+        self._trace_candidates += 1
+        return (self._trace_candidates - 1) % self.trace_sample == 0
+
     async def size(self) -> int:
         return await self.archive_directory.size() if self.archive_directory else 0
 
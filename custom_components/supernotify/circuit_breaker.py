@@ -0,0 +1,127 @@
+"""Stop calling a transport that keeps failing, probing periodically until it recovers"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from enum import StrEnum
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.const import CONF_ENABLED
+from homeassistant.util import dt as dt_util
+
+from .const import CONF_FAILURE_THRESHOLD, CONF_PROBE_INTERVAL, CONF_WINDOW
+
+if TYPE_CHECKING:
+    import datetime as dt
+    from collections.abc import Callable
+
+    from homeassistant.helpers.typing import ConfigType
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"  # calls made as normal
+    OPEN = "open"  # calls skipped
+    HALF_OPEN = "half_open"  # occasional probe calls made to test for recovery
+
+
+class CircuitBreaker:
+    """Open after a run of consecutive failures within a time window
+
+    While open, no calls are allowed until `probe_interval` has passed, and then it is half open,
+    letting through a single probe call each interval. A successful call closes it again, and a
+    failed probe reopens it. A call that neither succeeds nor fails, for example skipped for lack
+    of targets, leaves the state unchanged.
+    """
+
+    def __init__(self, name: str, config: ConfigType | None = None, on_change: Callable[[], None] | None = None) -> None:
+        config = config or {}
+        self.name: str = name
+        self.enabled: bool = config.get(CONF_ENABLED, True)
+        self.failure_threshold: int = config.get(CONF_FAILURE_THRESHOLD, 5)
+        self.window: float = config.get(CONF_WINDOW, 300)
+        self.probe_interval: float = config.get(CONF_PROBE_INTERVAL, 60)
+        self.on_change: Callable[[], None] | None = on_change
+        self.state: CircuitState = CircuitState.CLOSED
+        self.opened_at: dt.datetime | None = None
+        self.open_count: int = 0
+        self.rejected: int = 0
+        self._failures: deque[float] = deque()
+        self._next_probe: float = 0.0
+
+    def allow(self) -> bool:
+        """Check if a call can be made now, counting it as the probe when half open"""
+        return self.allowance(1) == 1
+
+    def allowance(self, wanted: int) -> int:
+        """How many of the wanted calls can be made now, all when closed, else one if due a probe
+
+        Only the probe goes through while half open, the rest held back until it succeeds or fails
+        """
+        if not self.enabled or self.state == CircuitState.CLOSED:
+            return wanted
+        allowed: int = 0
+        now: float = time.monotonic()
+        if wanted and now >= self._next_probe:
+            self._next_probe = now + self.probe_interval
+            if self.state == CircuitState.OPEN:
+                _LOGGER.info("SUPERNOTIFY %s circuit half open, probing", self.name)
+                self._change(CircuitState.HALF_OPEN)
+            allowed = 1
+        self.rejected += wanted - allowed
+        return allowed
+
+    def record_success(self) -> None:
+        self._failures.clear()
+        if self.state != CircuitState.CLOSED:
+            _LOGGER.info("SUPERNOTIFY %s circuit closed, transport recovered", self.name)
+            self.opened_at = None
+            self._change(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        if not self.enabled:
+            return
+        now: float = time.monotonic()
+        if self.state == CircuitState.HALF_OPEN:
+            _LOGGER.warning("SUPERNOTIFY %s circuit reopened, probe failed", self.name)
+            self._next_probe = now + self.probe_interval
+            self._change(CircuitState.OPEN)
+            return
+        if self.state == CircuitState.OPEN:
+            return
+        self._failures.append(now)
+        while self._failures and self._failures[0] < now - self.window:
+            self._failures.popleft()
+        if len(self._failures) >= self.failure_threshold:
+            _LOGGER.warning(
+                "SUPERNOTIFY %s circuit open after %s consecutive failures, skipping for %ss",
+                self.name,
+                len(self._failures),
+                self.probe_interval,
+            )
+            self._failures.clear()
+            self._next_probe = now + self.probe_interval
+            self.opened_at = dt_util.utcnow()
+            self.open_count += 1
+            self._change(CircuitState.OPEN)
+
+    def _change(self, state: CircuitState) -> None:
+        self.state = state
+        if self.on_change is not None:
+            try:
+                self.on_change()
+            except Exception as e:
+                _LOGGER.warning("SUPERNOTIFY Unable to publish %s circuit state: %s", self.name, e)
+
+    def attributes(self) -> dict[str, Any]:
+        return {
+            CONF_ENABLED: self.enabled,
+            "state": self.state,
+            "consecutive_failures": len(self._failures),
+            "opened_at": self.opened_at,
+            "open_count": self.open_count,
+            "rejected": self.rejected,
+        }
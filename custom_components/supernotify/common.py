@@ -6,7 +6,9 @@ No same pkg dependencies permitted
 from __future__ import annotations
 
 import datetime as dt
+import hashlib
 import logging
+import time
 from abc import abstractmethod
 from collections.abc import KeysView
 from dataclasses import dataclass, field
@@ -26,6 +28,8 @@ from .const import (
 )
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from homeassistant.helpers.typing import ConfigType
 
 _LOGGER = logging.getLogger(__name__)
@@ -129,12 +133,21 @@ class CallRecord:
         return result
 
 
+def fingerprint(*parts: str | None) -> str:
+    """Digest of the parts that is stable across restarts, unlike the salted built-in hash()"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        # separators so ("ab","c") and ("a","bc") differ, and None differs from ""
+        digest.update(b"\x00" if part is None else str(part).encode("utf-8", "surrogatepass") + b"\x1f")
+    return digest.hexdigest()
+
+
 class DupeCheckable:
     id: str
     priority: str
 
     @abstractmethod
-    def hash(self) -> int:
+    def fingerprint(self) -> str:
         raise NotImplementedError
 
 
@@ -143,27 +156,48 @@ class DupeChecker:
 
     def __init__(self, dupe_check_config: ConfigType) -> None:
         self.policy = dupe_check_config.get(CONF_DUPE_POLICY, ATTR_DUPE_POLICY_MTSLP)
-        # dupe check cache, key is (priority, message hash)
-        self.cache: TTLCache[tuple[int, int], str] = TTLCache(
-            maxsize=dupe_check_config.get(CONF_SIZE, 100), ttl=dupe_check_config.get(CONF_TTL, 120)
-        )
+        self.ttl: int = dupe_check_config.get(CONF_TTL, 120)
+        # dupe check cache, key is fingerprint, value is highest priority rank seen and wall clock time last seen
+        self.cache: TTLCache[str, tuple[int, float]] = TTLCache(maxsize=dupe_check_config.get(CONF_SIZE, 100), ttl=self.ttl)
+        self.on_change: Callable[[], None] | None = None
 
     def check(self, dupe_candidate: DupeCheckable) -> bool:
         if self.policy == ATTR_DUPE_POLICY_NONE:
             return False
-        hashed: int = dupe_candidate.hash()
+        fingerprinted: str = dupe_candidate.fingerprint()
         ranked_priority: int = PRIORITY_VALUES.get(dupe_candidate.priority, 3)
-        if self.policy == ATTR_DUPE_POLICY_MTSLP:
-            dupe: bool = any(prev_hash == hashed and prev_prior >= ranked_priority for prev_hash, prev_prior in self.cache)
-        elif self.policy == ATTR_DUPE_POLICY_MT:
-            dupe = any(prev_hash == hashed for prev_hash, _prev_prior in self.cache)
+        now: float = time.time()
+        prev_priority: int | None = None
+        if (prev := self.cache.get(fingerprinted)) is not None and prev[1] + self.ttl > now:
+            prev_priority = prev[0]
+        if prev_priority is None:
+            dupe: bool = False
+        elif self.policy == ATTR_DUPE_POLICY_MTSLP:
+            dupe = prev_priority >= ranked_priority
         else:
-            dupe = False
+            dupe = self.policy == ATTR_DUPE_POLICY_MT
         if dupe:
             _LOGGER.debug("SUPERNOTIFY Detected dupe: %s", dupe_candidate.id)
-        self.cache[hashed, ranked_priority] = dupe_candidate.id
+        self.cache[fingerprinted] = (ranked_priority if prev_priority is None else max(prev_priority, ranked_priority), now)
+        if self.on_change:
+            self.on_change()
         return dupe
 
+    def dump(self) -> dict[str, tuple[int, float]]:
+        """Compact form of unexpired entries, for persistence"""
+        cutoff: float = time.time() - self.ttl
+        return {k: (rank, round(seen, 1)) for k, (rank, seen) in self.cache.items() if seen > cutoff}
+
+    def load(self, dumped: dict[str, list[Any]] | None) -> int:
+        """Restore entries from `dump`, skipping any that expired while not running"""
+        cutoff: float = time.time() - self.ttl
+        loaded: int = 0
+        for k, (rank, seen) in sorted((dumped or {}).items(), key=lambda kv: kv[1][1]):
+            if seen > cutoff:
+                self.cache[k] = (int(rank), float(seen))
+                loaded += 1
+        return loaded
+
 
 def boolify(value: Any, default: bool) -> bool:
     """Convert a value to bool, correctly handling string 'false'/'true'.
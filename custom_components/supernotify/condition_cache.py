@@ -0,0 +1,258 @@
+"""Memoize condition results against the entities and notification variables they depend on"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import jinja2
+from cachetools import LRUCache
+from homeassistant.const import CONF_CONDITION, CONF_CONDITIONS, CONF_ENABLED, CONF_ENTITY_ID, CONF_VALUE_TEMPLATE
+from jinja2 import meta, nodes
+
+from .model import ConditionVariables
+
+if TYPE_CHECKING:
+    from homeassistant.helpers.typing import TemplateVarsType
+
+    from .hass_api import HomeAssistantAPI
+    from .schema import ConditionsFunc
+
+_LOGGER = logging.getLogger(__name__)
+
+CONDITION_VARIABLES: frozenset[str] = frozenset(ConditionVariables().as_dict())  # type: ignore[arg-type]
+# template functions reading a single entity, cacheable only when called with a literal entity id
+STATE_FUNCTIONS: frozenset[str] = frozenset(("states", "is_state", "state_attr", "is_state_attr", "has_value"))
+# template globals with no hidden inputs, anything else, like now() or expand(), means always evaluate
+PURE_FUNCTIONS: frozenset[str] = frozenset((
+    "float",
+    "int",
+    "bool",
+    "iif",
+    "min",
+    "max",
+    "average",
+    "median",
+    "is_number",
+    "log",
+    "sqrt",
+    "pi",
+    "e",
+    "tau",
+    "inf",
+    "slugify",
+    "typeof",
+    "set",
+    "tuple",
+    "zip",
+))
+# filters and tests reading Home Assistant state or the clock
+IMPURE_FILTERS: frozenset[str] = STATE_FUNCTIONS | frozenset((
+    "expand",
+    "closest",
+    "distance",
+    "relative_time",
+    "time_since",
+    "time_until",
+    "today_at",
+    "area_entities",
+    "area_devices",
+    "area_id",
+    "area_name",
+    "device_entities",
+    "device_attr",
+    "is_device_attr",
+    "device_id",
+    "device_name",
+    "floor_areas",
+    "floor_entities",
+    "floor_id",
+    "floor_name",
+    "label_areas",
+    "label_devices",
+    "label_entities",
+    "label_id",
+    "label_name",
+    "integration_entities",
+))
+STATIC_CONDITIONS = ("and", "or", "not", "state", "numeric_state", "template", "zone")
+
+_JINJA_ENV = jinja2.Environment(extensions=["jinja2.ext.loopcontrols", "jinja2.ext.do"])
+
+
+@dataclass(frozen=True)
+class ConditionDependencies:
+    """What a condition reads, if known"""
+
+    entity_ids: tuple[str, ...] = ()
+    variables: tuple[str, ...] = ()
+    cacheable: bool = True
+
+
+class _DependencyCollector:
+    def __init__(self) -> None:
+        self.entity_ids: set[str] = set()
+        self.variables: set[str] = set()
+        self.cacheable: bool = True
+
+    def not_cacheable(self, reason: str, detail: Any) -> None:
+        _LOGGER.debug("SUPERNOTIFY Condition always evaluated, %s: %s", reason, detail)
+        self.cacheable = False
+
+    def add_entities(self, entity_ids: Any) -> None:
+        if isinstance(entity_ids, str):
+            entity_ids = [entity_ids]
+        for entity_id in entity_ids or []:
+            if isinstance(entity_id, str):
+                self.entity_ids.add(entity_id)
+            else:
+                self.not_cacheable("unrecognized entity", entity_id)
+
+    def add_condition(self, config: Any) -> None:
+        if not self.cacheable:
+            return
+        if isinstance(config, list):
+            for item in config:
+                self.add_condition(item)
+        elif isinstance(config, str) or hasattr(config, "template"):
+            # shorthand template condition
+            self.add_template(config)
+        elif isinstance(config, dict):
+            if config.get(CONF_ENABLED) is False:
+                return
+            condition = config.get(CONF_CONDITION)
+            if condition not in STATIC_CONDITIONS or "for" in config:
+                self.not_cacheable("time or context dependent condition", condition)
+            elif condition in ("and", "or", "not"):
+                self.add_condition(config.get(CONF_CONDITIONS))
+            elif condition == "template":
+                self.add_template(config.get(CONF_VALUE_TEMPLATE))
+            else:
+                self.add_entities(config.get(CONF_ENTITY_ID))
+                if condition == "zone":
+                    self.add_entities(config.get("zone"))
+                for threshold in ("above", "below"):
+                    if isinstance(config.get(threshold), str):
+                        self.add_entities(config[threshold])
+                if config.get(CONF_VALUE_TEMPLATE) is not None:
+                    self.add_template(config[CONF_VALUE_TEMPLATE])
+        else:
+            self.not_cacheable("unrecognized condition", config)
+
+    def add_template(self, template: Any) -> None:
+        source: Any = template if isinstance(template, str) else getattr(template, "template", None)
+        if not isinstance(source, str):
+            self.not_cacheable("unrecognized template", template)
+            return
+        try:
+            ast: nodes.Template = _JINJA_ENV.parse(source)
+        except jinja2.TemplateError as e:
+            self.not_cacheable("unparseable template", e)
+            return
+
+        for name in meta.find_undeclared_variables(ast):
+            if name in CONDITION_VARIABLES:
+                self.variables.add(name)
+            elif name not in STATE_FUNCTIONS and name not in PURE_FUNCTIONS:
+                self.not_cacheable("template reads", name)
+                return
+        for node in ast.find_all((nodes.Filter, nodes.Test)):
+            if node.name in IMPURE_FILTERS:
+                self.not_cacheable("template filter", node.name)
+                return
+
+        accounted: set[int] = set()
+        for call in ast.find_all(nodes.Call):
+            if (
+                isinstance(call.node, nodes.Name)
+                and call.node.name in STATE_FUNCTIONS
+                and call.args
+                and isinstance(call.args[0], nodes.Const)
+                and isinstance(call.args[0].value, str)
+            ):
+                self.entity_ids.add(call.args[0].value)
+                accounted.add(id(call.node))
+        for attr in ast.find_all(nodes.Getattr):
+            # states.domain.object_id
+            if isinstance(attr.node, nodes.Getattr) and isinstance(attr.node.node, nodes.Name):
+                if attr.node.node.name == "states":
+                    self.entity_ids.add(f"{attr.node.attr}.{attr.attr}")
+                    accounted.add(id(attr.node.node))
+        for name_node in ast.find_all(nodes.Name):
+            if name_node.name in STATE_FUNCTIONS and id(name_node) not in accounted:
+                self.not_cacheable("template state lookup not resolvable", name_node.name)
+                return
+
+    def build(self) -> ConditionDependencies:
+        if not self.cacheable:
+            return ConditionDependencies(cacheable=False)
+        return ConditionDependencies(tuple(sorted(self.entity_ids)), tuple(sorted(self.variables)))
+
+
+def analyse_conditions(condition_config: Any) -> ConditionDependencies:
+    """Find entities and condition variables read by a condition config, or mark it as not cacheable"""
+    collector = _DependencyCollector()
+    try:
+        collector.add_condition(condition_config)
+    except Exception as e:
+        collector.not_cacheable("analysis failed", e)
+    return collector.build()
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return tuple((k, _freeze(v)) for k, v in sorted(value.items(), key=lambda kv: str(kv[0])))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(v) for v in value)
+    hash(value)
+    return value
+
+
+class MemoizedConditions:
+    """Conditions function with results reused while its dependencies are unchanged
+
+    An entry is valid only if the notification variables read by the condition are equal, and the
+    current State object of every referenced entity is the one seen when it was evaluated. State objects
+    are replaced by Home Assistant on every state or attribute change, so this also picks up changes
+    made earlier in the same event loop iteration, before any state change listener would have run.
+    """
+
+    def __init__(
+        self, conditions: ConditionsFunc, dependencies: ConditionDependencies, hass_api: HomeAssistantAPI, size: int = 32
+    ) -> None:
+        self.conditions: ConditionsFunc = conditions
+        self.dependencies: ConditionDependencies = dependencies
+        self.hass_api: HomeAssistantAPI = hass_api
+        self._results: LRUCache[Any, tuple[tuple[Any, ...], bool]] = LRUCache(maxsize=size)
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __call__(self, variables: TemplateVarsType) -> bool:
+        if not self.dependencies.cacheable:
+            self.misses += 1
+            return self.conditions(variables)
+        try:
+            key: Any = tuple(_freeze((variables or {}).get(v)) for v in self.dependencies.variables)
+        except TypeError:
+            self.misses += 1
+            return self.conditions(variables)
+        states: tuple[Any, ...] = tuple(self.hass_api.get_state(e) for e in self.dependencies.entity_ids)
+        cached: tuple[tuple[Any, ...], bool] | None = self._results.get(key)
+        if cached is not None and all(a is b for a, b in zip(cached[0], states, strict=True)):
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        result: bool = self.conditions(variables)
+        self._results[key] = (states, result)
+        return result
+
+    def attributes(self) -> dict[str, Any]:
+        return {
+            "cacheable": self.dependencies.cacheable,
+            "entities": list(self.dependencies.entity_ids),
+            "variables": list(self.dependencies.variables),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -67,6 +67,7 @@ CONF_ARCHIVE_PURGE_INTERVAL: Final[str] = "purge_interval"
 CONF_ARCHIVE_EVENT_NAME: Final[str] = "event_name"
 CONF_ARCHIVE_EVENT_SELECTION: Final[str] = "event_selection"
 CONF_ARCHIVE_DIAGNOSTICS: Final[str] = "diagnostics"
+CONF_ARCHIVE_TRACE_SAMPLE: Final[str] = "trace_sample"
 CONF_MEDIA_STORAGE_DAYS: Final[str] = "media_storage_days"
 
 OCCUPANCY_ANY_IN = "any_in"
@@ -282,6 +283,24 @@ CONF_DEVICE_MODEL_EXCLUDE: Final[str] = "device_model_exclude"
 CONF_SNOOZE = "snooze"
 CONF_SNOOZE_TIME = "snooze_time"
 
+CONF_QUEUE: Final[str] = "queue"
+CONF_QUEUE_WORKERS: Final[str] = "workers"
+ATTR_BLOCKING: Final[str] = "blocking"
+
+CONF_CONCURRENCY: Final[str] = "concurrency"
+DEFAULT_TRANSPORT_CONCURRENCY = 4
+CONF_DEADLINE: Final[str] = "deadline"
+
+CONF_CIRCUIT_BREAKER: Final[str] = "circuit_breaker"
+CONF_FAILURE_THRESHOLD: Final[str] = "failure_threshold"
+CONF_WINDOW: Final[str] = "window"
+CONF_PROBE_INTERVAL: Final[str] = "probe_interval"
+
+CONF_RETRY: Final[str] = "retry"
+CONF_MAX_ATTEMPTS: Final[str] = "max_attempts"
+CONF_BACKOFF: Final[str] = "backoff"
+CONF_MAX_BACKOFF: Final[str] = "max_backoff"
+
 # Idea - differentiate enabled as recipient vs as occupant, for ALL_IN etc check
 # May need condition, and also enabled if delivery disabled
 # CONF_OCCUPANCY="occupancy"
@@ -10,6 +10,7 @@ if TYPE_CHECKING:
     from .archive import NotificationArchive
     from .common import DupeChecker
     from .media_grab import MediaStorage
+    from .retry_queue import RetryQueue
     from .scenario import ScenarioRegistry
     from .snoozer import Snoozer
 
@@ -44,6 +45,8 @@ class Context:
         mobile_actions: ConfigType | None = None,
         template_path: str | None = None,
         cameras: list[ConfigType] | None = None,
+        deadline: float | None = None,
+        retry_queue: RetryQueue | None = None,
         **kwargs: Any,
     ) -> None:
         self.delivery_registry: DeliveryRegistry = delivery_registry
@@ -61,6 +64,9 @@ class Context:
         self.custom_template_path: Path | None = Path(template_path) if template_path else None
 
         self.cameras: dict[str, Any] = {c[CONF_CAMERA]: c for c in cameras} if cameras else {}
+        # seconds allowed for all deliveries of a notification, including fallbacks
+        self.deadline: float | None = deadline
+        self.retry_queue: RetryQueue | None = retry_queue
         if kwargs:
             _LOGGER.warning("SUPERNOTIFY Context threw away kwargs: %s", kwargs)
 
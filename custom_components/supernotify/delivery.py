@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import Hashable, Iterable, Mapping
+from types import MappingProxyType
 from typing import TYPE_CHECKING, Any
 
+from cachetools import LRUCache
 from homeassistant.const import (
     ATTR_DEVICE_ID,
     ATTR_FRIENDLY_NAME,
@@ -15,9 +18,10 @@ from homeassistant.const import (
     CONF_NAME,
     CONF_OPTIONS,
     CONF_TARGET,
+    CONF_TIMEOUT,
 )
 
-from custom_components.supernotify.model import ConditionVariables, DeliveryConfig, SelectionRule, Target
+from custom_components.supernotify.model import ConditionVariables, DataFilter, DeliveryConfig, SelectionRule, Target
 
 from .const import (
     ATTR_ENABLED,
@@ -52,6 +56,7 @@ from .const import (
     SELECTION_FALLBACK,
     SELECTION_FALLBACK_ON_ERROR,
 )
+from .schema import SelectionRank
 
 if TYPE_CHECKING:
     from homeassistant.helpers.typing import ConfigType
@@ -81,11 +86,14 @@ class Delivery(DeliveryConfig):
         self.conditions_config: list[ConfigType] | None = conf.get(CONF_CONDITIONS)
         self.conditions: ConditionsFunc | None = None
         self.transport_data: dict[str, Any] = {}
+        self.upgrade_deprecations()
+        # matchers compiled once here, rather than for every envelope or target
         if self.options.get(OPTION_TARGET_SELECT):
             self.target_selector: SelectionRule | None = SelectionRule(self.options.get(OPTION_TARGET_SELECT))
         else:
             self.target_selector = None
-        self.upgrade_deprecations()
+        self.data_filter: DataFilter = DataFilter(self.options.get(OPTION_DATA_KEYS_SELECT))
+        self._selection_rules: dict[str, SelectionRule] = {}
 
     async def initialize(self, context: Context) -> bool:
         errors = 0
@@ -156,11 +164,11 @@ class Delivery(DeliveryConfig):
                 added: int = 0
                 for d in context.hass_api.discover_devices(
                     domain,
-                    device_model_select=SelectionRule(self.options.get(OPTION_DEVICE_MODEL_SELECT)),
-                    device_manufacturer_select=SelectionRule(self.options.get(OPTION_DEVICE_MANUFACTURER_SELECT)),
-                    device_os_select=SelectionRule(self.options.get(OPTION_DEVICE_OS_SELECT)),
-                    device_area_select=SelectionRule(self.options.get(OPTION_DEVICE_AREA_SELECT)),
-                    device_label_select=SelectionRule(self.options.get(OPTION_DEVICE_LABEL_SELECT)),
+                    device_model_select=self.selection_rule(OPTION_DEVICE_MODEL_SELECT),
+                    device_manufacturer_select=self.selection_rule(OPTION_DEVICE_MANUFACTURER_SELECT),
+                    device_os_select=self.selection_rule(OPTION_DEVICE_OS_SELECT),
+                    device_area_select=self.selection_rule(OPTION_DEVICE_AREA_SELECT),
+                    device_label_select=self.selection_rule(OPTION_DEVICE_LABEL_SELECT),
                 ):
                     discovered += 1
                     if self.target is None:
@@ -185,6 +193,14 @@ class Delivery(DeliveryConfig):
 
                 _LOGGER.info(f"SUPERNOTIFY {self.name} Device discovery for {domain} found {discovered} devices, added {added}")
 
+    def selection_rule(self, option: str) -> SelectionRule:
+        """Selection rule for an option, like device_model_select, compiled on first use"""
+        rule: SelectionRule | None = self._selection_rules.get(option)
+        if rule is None:
+            rule = SelectionRule(self.options.get(option))
+            self._selection_rules[option] = rule
+        return rule
+
     def select_targets(self, target: Target) -> Target:
         def selected(category: str, targets: list[str]) -> list[str]:
             if OPTION_TARGET_CATEGORIES in self.options and category not in self.options[OPTION_TARGET_CATEGORIES]:
@@ -193,13 +209,14 @@ class Delivery(DeliveryConfig):
                 return [t for t in targets if self.target_selector.match(t)]
             return targets
 
-        filtered_target = Target({k: selected(k, v) for k, v in target.targets.items()}, target_data=target.target_data)
-        # TODO: in model class
+        # already validated, so no need to classify again
+        filtered_target = Target.trusted(
+            {k: ts for k, ts in ((k, selected(k, v)) for k, v in target.targets.items()) if ts},
+            target_data=target.target_data,
+        )
         if target.target_specific_data:
             filtered_target.target_specific_data = {
-                (c, t): data
-                for (c, t), data in target.target_specific_data.items()
-                if c in target.targets and t in target.targets[c]
+                (c, t): data for (c, t), data in target.target_specific_data.items() if filtered_target.includes(c, t)
             }
         return filtered_target
 
@@ -258,12 +275,48 @@ class Delivery(DeliveryConfig):
             CONF_TARGET_USAGE: self.target_usage,
             CONF_DATA: self.data,
             CONF_DEBUG: self.debug,
+            CONF_TIMEOUT: self.timeout,
         }
         if self.alias:
             attrs[ATTR_FRIENDLY_NAME] = self.alias
         return attrs
 
 
+type SelectionPlan = tuple[tuple[tuple[str, tuple[str, ...]], ...], dict[str, dict[str, Any]]]
+
+
+class SelectionPlanCache:
+    """Delivery selection results memoized by everything a notification's selection depends on
+
+    Key is built by the notification from its enabled scenarios, selection mode, overrides and recipients,
+    anything else that changes the outcome, such as delivery enablement, must clear the cache.
+    """
+
+    def __init__(self, maxsize: int = 64) -> None:
+        self._plans: LRUCache[Hashable, SelectionPlan] = LRUCache(maxsize=maxsize)
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, key: Hashable) -> SelectionPlan | None:
+        plan: SelectionPlan | None = self._plans.get(key)
+        if plan is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return plan
+
+    def put(self, key: Hashable, plan: SelectionPlan) -> None:
+        self._plans[key] = plan
+
+    def clear(self) -> None:
+        if self._plans:
+            _LOGGER.debug("SUPERNOTIFY Clearing %s cached delivery selection plans", len(self._plans))
+            self._plans.clear()
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+
 class DeliveryRegistry:
     def __init__(
         self,
@@ -282,6 +335,22 @@ class DeliveryRegistry:
         self._fallback_on_error: list[Delivery] = []
         self._fallback_by_default: list[Delivery] = []
         self._implicit_deliveries: list[Delivery] = []
+        self.selection_plans: SelectionPlanCache = SelectionPlanCache()
+        # stable bit position per delivery, for set algebra on delivery selection
+        self._index: dict[str, int] = {}
+        self._indexed: list[Delivery] = []
+        self._rank_masks: dict[SelectionRank, int] = dict.fromkeys(SelectionRank, 0)
+        self._implicit_mask: int = 0
+        # immutable views, rebuilt on first access after any change bumps the version
+        self.version: int = 0
+        self._snapshot_version: int = -1
+        self._deliveries_view: Mapping[str, Delivery] = MappingProxyType({})
+        self._enabled_view: Mapping[str, Delivery] = MappingProxyType({})
+        self._disabled_view: Mapping[str, Delivery] = MappingProxyType({})
+        self._fallback_on_error_view: tuple[Delivery, ...] = ()
+        self._fallback_by_default_view: tuple[Delivery, ...] = ()
+        self._implicit_view: tuple[Delivery, ...] = ()
+        self._enabled_mask: int = 0
         # test harness support
         self._transport_types: dict[type[Transport], dict[str, Any]]
         if isinstance(transport_types, list):
@@ -296,7 +365,11 @@ class DeliveryRegistry:
         self.initialize_deliveries()
 
     def initialize_deliveries(self) -> None:
+        self._fallback_on_error = []
+        self._fallback_by_default = []
+        self._implicit_deliveries = []
         for delivery in self._deliveries.values():
+            self.index_delivery(delivery)
             if delivery.enabled:
                 if SELECTION_FALLBACK_ON_ERROR in delivery.selection:
                     self._fallback_on_error.append(delivery)
@@ -304,12 +377,83 @@ class DeliveryRegistry:
                     self._fallback_by_default.append(delivery)
                 if SELECTION_DEFAULT in delivery.selection:
                     self._implicit_deliveries.append(delivery)
+        self._implicit_mask = self.mask(d.name for d in self._implicit_deliveries)
+        self.changed()
+
+    def changed(self) -> None:
+        """Invalidate snapshots and anything cached against an earlier version"""
+        self.version += 1
+        self.selection_plans.clear()
+
+    def _snapshot(self) -> None:
+        if self._snapshot_version == self.version:
+            return
+        self._deliveries_view = MappingProxyType(dict(self._deliveries))
+        self._enabled_view = MappingProxyType({d: dconf for d, dconf in self._deliveries.items() if dconf.enabled})
+        self._disabled_view = MappingProxyType({d: dconf for d, dconf in self._deliveries.items() if not dconf.enabled})
+        self._fallback_on_error_view = tuple(d for d in self._fallback_on_error if d.enabled)
+        self._fallback_by_default_view = tuple(d for d in self._fallback_by_default if d.enabled)
+        self._implicit_view = tuple(d for d in self._implicit_deliveries if d.enabled)
+        self._enabled_mask = self.mask(self._enabled_view)
+        self._snapshot_version = self.version
+
+    def add_delivery(self, delivery: Delivery) -> None:
+        self._deliveries[delivery.name] = delivery
+        self.index_delivery(delivery)
+        self.changed()
+
+    def index_delivery(self, delivery: Delivery) -> None:
+        """Assign a bit position, kept for the lifetime of the registry so existing masks stay valid"""
+        index: int | None = self._index.get(delivery.name)
+        if index is None:
+            index = self._index[delivery.name] = len(self._indexed)
+            self._indexed.append(delivery)
+        else:
+            self._indexed[index] = delivery
+        for rank in self._rank_masks:
+            self._rank_masks[rank] &= ~(1 << index)
+        self._rank_masks[delivery.selection_rank] |= 1 << index
+
+    def mask(self, delivery_names: Iterable[str]) -> int:
+        """Bitmask of named deliveries, names not in the registry are ignored"""
+        mask = 0
+        for delivery_name in delivery_names:
+            index: int | None = self._index.get(delivery_name)
+            if index is not None:
+                mask |= 1 << index
+        return mask
+
+    def decode(self, mask: int) -> list[Delivery]:
+        """Deliveries for a bitmask, in registry order"""
+        decoded: list[Delivery] = []
+        while mask:
+            lowest = mask & -mask
+            decoded.append(self._indexed[lowest.bit_length() - 1])
+            mask ^= lowest
+        return decoded
+
+    def names(self, mask: int) -> list[str]:
+        return [d.name for d in self.decode(mask)]
+
+    def rank_mask(self, rank: SelectionRank) -> int:
+        return self._rank_masks[rank]
+
+    @property
+    def enabled_mask(self) -> int:
+        self._snapshot()
+        return self._enabled_mask
+
+    @property
+    def implicit_mask(self) -> int:
+        """Deliveries switched on all the time for implicit selection, as a bitmask"""
+        return self._implicit_mask & self.enabled_mask
 
     def enable(self, delivery_name: str) -> bool:
         delivery = self._deliveries.get(delivery_name)
         if delivery and not delivery.enabled:
             _LOGGER.info(f"SUPERNOTIFY Enabling delivery {delivery_name}")
             delivery.enabled = True
+            self.changed()
             return True
         return False
 
@@ -318,33 +462,40 @@ class DeliveryRegistry:
         if delivery and delivery.enabled:
             _LOGGER.info(f"SUPERNOTIFY Disabling delivery {delivery_name}")
             delivery.enabled = False
+            self.changed()
             return True
         return False
 
     @property
-    def deliveries(self) -> dict[str, Delivery]:
-        return dict(self._deliveries.items())
+    def deliveries(self) -> Mapping[str, Delivery]:
+        self._snapshot()
+        return self._deliveries_view
 
     @property
-    def enabled_deliveries(self) -> dict[str, Delivery]:
-        return {d: dconf for d, dconf in self._deliveries.items() if dconf.enabled}
+    def enabled_deliveries(self) -> Mapping[str, Delivery]:
+        self._snapshot()
+        return self._enabled_view
 
     @property
-    def disabled_deliveries(self) -> dict[str, Delivery]:
-        return {d: dconf for d, dconf in self._deliveries.items() if not dconf.enabled}
+    def disabled_deliveries(self) -> Mapping[str, Delivery]:
+        self._snapshot()
+        return self._disabled_view
 
     @property
-    def fallback_by_default_deliveries(self) -> list[Delivery]:
-        return [d for d in self._fallback_by_default if d.enabled]
+    def fallback_by_default_deliveries(self) -> tuple[Delivery, ...]:
+        self._snapshot()
+        return self._fallback_by_default_view
 
     @property
-    def fallback_on_error_deliveries(self) -> list[Delivery]:
-        return [d for d in self._fallback_on_error if d.enabled]
+    def fallback_on_error_deliveries(self) -> tuple[Delivery, ...]:
+        self._snapshot()
+        return self._fallback_on_error_view
 
     @property
-    def implicit_deliveries(self) -> list[Delivery]:
+    def implicit_deliveries(self) -> tuple[Delivery, ...]:
         """Deliveries switched on all the time for implicit selection"""
-        return [d for d in self._implicit_deliveries if d.enabled]
+        self._snapshot()
+        return self._implicit_view
 
     async def initialize_transports(self, context: Context) -> None:
         """Use configure_for_tests() to set transports to mocks or manually created fixtures"""
@@ -388,6 +539,7 @@ class DeliveryRegistry:
                 validated_deliveries[d] = delivery
 
         self._deliveries.update(validated_deliveries)
+        self.changed()
 
         _LOGGER.debug(
             "SUPERNOTIFY Validated transport %s, default action %s, valid deliveries: %s",
@@ -427,3 +579,4 @@ class DeliveryRegistry:
                     _LOGGER.debug("SUPERNOTIFY No default delivery or transport_definition for transport %s", transport.name)
         if autogenerated:
             self._deliveries.update(autogenerated)
+            self.changed()
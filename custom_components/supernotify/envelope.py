@@ -6,20 +6,22 @@ import string
 import time
 import typing
 import uuid
-from typing import Any, cast
+from collections import ChainMap
+from collections.abc import Mapping, MutableMapping
+from types import MappingProxyType
+from typing import Any
 
 from homeassistant.components.notify.const import ATTR_MESSAGE, ATTR_TITLE
 from homeassistant.helpers.template import is_template_string
 from jinja2 import TemplateError
 
-from .common import DupeCheckable
+from .common import DupeCheckable, fingerprint
 from .const import (
     ATTR_MEDIA,
     ATTR_MESSAGE_HTML,
     ATTR_PRIORITY,
     ATTR_SPOKEN_MESSAGE,
     ATTR_TIMESTAMP,
-    OPTION_DATA_KEYS_SELECT,
     OPTION_MESSAGE_USAGE,
     OPTION_SIMPLIFY_TEXT,
     OPTION_STRIP_URLS,
@@ -28,7 +30,6 @@ from .const import (
 from .media_grab import grab_image
 from .model import (
     ConditionVariables,
-    DataFilter,
     DeliveryCustomization,
     MessageOnlyPolicy,
     SuppressionReason,
@@ -38,6 +39,8 @@ from .model import (
 )
 
 if typing.TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
     from anyio import Path
 
     from custom_components.supernotify.common import CallRecord
@@ -52,6 +55,92 @@ _LOGGER = logging.getLogger(__name__)
 HASH_PREP_TRANSLATION_TABLE = table = str.maketrans("", "", string.punctuation + string.digits)
 
 
+class EnvelopeData(MutableMapping[str, Any]):
+    """Copy-on-write view of envelope data layered over a base shared with other envelopes
+
+    The base is never modified, all changes are made in a private top layer. Nested values from the
+    base are read without copying, as a read-only view, so use `editable` for a nested value to be
+    changed in place, or `copy` for plain data to hand on, for example as action data.
+    """
+
+    __slots__ = ("_base", "_deleted", "_top")
+
+    def __init__(self, base: Mapping[str, Any] | None = None) -> None:
+        self._base: Mapping[str, Any] = base if base is not None else {}
+        self._top: dict[str, Any] = {}
+        self._deleted: set[str] = set()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._top:
+            return self._top[key]
+        return _read_only(self._value(key))
+
+    def _value(self, key: str) -> Any:
+        if key in self._top:
+            return self._top[key]
+        if key in self._deleted:
+            raise KeyError(key)
+        return self._base[key]
+
+    def editable(self, key: str, default: Any = None) -> Any:
+        """Value for key that can be changed in place, copied into the top layer first if from the base"""
+        if key not in self:
+            return default
+        if key not in self._top:
+            self._top[key] = copy.deepcopy(self._base[key])
+        return self._top[key]
+
+    def copy(self) -> dict[str, Any]:
+        """Plain dict of the data, with nested values copied, so the caller is free to change it"""
+        return {k: copy.deepcopy(self._value(k)) for k in self}
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._top[key] = value
+        self._deleted.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._top.pop(key, None)
+        if key in self._base:
+            self._deleted.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._top or (key in self._base and key not in self._deleted)
+
+    def __iter__(self) -> Iterator[str]:
+        # same order as if the top layer had been applied to a copy of the base with dict.update
+        for k in self._base:
+            if k not in self._deleted:
+                yield k
+        for k in self._top:
+            if k not in self._base:
+                yield k
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        # compare underlying values, since a read-only view of a list isn't equal to the list
+        other_value: Callable[[str], Any] = other._value if isinstance(other, EnvelopeData) else other.__getitem__
+        return len(self) == len(other) and all(k in other and self._value(k) == other_value(k) for k in self)
+
+    def __repr__(self) -> str:
+        return repr(self.copy())
+
+
+def _read_only(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType(value)
+    if isinstance(value, list):
+        return tuple(value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
 class Envelope(DupeCheckable):
     """Wrap a notification with a specific set of targets and service data possibly customized for those targets"""
 
@@ -60,7 +149,7 @@ class Envelope(DupeCheckable):
         delivery: Delivery,
         notification: Notification | None = None,
         target: Target | None = None,  # targets only for this delivery
-        data: dict[str, Any] | None = None,
+        data: Mapping[str, Any] | None = None,
         context: Context | None = None,  # notification data customized for this delivery
     ) -> None:
         self.target: Target = target or Target()
@@ -75,25 +164,24 @@ class Envelope(DupeCheckable):
         self._message: str | None = None
         self._title: str | None = None
         self.message_html: str | None = None
-        self.data: dict[str, Any] = {}
         self.actions: list[dict[str, Any]] = []
         if notification:
-            delivery_config_data: dict[str, Any] = notification.delivery_data(delivery)
+            delivery_overrides: dict[str, Any] = notification.delivery_data(delivery)
             self._enabled_scenarios: dict[str, Scenario] = notification.enabled_scenarios
-            self._message = delivery_config_data.pop(ATTR_MESSAGE, notification.message)
-            self._title = delivery_config_data.pop(ATTR_TITLE, notification._title)
+            self._message = delivery_overrides.get(ATTR_MESSAGE, notification.message)
+            self._title = delivery_overrides.get(ATTR_TITLE, notification._title)
             self.id = f"{notification.id}_{self.delivery_name}"
         else:
-            delivery_config_data = {}
+            delivery_overrides = {}
             self._enabled_scenarios = {}
             self.id = str(uuid.uuid1())
-        if data:
-            self.data = copy.deepcopy(data)
-            if delivery_config_data:
-                # notification-level delivery override wins over scenario/delivery data
-                self.data |= delivery_config_data
-        else:
-            self.data = delivery_config_data if delivery_config_data else {}
+        delivery_overrides = {k: v for k, v in delivery_overrides.items() if k not in (ATTR_MESSAGE, ATTR_TITLE)}
+        base: Mapping[str, Any] = data or {}
+        if delivery_overrides:
+            # notification-level delivery override wins over scenario/delivery data
+            base = ChainMap(delivery_overrides, base)
+        # base is shared with other envelopes, so only ever read, changes go into a private layer
+        self.data: EnvelopeData = EnvelopeData(base)
 
         if notification:
             self.notification_id = notification.id
@@ -107,9 +195,6 @@ class Envelope(DupeCheckable):
         else:
             self.condition_variables = ConditionVariables()
 
-        self.message = self._compute_message()
-        self.title = self._compute_title()
-
         self.delivered: int = 0
         self.error_count: int = 0
         self.skipped: int = 0
@@ -118,12 +203,14 @@ class Envelope(DupeCheckable):
         self.failed_calls: list[CallRecord] = []
         self.delivery_error: list[str] | None = None
 
+        self.message = self._compute_message()
+        self.title = self._compute_title()
+
     def customize_data(self, data: dict[str, Any], prune_empty: bool = True) -> dict[str, Any]:
         """Return data filtered by delivery data_keys_select option, pruning empty maps by default."""
         if not data:
             return data
-        rules = self.delivery.options.get(OPTION_DATA_KEYS_SELECT)
-        return DataFilter(rules).apply(data, prune_empty=prune_empty)
+        return self.delivery.data_filter.apply(data, prune_empty=prune_empty)
 
     async def grab_image(self) -> Path | None:
         """Grab an image from a camera, snapshot URL, MQTT Image etc"""
@@ -166,11 +253,49 @@ class Envelope(DupeCheckable):
                 exclude_attrs.append("target")
 
         json_ready = {k: v for k, v in self.__dict__.items() if k not in exclude_attrs and not k.startswith("_")}
-        json_ready["data"] = self._resolve_data_templates(self.data)
+        json_ready["data"] = self._resolve_data_templates(self.data.copy())
         json_ready["calls"] = [call.contents() for call in self.calls]
         json_ready["failedcalls"] = [call.contents() for call in self.failed_calls]
         return json_ready
 
+    def snapshot(self) -> dict[str, Any]:
+        """Rendered fields needed to deliver this envelope again later, with no notification, as plain JSON"""
+        return {
+            "id": self.id,
+            "notification_id": self.notification_id,
+            "delivery": self.delivery_name,
+            "message": self.message,
+            "title": self.title,
+            "message_html": self.message_html,
+            "priority": self.priority,
+            "target": self.target.as_dict(),
+            "target_data": self.target.target_data,
+            "data": self.data.copy(),
+            "media": self.media,
+            "actions": self.actions,
+            "action_groups": self.action_groups,
+        }
+
+    @classmethod
+    def restore(cls, delivery: Delivery, snapshot: Mapping[str, Any], context: Context | None = None) -> Envelope:
+        """Rebuild from a snapshot, without re-rendering message and title"""
+        envelope = cls(
+            delivery,
+            target=Target.trusted(snapshot.get("target") or {}, target_data=snapshot.get("target_data")),
+            data=snapshot.get("data"),
+            context=context,
+        )
+        envelope.id = snapshot.get("id", envelope.id)
+        envelope.notification_id = snapshot.get("notification_id")
+        envelope.message = snapshot.get("message")
+        envelope.title = snapshot.get("title")
+        envelope.message_html = snapshot.get("message_html")
+        envelope.priority = snapshot.get("priority", PRIORITY_MEDIUM)
+        envelope.media = snapshot.get("media")
+        envelope.actions = snapshot.get("actions") or []
+        envelope.action_groups = snapshot.get("action_groups")
+        return envelope
+
     def __eq__(self, other: Any | None) -> bool:
         """Specialized equality check for subset of attributes"""
         if other is None or not isinstance(other, Envelope):
@@ -194,6 +319,14 @@ class Envelope(DupeCheckable):
         return f"Envelope(message={self.message},title={self.title},delivery={self.delivery_name})"
 
     def _compute_title(self, ignore_usage: bool = False) -> str | None:
+        message_usage: str = str(self.delivery.option_str(OPTION_MESSAGE_USAGE)).upper()
+        key = (
+            ignore_usage or message_usage not in (MessageOnlyPolicy.USE_TITLE, MessageOnlyPolicy.COMBINE_TITLE),
+            *self._title_sources(),
+        )
+        return self._shared_text("title", key, lambda: self._render_title(ignore_usage))
+
+    def _render_title(self, ignore_usage: bool = False) -> str | None:
         # message and title reverse the usual defaulting, delivery config overrides runtime call
 
         title: str | None = None
@@ -221,6 +354,17 @@ class Envelope(DupeCheckable):
         return None
 
     def _compute_message(self) -> str | None:
+        key = (
+            self.delivery.message,
+            self._message,
+            self._spoken_message(),
+            str(self.delivery.option_str(OPTION_MESSAGE_USAGE)).upper(),
+            self._scenario_templates("message_template"),
+            *self._title_sources(),
+        )
+        return self._shared_text("message", key, self._render_message)
+
+    def _render_message(self) -> str | None:
         # message and title reverse the usual defaulting, delivery config overrides runtime call
 
         # self._message could be top level `message` or `message` set in delivery override
@@ -229,7 +373,7 @@ class Envelope(DupeCheckable):
 
         if msg and self.context and is_template_string(msg):
             try:
-                context_vars = cast("dict[str,Any]", self.condition_variables.as_dict()) if self.condition_variables else {}
+                context_vars = self.condition_variables.as_dict() if self.condition_variables else {}
                 template = self.context.hass_api.template(msg)
                 msg = template.async_render(variables=context_vars)
             except Exception as e:
@@ -253,24 +397,55 @@ class Envelope(DupeCheckable):
             return None
         return str(msg)
 
-    def _render_scenario_templates(self, original: str | None, template_field: str, matching_ctx: str) -> str | None:
-        """Apply templating to a field, like message or title"""
-        rendered = original if original is not None else ""
+    def _title_sources(self) -> tuple[Any, ...]:
+        """Everything other than condition variables that a rendered title depends on"""
+        return (
+            self.delivery.title,
+            self._title,
+            self.delivery.option_bool(OPTION_SIMPLIFY_TEXT),
+            self.delivery.option_bool(OPTION_STRIP_URLS),
+            getattr(type(self.delivery.transport), "simplify", None),
+            self._scenario_templates("title_template"),
+            self.context is not None,
+        )
+
+    def _shared_text(self, kind: str, key: tuple[Any, ...], render: Callable[[], str | None]) -> str | None:
+        """Render once per notification for all envelopes with the same text sources and options"""
+        if self._notification is None:
+            return render()
+
+        def render_counting_errors() -> tuple[str | None, int]:
+            before: int = self.error_count
+            text: str | None = render()
+            errors: int = self.error_count - before
+            self.error_count = before
+            return text, errors
+
+        text, errors = self._notification.shared_text(kind, key, render_counting_errors)
+        self.error_count += errors
+        return text
+
+    def _scenario_templates(self, template_field: str) -> tuple[str, ...]:
         delivery_configs: list[DeliveryCustomization] = list(
             filter(None, (scenario.delivery_config(self.delivery.name) for scenario in self._enabled_scenarios.values()))
         )
-        template_formats: list[str] = [
+        return tuple(
             dc.data_value(template_field)
             for dc in delivery_configs
             if dc is not None and dc.data_value(template_field) is not None
-        ]
+        )
+
+    def _render_scenario_templates(self, original: str | None, template_field: str, matching_ctx: str) -> str | None:
+        """Apply templating to a field, like message or title"""
+        rendered = original if original is not None else ""
+        template_formats: tuple[str, ...] = self._scenario_templates(template_field)
         if template_formats and self.context:
-            if self.condition_variables:
-                context_vars: dict[str, Any] = cast("dict[str,Any]", self.condition_variables.as_dict())
-            else:
-                context_vars = {}
             for template_format in template_formats:
-                context_vars[matching_ctx] = rendered
+                context_vars: Mapping[str, Any] = (
+                    self.condition_variables.overlay(**{matching_ctx: rendered})
+                    if self.condition_variables
+                    else {matching_ctx: rendered}
+                )
                 try:
                     template = self.context.hass_api.template(template_format)
                     rendered = template.async_render(variables=context_vars)
@@ -284,14 +459,17 @@ class Envelope(DupeCheckable):
 
     # DupeCheckable implementation
 
-    def hash(self) -> int:
-        """Alpha hash to reduce noise from messages with timestamps or incrementing counts"""
+    def fingerprint(self) -> str:
+        """Alpha digest to reduce noise from messages with timestamps or incrementing counts"""
 
         def alphaize(v: str | None) -> str | None:
             return v.translate(HASH_PREP_TRANSLATION_TABLE) if v else v
 
         message: str | None = self._spoken_message() or self._message
-        return hash((alphaize(message), alphaize(self.delivery.name), self.target.hash_resolved(), alphaize(self._title)))
+        # sorted so the same targets in a different order are still a dupe
+        return fingerprint(
+            alphaize(message), alphaize(self.delivery.name), alphaize(self._title), *sorted(self.target.resolved_targets())
+        )
 
     def _resolve_data_templates(self, data: dict[str, Any]) -> dict[str, Any]:
         """Resolve Jinja2 templates in data dict for archive readability.
@@ -303,7 +481,7 @@ class Envelope(DupeCheckable):
         if not data or not self.context:
             return data
         resolved: dict[str, Any] = {}
-        context_vars = cast("dict[str, Any]", self.condition_variables.as_dict()) if self.condition_variables else {}
+        context_vars = self.condition_variables.as_dict() if self.condition_variables else {}
         for key, value in data.items():
             if isinstance(value, str) and "{{" in value:
                 try:
@@ -6,15 +6,16 @@ from functools import partial
 from typing import TYPE_CHECKING, Any
 
 import voluptuous as vol
+from cachetools import LRUCache
 from homeassistant.components.person import ATTR_USER_ID
 from homeassistant.const import CONF_ACTION, CONF_DEVICE_ID
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.event import async_track_state_change_event, async_track_time_change
+from homeassistant.helpers.event import async_call_later, async_track_state_change_event, async_track_time_change
 from homeassistant.util import slugify
 
 if TYPE_CHECKING:
     import asyncio
-    from collections.abc import Callable, Iterable, Iterator
+    from collections.abc import Callable, Coroutine, Iterable, Iterator
 
     import aiohttp
     from anyio import Path
@@ -46,11 +47,13 @@ from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers import issue_registry as ir
 from homeassistant.helpers.json import json_dumps
 from homeassistant.helpers.network import get_url
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.template import Template
 from homeassistant.helpers.trace import trace_get, trace_path
 from homeassistant.helpers.typing import ConfigType
 
 from . import DOMAIN
+from .condition_cache import MemoizedConditions, analyse_conditions
 from .const import CONF_DEVICE_LABELS, CONF_DEVICE_TRACKER, CONF_MOBILE_APP_ID
 from .model import ConditionVariables, SelectionRule
 
@@ -69,6 +72,8 @@ ATTR_MODEL = "model"
 
 _LOGGER = logging.getLogger(__name__)
 
+TEMPLATE_CACHE_SIZE = 256
+
 
 @dataclass
 class DeviceInfo:
@@ -123,6 +128,9 @@ class HomeAssistantAPI:
         self.mobile_apps_by_app_id: dict[str, DeviceInfo] = {}
         self.mobile_apps_by_device_id: dict[str, DeviceInfo] = {}
         self.mobile_apps_by_user_id: dict[str, list[DeviceInfo]] = {}
+        self._templates: LRUCache[str, Template] = LRUCache(maxsize=TEMPLATE_CACHE_SIZE)
+        self.template_hits: int = 0
+        self.template_misses: int = 0
 
     def initialize(self) -> None:
         self.hass_name = self._hass.config.location_name
@@ -169,6 +177,10 @@ class HomeAssistantAPI:
     def subscribe_time(self, hour: int, minute: int, second: int, callback: Callable) -> None:
         self.unsubscribes.append(async_track_time_change(self._hass, callback, hour=hour, minute=minute, second=second))
 
+    def call_later(self, delay: float, callback: Callable) -> CALLBACK_TYPE:
+        """Run a callback once after a delay in seconds, returning a function to cancel it"""
+        return async_call_later(self._hass, delay, callback)
+
     def in_hass_loop(self) -> bool:
         return self._hass is not None and self._hass.loop_thread_id == threading.get_ident()
 
@@ -178,7 +190,7 @@ class HomeAssistantAPI:
     def is_state(self, entity_id: str, state: str) -> bool:
         return self._hass.states.is_state(entity_id, state)
 
-    def set_state(self, entity_id: str, state: str | int | bool, attributes: dict[str, Any] | None = None) -> None:
+    def set_state(self, entity_id: str, state: str | float | bool, attributes: dict[str, Any] | None = None) -> None:
         if self.in_hass_loop():
             self._hass.states.async_set(entity_id, str(state), attributes=attributes)
         else:
@@ -198,6 +210,14 @@ class HomeAssistantAPI:
         """Wrap a blocking function call in a HomeAssistant awaitable job"""
         return self._hass.async_add_executor_job(func, *args)
 
+    def create_background_task(self, target: Coroutine[Any, Any, Any], name: str) -> asyncio.Task[Any]:
+        """Run a long lived coroutine that HomeAssistant won't wait on at startup or shutdown"""
+        return self._hass.async_create_background_task(target, name)
+
+    def create_store(self, key: str, version: int) -> Store[Any]:
+        """HomeAssistant JSON storage, in the hidden .storage directory"""
+        return Store(self._hass, version, key, private=True)
+
     def fire_event(self, event_name: str, event_data: dict[str, Any] | None = None) -> None:
         self._hass.bus.async_fire(event_name, event_data)
 
@@ -333,7 +353,25 @@ class HomeAssistantAPI:
         return expand_entity_ids(self._hass, entity_ids)
 
     def template(self, template_format: str) -> Template:
-        return Template(template_format, self._hass)
+        """Template for a source string, shared so each distinct source is parsed and compiled only once"""
+        template: Template | None = self._templates.get(template_format)
+        if template is None:
+            self.template_misses += 1
+            template = Template(template_format, self._hass)
+            self._templates[template_format] = template
+        else:
+            self.template_hits += 1
+        return template
+
+    def template_cache_attributes(self) -> dict[str, Any]:
+        lookups: int = self.template_hits + self.template_misses
+        return {
+            "size": len(self._templates),
+            "maxsize": self._templates.maxsize,
+            "hits": self.template_hits,
+            "misses": self.template_misses,
+            "hit_rate": round(self.template_hits / lookups, 3) if lookups else 0.0,
+        }
 
     async def register_web_path(self, media_web_path: Path | None, url_prefix: str) -> bool:
         if media_web_path is None:
@@ -365,6 +403,9 @@ class HomeAssistantAPI:
         with trace_action(self._hass, trace_name or "anon_condition") as cond_trace:
             cond_trace.set_trace(trace_get())
             this_trace = cond_trace
+            if isinstance(conditions, MemoizedConditions):
+                # trace needs the conditions run, not a cached result
+                conditions = conditions.conditions
             with trace_path(["condition", "conditions"]) as _tp:
                 result = self.evaluate_conditions(conditions, condition_variables)
             _LOGGER.debug(cond_trace.as_dict())
@@ -396,7 +437,7 @@ class HomeAssistantAPI:
             if test is None:
                 raise IntegrationError(f"Invalid condition {condition_config}")
             test(condition_variables.as_dict())
-            return test
+            return MemoizedConditions(test, analyse_conditions(cond_list), self)
         except Exception:
             _LOGGER.exception("SUPERNOTIFY Conditions eval failed")
             raise
@@ -471,6 +512,10 @@ class HomeAssistantAPI:
             _LOGGER.warning("SUPERNOTIFY Unable to discover devices for - no entity registry found")
             return
 
+        self.mobile_apps_by_tracker = {}
+        self.mobile_apps_by_app_id = {}
+        self.mobile_apps_by_device_id = {}
+        self.mobile_apps_by_user_id = {}
         found: int = 0
         complete: int = 0
         for mobile_app_info in self.discover_devices("mobile_app"):
@@ -2,13 +2,18 @@ from __future__ import annotations
 
 import logging
 import re
+from collections import ChainMap
+from collections.abc import Callable, Iterable, Mapping, Sequence
 from dataclasses import dataclass, field
 from enum import IntFlag, StrEnum, auto
 from traceback import format_exception
+from types import MappingProxyType
 from typing import TYPE_CHECKING, Any, ClassVar
 
 import voluptuous as vol
+from cachetools import LRUCache
 from homeassistant.components.notify import DOMAIN as NOTIFY_DOMAIN
+from homeassistant.components.notify.const import ATTR_DATA
 
 # This import brings in a bunch of other dependency noises, make it manual until py3.14/lazy import/HA updated
 # from homeassistant.components.mobile_app import DOMAIN as MOBILE_APP_DOMAIN
@@ -24,17 +29,34 @@ from homeassistant.const import (
     CONF_ENABLED,
     CONF_OPTIONS,
     CONF_TARGET,
+    CONF_TIMEOUT,
     STATE_HOME,
     STATE_NOT_HOME,
 )
 from homeassistant.core import valid_entity_id
+from voluptuous import humanize
 
-from .common import ensure_list
+from .common import ensure_list, nullable_ensure_list
 from .const import (
+    ATTR_ACTION_GROUPS,
+    ATTR_ACTIONS,
+    ATTR_DEBUG,
+    ATTR_DELIVERY,
+    ATTR_DELIVERY_SELECTION,
     ATTR_EMAIL,
+    ATTR_FORCE_RESEND,
+    ATTR_MEDIA,
+    ATTR_MESSAGE_HTML,
     ATTR_MOBILE_APP_ID,
     ATTR_PERSON_ID,
     ATTR_PHONE,
+    ATTR_PRIORITY,
+    ATTR_RECIPIENTS,
+    ATTR_SCENARIOS_APPLY,
+    ATTR_SCENARIOS_CONSTRAIN,
+    ATTR_SCENARIOS_REQUIRE,
+    CONF_CIRCUIT_BREAKER,
+    CONF_CONCURRENCY,
     CONF_DATA,
     CONF_DELIVERY_DEFAULTS,
     CONF_DEVICE_DISCOVERY,
@@ -46,6 +68,7 @@ from .const import (
     CONF_SELECTION_RANK,
     CONF_TARGET_REQUIRED,
     CONF_TARGET_USAGE,
+    DEFAULT_TRANSPORT_CONCURRENCY,
     OPTION_DEVICE_DISCOVERY,
     OPTION_DEVICE_DOMAIN,
     OPTION_DEVICE_MODEL_SELECT,
@@ -57,15 +80,23 @@ from .const import (
     SELECTION_DEFAULT,
     TARGET_USE_ON_NO_ACTION_TARGETS,
 )
-from .schema import SelectionRank, phone
+from .schema import ACTION_DATA_KEYS, ACTION_DATA_SCHEMA, SelectionRank, phone
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable, Sequence
+    from collections.abc import Container, Iterable, Iterator, Sequence
 
-    from homeassistant.helpers.typing import ConfigType, TemplateVarsType
+    from homeassistant.helpers.typing import ConfigType
 
 _LOGGER = logging.getLogger(__name__)
 
+RE_BACKREFERENCE = re.compile(r"\\[1-9]")
+DEVICE_ID_RE = re.compile(RE_DEVICE_ID)
+EMAIL_VALIDATOR = vol.Email()  # type: ignore[call-arg]
+
+# raw target string to auto detected category, or None if unrecognized, shared by all Target instances
+TARGET_CLASSIFICATION_CACHE_SIZE = 1024
+_target_categories: LRUCache[str, str | None] = LRUCache(maxsize=TARGET_CLASSIFICATION_CACHE_SIZE)
+
 # See note on import of homeassistant.components.mobile_app
 MOBILE_APP_DOMAIN = "mobile_app"
 
@@ -95,6 +126,8 @@ class Target:
 
     UNKNOWN_CUSTOM_CATEGORY = "_UNKNOWN_"
 
+    __slots__ = ("_targets", "_view", "target_data", "target_specific_data")
+
     def __init__(
         self,
         target: str
@@ -109,9 +142,9 @@ class Target:
     ) -> None:
         self.target_data: dict[str, Any] | None = None
         self.target_specific_data: dict[tuple[str, str], dict[str, Any]] | None = None
-        self.targets: dict[str, list[str]] = {}
-
-        matched: list[str]
+        # insertion ordered sets of targets, as dict keys, by category
+        self._targets: dict[str, dict[str, None]] = {}
+        self._view: dict[str, list[str]] | None = None
 
         if isinstance(target, str):
             target = [target]
@@ -120,23 +153,13 @@ class Target:
             pass  # empty constructor is valid case for target building
         elif isinstance(target, list):
             # simplified and legacy way of assuming list of entities that can be discriminated by validator
-            targets_left = list(target)
-            for category in self.AUTO_CATEGORIES:
-                validator = getattr(self, f"is_{category}", None)
-                if validator is not None:
-                    matched = []
-                    for t in targets_left:
-                        if t not in matched and validator(t):
-                            self.targets.setdefault(category, [])
-                            self.targets[category].append(t)
-                            matched.append(t)
-                    targets_left = [t for t in targets_left if t not in matched]
-                else:
-                    _LOGGER.debug("SUPERNOTIFY Missing validator for selective target category %s", category)
-                if not targets_left:
-                    break
-            if targets_left:
-                self.targets[self.UNKNOWN_CUSTOM_CATEGORY] = targets_left
+            classified: dict[str, dict[str, None]] = {}
+            for t in target:
+                classified.setdefault(self.classify(t) or self.UNKNOWN_CUSTOM_CATEGORY, {})[t] = None
+            # keep category order stable, regardless of the order of the targets
+            for category in (*self.AUTO_CATEGORIES, self.UNKNOWN_CUSTOM_CATEGORY):
+                if category in classified:
+                    self._targets[category] = classified[category]
 
         elif isinstance(target, dict):
             for category in target:
@@ -147,32 +170,51 @@ class Target:
                     validator = getattr(self, f"is_{category}", None)
                     if validator is not None:
                         for t in targets:
-                            if validator(t):
-                                self.targets.setdefault(category, [])
-                                if t not in self.targets[category]:
-                                    self.targets[category].append(t)
+                            if self.classify(t) == category or validator(t):
+                                self._targets.setdefault(category, {})[t] = None
                             else:
                                 _LOGGER.warning("SUPERNOTIFY Target skipped invalid %s target: %s", category, t)
                     else:
                         _LOGGER.debug("SUPERNOTIFY Missing validator for selective target category %s", category)
-
-                elif category in self.CATEGORIES:
-                    # categories that can't be automatically detected, like label_id
-                    self.targets[category] = targets
                 else:
-                    # custom categories
-                    self.targets[category] = targets
+                    # categories that can't be automatically detected, like label_id, or custom categories
+                    self._targets[category] = dict.fromkeys(targets)
         else:
             _LOGGER.warning("SUPERNOTIFY Target created with no valid targets: %s", target)
 
         if target_data and target_specific_data:
             self.target_specific_data = {}
-            for category, targets in self.targets.items():
+            for category, targets in self._targets.items():
                 for t in targets:
                     self.target_specific_data[category, t] = target_data
         if target_data and not target_specific_data:
             self.target_data = target_data
 
+    @classmethod
+    def trusted(
+        cls,
+        targets: Mapping[str, Iterable[str]],
+        target_data: dict[str, Any] | None = None,
+        target_specific_data: dict[tuple[str, str], dict[str, Any]] | None = None,
+    ) -> Target:
+        """Build from targets already categorized and validated, such as from another Target, skipping validators"""
+        new: Target = cls.__new__(cls)
+        new._targets = {category: dict.fromkeys(ts) for category, ts in targets.items()}
+        new._view = None
+        new.target_data = target_data
+        new.target_specific_data = target_specific_data
+        return new
+
+    @property
+    def targets(self) -> dict[str, list[str]]:
+        """Targets by category, to be treated as read only, change using `extend` or `remove`"""
+        if self._view is None:
+            self._view = {category: list(ts) for category, ts in self._targets.items()}
+        return self._view
+
+    def includes(self, category: str, target: str) -> bool:
+        return target in self._targets.get(category, ())
+
     # Targets by category
 
     @property
@@ -219,9 +261,27 @@ class Target:
 
     # Selectors / validators
 
+    @classmethod
+    def classify(cls, target: str) -> str | None:
+        """First auto detected category the target is valid for, remembered for the next time it is seen"""
+        try:
+            return _target_categories[target]
+        except KeyError:
+            pass
+        category: str | None = None
+        for candidate in cls.AUTO_CATEGORIES:
+            validator = getattr(cls, f"is_{candidate}", None)
+            if validator is None:
+                _LOGGER.debug("SUPERNOTIFY Missing validator for selective target category %s", candidate)
+            elif validator(target):
+                category = candidate
+                break
+        _target_categories[target] = category
+        return category
+
     @classmethod
     def is_device_id(cls, target: str) -> bool:
-        return re.fullmatch(RE_DEVICE_ID, target) is not None
+        return DEVICE_ID_RE.fullmatch(target) is not None
 
     @classmethod
     def is_entity_id(cls, target: str) -> bool:
@@ -248,106 +308,115 @@ class Target:
 
     @classmethod
     def is_email(cls, target: str) -> bool:
+        if "@" not in target:
+            return False
         try:
-            return vol.Email()(target) is not None  # type: ignore[call-arg]
+            return EMAIL_VALIDATOR(target) is not None
         except vol.Invalid:
             return False
 
     def has_targets(self) -> bool:
-        return any(targets for targets in self.targets.values())
+        return any(self._targets.values())
 
     def has_resolved_target(self) -> bool:
-        return any(targets for category, targets in self.targets.items() if category not in self.INDIRECT_CATEGORIES)
+        return any(targets for category, targets in self._targets.items() if category not in self.INDIRECT_CATEGORIES)
 
     def has_unknown_targets(self) -> bool:
-        return len(self.targets.get(self.UNKNOWN_CUSTOM_CATEGORY, [])) > 0
+        return len(self._targets.get(self.UNKNOWN_CUSTOM_CATEGORY, ())) > 0
 
     def for_category(self, category: str) -> list[str]:
         return self.targets.get(category, [])
 
     def resolved_targets(self) -> list[str]:
         result: list[str] = []
-        for category, targets in self.targets.items():
+        for category, targets in self._targets.items():
             if category not in self.INDIRECT_CATEGORIES:
                 result.extend(targets)
         return result
 
-    def hash_resolved(self) -> int:
-        targets = []
-        for category in self.targets:
-            if category not in self.INDIRECT_CATEGORIES:
-                targets.extend(self.targets[category])
-        return hash(tuple(targets))
-
     @property
     def direct_categories(self) -> list[str]:
-        return self.DIRECT_CATEGORIES + [cat for cat in self.targets if cat not in self.CATEGORIES]
+        return self.DIRECT_CATEGORIES + [cat for cat in self._targets if cat not in self.CATEGORIES]
 
     def direct(self) -> Target:
-        t = Target(
-            {cat: targets for cat, targets in self.targets.items() if cat in self.direct_categories},
+        direct_categories: list[str] = self.direct_categories
+        t = Target.trusted(
+            {cat: targets for cat, targets in self._targets.items() if cat in direct_categories and targets},
             target_data=self.target_data,
         )
         if self.target_specific_data:
-            t.target_specific_data = {k: v for k, v in self.target_specific_data.items() if k[0] in self.direct_categories}
+            t.target_specific_data = {k: v for k, v in self.target_specific_data.items() if k[0] in direct_categories}
         return t
 
     def extend(self, category: str, targets: list[str] | str) -> None:
-        targets = ensure_list(targets)
-        self.targets.setdefault(category, [])
-        self.targets[category].extend(t for t in targets if t not in self.targets[category])
+        self._targets.setdefault(category, {}).update(dict.fromkeys(ensure_list(targets)))
+        self._view = None
 
     def remove(self, category: str, targets: list[str] | str) -> None:
-        targets = ensure_list(targets)
-        if category in self.targets:
-            self.targets[category] = [t for t in self.targets[category] if t not in targets]
+        if category in self._targets:
+            for t in ensure_list(targets):
+                self._targets[category].pop(t, None)
+            self._view = None
 
     def safe_copy(self) -> Target:
-        t = Target(dict(self.targets), target_data=dict(self.target_data) if self.target_data else None)
-        t.target_specific_data = dict(self.target_specific_data) if self.target_specific_data else None
-        return t
+        return Target.trusted(
+            self._targets,
+            target_data=dict(self.target_data) if self.target_data else None,
+            target_specific_data=dict(self.target_specific_data) if self.target_specific_data else None,
+        )
 
     def split_by_target_data(self) -> list[Target]:
         if not self.target_specific_data:
             result = self.safe_copy()
             result.target_specific_data = None
             return [result]
-        results: list[Target] = []
-        default: Target = self.safe_copy()
-        default.target_specific_data = None
-        last_found: dict[str, Any] | None = None
-        collected: dict[str, list[str]] = {}
+        # group by the data object shared by targets added together, in order of first appearance,
+        # also merging into the previous group if equal, as for copies of the same data
+        groups: dict[int, tuple[dict[str, Any], dict[str, list[str]]]] = {}
+        ordered: list[tuple[dict[str, Any], dict[str, list[str]]]] = []
+        last: tuple[dict[str, Any], dict[str, list[str]]] | None = None
         for (category, target), data in self.target_specific_data.items():
-            if last_found is None:
-                last_found = data
-                collected = {category: [target]}
-            elif data != last_found and last_found is not None:
-                new_target: Target = Target(collected, target_data=last_found)
-                results.append(new_target)
-                default -= new_target
-                last_found = data
-                collected = {category: [target]}
-            else:
-                collected.setdefault(category, [])
-                collected[category].append(target)
-        new_target = Target(collected, target_data=last_found)
-        results.append(new_target)
-        default -= new_target
+            group = groups.get(id(data))
+            if group is None:
+                if last is not None and last[0] == data:
+                    group = last
+                else:
+                    group = (data, {})
+                    ordered.append(group)
+                groups[id(data)] = group
+            group[1].setdefault(category, []).append(target)
+            last = group
+        results: list[Target] = [Target.trusted(collected, target_data=data) for data, collected in ordered]
+        default: Target = self.without(self.target_specific_data.keys())
         if default.has_targets():
             results.append(default)
         return results
 
+    def pairs(self) -> Iterator[tuple[str, str]]:
+        """Every target, qualified by its category"""
+        for category, targets in self._targets.items():
+            for t in targets:
+                yield category, t
+
+    def without(self, excluded: Container[tuple[str, str]]) -> Target:
+        """Create a new target leaving out any (category, target) pair in excluded, ignoring target_data"""
+        new = Target.trusted(
+            {category: [t for t in targets if (category, t) not in excluded] for category, targets in self._targets.items()},
+            target_data=self.target_data,
+        )
+        if self.target_specific_data:
+            new.target_specific_data = {k: v for k, v in self.target_specific_data.items() if k not in excluded} or None
+        return new
+
     def __len__(self) -> int:
         """How many targets, whether direct or indirect"""
-        return sum(len(targets) for targets in self.targets.values())
+        return sum(len(targets) for targets in self._targets.values())
 
     def __add__(self, other: Target) -> Target:
         """Create a new target by adding another to this one"""
-        new = Target()
-        categories = set(list(self.targets.keys()) + list(other.targets.keys()))
-        for category in categories:
-            new.targets[category] = list(self.targets.get(category, []))
-            new.targets[category].extend(t for t in other.targets.get(category, []) if t not in new.targets[category])
+        new = Target.trusted(self._targets)
+        for category, targets in other._targets.items():
+            new._targets.setdefault(category, {}).update(targets)
 
         new.target_data = dict(self.target_data) if self.target_data else None
         if other.target_data:
@@ -365,17 +434,14 @@ class Target:
 
     def __sub__(self, other: Target) -> Target:
         """Create a new target by removing another from this one, ignoring target_data"""
-        new = Target()
-        new.target_data = self.target_data
+        new = Target.trusted({}, target_data=self.target_data)
         if self.target_specific_data:
             new.target_specific_data = {
-                k: v for k, v in self.target_specific_data.items() if k[1] not in other.targets.get(k[0], ())
+                k: v for k, v in self.target_specific_data.items() if k[1] not in other._targets.get(k[0], ())
             }
-        categories = set(list(self.targets.keys()) + list(other.targets.keys()))
-        for category in categories:
-            new.targets[category] = []
-            new.targets[category].extend(t for t in self.targets.get(category, []) if t not in other.targets.get(category, []))
-
+        for category in self._targets.keys() | other._targets.keys():
+            removed: dict[str, None] = other._targets.get(category, {})
+            new._targets[category] = {t: None for t in self._targets.get(category, ()) if t not in removed}
         return new
 
     def __eq__(self, other: object) -> bool:
@@ -390,10 +456,14 @@ class Target:
             return False
         if self.target_specific_data != other.target_specific_data:
             return False
-        return all(self.targets.get(category, []) == other.targets.get(category, []) for category in self.CATEGORIES)
+        return all(
+            list(self._targets.get(category, ())) == list(other._targets.get(category, ())) for category in self.CATEGORIES
+        )
+
+    __hash__ = None  # type: ignore[assignment]
 
     def as_dict(self, **_kwargs: Any) -> dict[str, list[str]]:
-        return {k: v for k, v in self.targets.items() if v}
+        return {k: list(v) for k, v in self._targets.items() if v}
 
 
 class TransportConfig:
@@ -405,10 +475,14 @@ class TransportConfig:
             self.delivery_defaults: DeliveryConfig = DeliveryConfig(
                 conf.get(CONF_DELIVERY_DEFAULTS, {}), class_config.delivery_defaults or None
             )
+            self.concurrency: int = conf.get(CONF_CONCURRENCY, class_config.concurrency)
+            self.circuit_breaker: ConfigType = conf.get(CONF_CIRCUIT_BREAKER, class_config.circuit_breaker)
         else:
             self.enabled = conf.get(CONF_ENABLED, True)
             self.alias = conf.get(CONF_ALIAS)
             self.delivery_defaults = DeliveryConfig(conf.get(CONF_DELIVERY_DEFAULTS) or {})
+            self.concurrency = conf.get(CONF_CONCURRENCY, DEFAULT_TRANSPORT_CONCURRENCY)
+            self.circuit_breaker = conf.get(CONF_CIRCUIT_BREAKER) or {}
 
         # deprecation support
         device_domain = conf.get(CONF_DEVICE_DOMAIN)
@@ -452,13 +526,31 @@ class DeliveryCustomization:
         return {CONF_TARGET: self.target.as_dict() if self.target else None, CONF_ENABLED: self.enabled, CONF_DATA: self.data}
 
 
+def compile_fullmatch(patterns: Iterable[str]) -> Callable[[str], bool]:
+    """Matcher for a value fully matching any of the patterns, compiled once for repeated use
+
+    Patterns are merged into a single alternation, unless that would change their meaning,
+    e.g. numbered back references, or can't be compiled, e.g. clashing group names.
+    """
+    compiled: list[re.Pattern[str]] = [re.compile(p) for p in patterns]
+    if len(compiled) == 1:
+        return lambda v: compiled[0].fullmatch(v) is not None
+    if not any(RE_BACKREFERENCE.search(p.pattern) for p in compiled):
+        try:
+            merged: re.Pattern[str] = re.compile("|".join(f"(?:{p.pattern})" for p in compiled))
+            return lambda v: merged.fullmatch(v) is not None
+        except re.error:
+            pass
+    return lambda v: any(p.fullmatch(v) is not None for p in compiled)
+
+
 class SelectionRule:
     def __init__(self, config: str | list[str] | dict | SelectionRule | None) -> None:
         self.include: list[str] | None = None
         self.exclude: list[str] | None = None
         if config is None:
-            return
-        if isinstance(config, SelectionRule):
+            pass
+        elif isinstance(config, SelectionRule):
             self.include = config.include
             self.exclude = config.exclude
         elif isinstance(config, str):
@@ -470,22 +562,24 @@ class SelectionRule:
                 self.include = ensure_list(config.get(SELECT_INCLUDE))
             if config.get(SELECT_EXCLUDE):
                 self.exclude = ensure_list(config.get(SELECT_EXCLUDE))
+        self._included: Callable[[str], bool] | None = compile_fullmatch(self.include) if self.include is not None else None
+        self._excluded: Callable[[str], bool] | None = compile_fullmatch(self.exclude) if self.exclude is not None else None
 
     def match(self, v: str | Iterable[str] | None) -> bool:
-        if self.include is None and self.exclude is None:
+        if self._included is None and self._excluded is None:
             return True
         if isinstance(v, str) or v is None:
-            if self.exclude is not None and v is not None and any(re.fullmatch(pat, v) for pat in self.exclude):
+            if self._excluded is not None and v is not None and self._excluded(v):
                 return False
-            if self.include is not None and (v is None or not any(re.fullmatch(pat, v) for pat in self.include)):
+            if self._included is not None and (v is None or not self._included(v)):
                 return False
         else:
-            if self.exclude is not None:
+            if self._excluded is not None:
                 for vv in v:
-                    if any(re.fullmatch(pat, vv) for pat in self.exclude):
+                    if self._excluded(vv):
                         return False
-            if self.include is not None:
-                return any(any(re.fullmatch(pat, vv) for pat in self.include) for vv in v)
+            if self._included is not None:
+                return any(self._included(vv) for vv in v)
         return True
 
 
@@ -509,6 +603,8 @@ class DataFilter:
         self._include: list[str] | None = None
         self._exclude: list[str] | None = None
         self._sub: dict[str, DataFilter] = {}
+        self._included: Callable[[str], bool] | None = None
+        self._excluded: Callable[[str], bool] | None = None
         if config is None:
             return
         if isinstance(config, str):
@@ -517,6 +613,11 @@ class DataFilter:
             self._include = config
         else:
             self._init_from_dict(config)
+        self._compile()
+
+    def _compile(self) -> None:
+        self._included = compile_fullmatch(self._include) if self._include is not None else None
+        self._excluded = compile_fullmatch(self._exclude) if self._exclude is not None else None
 
     def _init_from_dict(self, config: dict) -> None:
         include_val = config.get(SELECT_INCLUDE)
@@ -566,14 +667,13 @@ class DataFilter:
         excludes, subs = DataFilter._parse_exclude_tree(tree)
         df._exclude = excludes or None
         df._sub = subs
+        df._compile()
         return df
 
     def _match(self, key: str) -> bool:
-        if self._exclude is None and self._include is None:
-            return True
-        if self._exclude is not None and any(re.fullmatch(p, key) for p in self._exclude):
+        if self._excluded is not None and self._excluded(key):
             return False
-        return self._include is None or any(re.fullmatch(p, key) for p in self._include)
+        return self._included is None or self._included(key)
 
     def apply(self, data: dict[str, Any], *, prune_empty: bool = False) -> dict[str, Any]:
         result: dict[str, Any] = {}
@@ -608,6 +708,7 @@ class DeliveryConfig:
             self.selection: list[str] = conf.get(CONF_SELECTION, delivery_defaults.selection)
             self.priority: list[str] = conf.get(CONF_PRIORITY, delivery_defaults.priority)
             self.selection_rank: SelectionRank = conf.get(CONF_SELECTION_RANK, delivery_defaults.selection_rank)
+            self.timeout: float | None = conf.get(CONF_TIMEOUT, delivery_defaults.timeout)
             self.options: ConfigType = conf.get(CONF_OPTIONS, {})
             # only override options not set in config
             if isinstance(delivery_defaults.options, dict):
@@ -625,6 +726,7 @@ class DeliveryConfig:
             self.selection = conf.get(CONF_SELECTION, [SELECTION_DEFAULT])
             self.priority = conf.get(CONF_PRIORITY, list(PRIORITY_VALUES.keys()))
             self.selection_rank = conf.get(CONF_SELECTION_RANK, SelectionRank.ANY)
+            self.timeout = conf.get(CONF_TIMEOUT)
 
     def as_dict(self, **_kwargs: Any) -> dict[str, Any]:
         return {
@@ -637,6 +739,7 @@ class DeliveryConfig:
             CONF_SELECTION_RANK: str(self.selection_rank),
             CONF_TARGET_REQUIRED: str(self.target_required),
             CONF_TARGET_USAGE: self.target_usage,
+            CONF_TIMEOUT: self.timeout,
         }
 
     def __repr__(self) -> str:
@@ -644,70 +747,166 @@ class DeliveryConfig:
         return str(self.as_dict())
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class ActionData:
+    """Notify action data, validated once and split into supernotify fields and pass-through data
+
+    Values are kept as supplied by the caller, validation is only used to reject bad data. Any keys
+    not known to supernotify, plus the contents of a nested `data`, are passed through to transports.
+    """
+
+    priority: Any = PRIORITY_MEDIUM
+    message_html: str | None = None
+    force_resend: bool = False
+    required_scenarios: list[str] = field(default_factory=list)
+    applied_scenarios: list[str] = field(default_factory=list)
+    constrain_scenarios: list[str] = field(default_factory=list)
+    delivery_selection: str | None = None
+    delivery: Any = None
+    action_groups: list[str] | None = None
+    recipients: list[str] | None = None
+    media: dict[str, Any] = field(default_factory=dict)
+    debug: bool = False
+    actions: list[dict[str, Any]] = field(default_factory=list)
+    extra_data: dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def parse(cls, action_data: Mapping[str, Any] | None) -> ActionData:
+        """Split and validate in a single pass, raising a `vol.Error` with humanized messages"""
+        known: dict[str, Any] = {}
+        extra_data: dict[str, Any] = {}
+        for k, v in (action_data or {}).items():
+            if k in ACTION_DATA_KEYS:
+                known[k] = v
+            else:
+                extra_data[k] = v
+        if known:
+            humanize.validate_with_humanized_errors(known, ACTION_DATA_SCHEMA)
+            # nested `data` could be supernotify or target service
+            extra_data.update(known.get(ATTR_DATA) or {})
+        return cls(
+            priority=known.get(ATTR_PRIORITY, PRIORITY_MEDIUM),
+            message_html=known.get(ATTR_MESSAGE_HTML),
+            force_resend=known.get(ATTR_FORCE_RESEND, False),
+            required_scenarios=ensure_list(known.get(ATTR_SCENARIOS_REQUIRE)),
+            applied_scenarios=ensure_list(known.get(ATTR_SCENARIOS_APPLY)),
+            constrain_scenarios=ensure_list(known.get(ATTR_SCENARIOS_CONSTRAIN)),
+            delivery_selection=known.get(ATTR_DELIVERY_SELECTION),
+            delivery=known.get(ATTR_DELIVERY),
+            action_groups=nullable_ensure_list(known.get(ATTR_ACTION_GROUPS)),
+            recipients=nullable_ensure_list(known.get(ATTR_RECIPIENTS)),
+            media=known.get(ATTR_MEDIA) or {},
+            debug=known.get(ATTR_DEBUG, False),
+            actions=ensure_list(known.get(ATTR_ACTIONS)),
+            extra_data=extra_data,
+        )
+
+
 class ConditionVariables:
     """Variables presented to all condition evaluations
 
+    Immutable once created, so the template variables mapping is built once per notification and
+    shared, read-only, by every condition and template rendered for it.
+
     Attributes
     ----------
-        applied_scenarios (list[str]): Scenarios that have been applied
-        required_scenarios (list[str]): Scenarios that must be applied
-        constrain_scenarios (list[str]): Only scenarios in this list, or in explicit apply_scenarios, can be applied
+        applied_scenarios (tuple[str]): Scenarios that have been applied
+        required_scenarios (tuple[str]): Scenarios that must be applied
+        constrain_scenarios (tuple[str]): Only scenarios in this list, or in explicit apply_scenarios, can be applied
         notification_priority (str): Priority of the notification
         notification_message (str): Message of the notification
         notification_title (str): Title of the notification
-        occupancy (list[str]): List of occupancy scenarios
-        notification_data (dict[str,Any]): Additional data passed on notify action call
+        occupancy (tuple[str]): List of occupancy scenarios
+        notification_data (Mapping[str,Any]): Additional data passed on notify action call
 
     """
 
-    applied_scenarios: list[str] = field(default_factory=list)
-    required_scenarios: list[str] = field(default_factory=list)
-    constrain_scenarios: list[str] = field(default_factory=list)
-    notification_priority: str = PRIORITY_MEDIUM
-    notification_message: str | None = ""
-    notification_title: str | None = ""
-    occupancy: list[str] = field(default_factory=list)
+    __slots__ = (
+        "_variables",
+        "applied_scenarios",
+        "constrain_scenarios",
+        "notification_data",
+        "notification_message",
+        "notification_priority",
+        "notification_title",
+        "occupancy",
+        "required_scenarios",
+    )
+
+    applied_scenarios: tuple[str, ...]
+    required_scenarios: tuple[str, ...]
+    constrain_scenarios: tuple[str, ...]
+    notification_priority: str
+    notification_message: str | None
+    notification_title: str | None
+    occupancy: tuple[str, ...]
+    notification_data: Mapping[str, Any]
+    _variables: Mapping[str, Any]
 
     def __init__(
         self,
-        applied_scenarios: list[str] | None = None,
-        required_scenarios: list[str] | None = None,
-        constrain_scenarios: list[str] | None = None,
+        applied_scenarios: Iterable[str] | None = None,
+        required_scenarios: Iterable[str] | None = None,
+        constrain_scenarios: Iterable[str] | None = None,
         delivery_priority: str | None = PRIORITY_MEDIUM,
-        occupiers: dict[str, list[Any]] | None = None,
+        occupiers: Mapping[str, Sequence[Any]] | None = None,
         message: str | None = None,
         title: str | None = None,
-        notification_data: dict[str, Any] | None = None,
+        notification_data: Mapping[str, Any] | None = None,
     ) -> None:
         occupiers = occupiers or {}
-        self.occupancy = []
+        occupancy: list[str] = []
         if not occupiers.get(STATE_NOT_HOME) and occupiers.get(STATE_HOME):
-            self.occupancy.append("ALL_HOME")
+            occupancy.append("ALL_HOME")
         elif occupiers.get(STATE_NOT_HOME) and not occupiers.get(STATE_HOME):
-            self.occupancy.append("ALL_AWAY")
+            occupancy.append("ALL_AWAY")
         if len(occupiers.get(STATE_HOME, [])) == 1:
-            self.occupancy.extend(["LONE_HOME", "SOME_HOME"])
+            occupancy.extend(["LONE_HOME", "SOME_HOME"])
         elif len(occupiers.get(STATE_HOME, [])) > 1 and occupiers.get(STATE_NOT_HOME):
-            self.occupancy.extend(["MULTI_HOME", "SOME_HOME"])
-        self.applied_scenarios = applied_scenarios or []
-        self.required_scenarios = required_scenarios or []
-        self.constrain_scenarios = constrain_scenarios or []
-        self.notification_priority = delivery_priority or PRIORITY_MEDIUM
-        self.notification_message = message
-        self.notification_title = title
-        self.notification_data: dict[str, Any] = notification_data or {}
-
-    def as_dict(self, **_kwargs: Any) -> TemplateVarsType:
+            occupancy.extend(["MULTI_HOME", "SOME_HOME"])
+        values: dict[str, Any] = {
+            "applied_scenarios": tuple(applied_scenarios or ()),
+            "required_scenarios": tuple(required_scenarios or ()),
+            "constrain_scenarios": tuple(constrain_scenarios or ()),
+            "notification_message": message,
+            "notification_title": title,
+            "notification_priority": delivery_priority or PRIORITY_MEDIUM,
+            "occupancy": tuple(occupancy),
+            "notification_data": MappingProxyType(dict(notification_data or {})),
+        }
+        for k, v in values.items():
+            object.__setattr__(self, k, v)
+        object.__setattr__(self, "_variables", MappingProxyType(values))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"ConditionVariables is immutable, can't set {name}")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"ConditionVariables is immutable, can't delete {name}")
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ConditionVariables):
+            return NotImplemented
+        return self._variables == other._variables
+
+    # equal by value, and notification data can hold anything, so can't be used as a key
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"ConditionVariables({dict(self._variables)})"
+
+    def as_dict(self, **_kwargs: Any) -> Mapping[str, Any]:
+        """Template variables, read-only and shared by every caller"""
+        return self._variables
+
+    def overlay(self, **variables: Any) -> Mapping[str, Any]:
+        """Template variables with some added or replaced, without copying the rest"""
+        return ChainMap(variables, self._variables)  # type: ignore[arg-type]
+
+    def contents(self, **_kwargs: Any) -> dict[str, Any]:
+        """Plain copy for archive and action responses"""
         return {
-            "applied_scenarios": self.applied_scenarios,
-            "required_scenarios": self.required_scenarios,
-            "constrain_scenarios": self.constrain_scenarios,
-            "notification_message": self.notification_message,
-            "notification_title": self.notification_title,
-            "notification_priority": self.notification_priority,
-            "occupancy": self.occupancy,
-            "notification_data": self.notification_data,
+            k: list(v) if isinstance(v, tuple) else dict(v) if isinstance(v, Mapping) else v for k, v in self._variables.items()
         }
 
 
@@ -721,6 +920,8 @@ class SuppressionReason(StrEnum):
     TRANSPORT_DISABLED = "TRANSPORT_DISABLED"
     PRIORITY = "PRIORITY"
     DELIVERY_CONDITION = "DELIVERY_CONDITION"
+    TIMEOUT = "TIMEOUT"
+    CIRCUIT_OPEN = "CIRCUIT_OPEN"
     UNKNOWN = "UNKNOWN"
 
 
@@ -775,6 +976,8 @@ class MessageOnlyPolicy(StrEnum):
 
 
 class DebugTrace:
+    enabled: bool = True
+
     def __init__(
         self,
         message: str | None,
@@ -790,6 +993,7 @@ class DebugTrace:
         self.delivery_selection: dict[str, list[str]] = {}
         self.delivery_artefacts: dict[str, Any] = {}
         self.delivery_exceptions: dict[str, dict[str, list[list[str]]]] = {}
+        self.text_renders: dict[str, dict[str, int]] = {}
         self._last_stage: dict[str, str] = {}
         self._last_target: dict[str, Any] = {}
 
@@ -808,6 +1012,8 @@ class DebugTrace:
             results["delivery_artefacts"] = self.delivery_artefacts
         if self.delivery_exceptions:
             results["delivery_exceptions"] = self.delivery_exceptions
+        if self.text_renders:
+            results["text_renders"] = self.text_renders
         return results
 
     def record_target(self, delivery_name: str, stage: str, computed: Target | list[Target]) -> None:
@@ -837,6 +1043,11 @@ class DebugTrace:
         """Debug support for recording detailed target resolution in archived notification"""
         self.delivery_selection[stage] = delivery_selection
 
+    def record_text_render(self, kind: str, reused: bool) -> None:
+        """Count message and title renders, and reuse of an earlier render by another envelope"""
+        counts: dict[str, int] = self.text_renders.setdefault(kind, {"rendered": 0, "reused": 0})
+        counts["reused" if reused else "rendered"] += 1
+
     def record_delivery_artefact(self, delivery: str, artefact_name: str, artefact: Any) -> None:
         self.delivery_artefacts.setdefault(delivery, {})
         self.delivery_artefacts[delivery][artefact_name] = artefact
@@ -845,3 +1056,30 @@ class DebugTrace:
         self.delivery_exceptions.setdefault(delivery, {})
         self.delivery_exceptions[delivery].setdefault(context, [])
         self.delivery_exceptions[delivery][context].append(format_exception(exception))
+
+
+class NullDebugTrace(DebugTrace):
+    """Debug trace when tracing is off, recording only the arguments and any delivery exceptions"""
+
+    enabled: bool = False
+
+    def contents(self, **_kwargs: Any) -> dict[str, Any]:
+        results: dict[str, Any] = {
+            "arguments": {"message": self.message, "title": self.title, "data": self.data, "target": self.target},
+            "traced": False,
+        }
+        if self.delivery_exceptions:
+            results["delivery_exceptions"] = self.delivery_exceptions
+        return results
+
+    def record_target(self, delivery_name: str, stage: str, computed: Target | list[Target]) -> None:
+        pass
+
+    def record_delivery_selection(self, stage: str, delivery_selection: list[str]) -> None:
+        pass
+
+    def record_text_render(self, kind: str, reused: bool) -> None:
+        pass
+
+    def record_delivery_artefact(self, delivery: str, artefact_name: str, artefact: Any) -> None:
+        pass
@@ -4,46 +4,34 @@ import asyncio
 import datetime as dt
 import json
 import logging
+import time
 import uuid
+from collections import ChainMap
 from pathlib import Path as _Path
 from traceback import format_exception
 from typing import TYPE_CHECKING, Any, cast
 
 import homeassistant.util.dt as dt_util
 import voluptuous as vol
-from homeassistant.components.notify.const import ATTR_DATA
-from voluptuous import humanize
 
 from custom_components.supernotify.schema import SelectionRank
 
 from .archive import ArchivableObject
-from .common import ensure_list, nullable_ensure_list, sanitize
+from .common import sanitize
 from .const import (
-    ATTR_ACTION_GROUPS,
-    ATTR_ACTIONS,
-    ATTR_DEBUG,
-    ATTR_DELIVERY,
-    ATTR_DELIVERY_SELECTION,
     ATTR_FORCE_RESEND,
     ATTR_IMAGE,
-    ATTR_MEDIA,
     ATTR_MEDIA_CAMERA_ENTITY_ID,
     ATTR_MEDIA_CLIP_URL,
     ATTR_MEDIA_SNAPSHOT_URL,
-    ATTR_MESSAGE_HTML,
     ATTR_PERSON_ID,
     ATTR_PRIORITY,
-    ATTR_RECIPIENTS,
-    ATTR_SCENARIOS_APPLY,
-    ATTR_SCENARIOS_CONSTRAIN,
-    ATTR_SCENARIOS_REQUIRE,
     ATTR_SPOKEN_MESSAGE,
     ATTR_VIDEO,
     DELIVERY_SELECTION_EXPLICIT,
     DELIVERY_SELECTION_FIXED,
     DELIVERY_SELECTION_IMPLICIT,
     OPTION_UNIQUE_TARGETS,
-    PRIORITY_MEDIUM,
     PRIORITY_VALUES,
     TARGET_USE_FIXED,
     TARGET_USE_MERGE_ALWAYS,
@@ -54,17 +42,21 @@ from .const import (
 from .envelope import Envelope
 from .media_grab import snap_notification_image as _snap_notification_image
 from .model import (
+    ActionData,
     ConditionVariables,
     DebugTrace,
     DeliveryCustomization,
+    NullDebugTrace,
     SuppressionReason,
     Target,
     TargetRequired,
     TransportFeature,
 )
-from .schema import ACTION_DATA_SCHEMA, STRICT_ACTION_DATA_SCHEMA, DeliveryOutcome, EnvelopeOutcome
+from .schema import DeliveryOutcome, EnvelopeOutcome
 
 if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable, Mapping
+
     from .context import Context
     from .delivery import Delivery, DeliveryRegistry
     from .people import PeopleRegistry, Recipient
@@ -93,14 +85,14 @@ class Notification(ArchivableObject):
         action_data: dict[str, Any] | None = None,
     ) -> None:
         self.created: dt.datetime = dt.datetime.now(tz=dt_util.get_default_time_zone())
-        self.debug_trace: DebugTrace = DebugTrace(message=message, title=title, data=action_data, target=target)
         self.message: str | None = message
         self.context: Context = context
         self.people_registry: PeopleRegistry = context.people_registry
         self.delivery_registry: DeliveryRegistry = context.delivery_registry
         action_data = action_data or {}
         self._target: Target | None = Target(target) if target else None
-        self._already_selected: Target = Target()
+        # (category, target) pairs already given to a delivery, for OPTION_UNIQUE_TARGETS
+        self._already_selected: set[tuple[str, str]] = set()
         self._title: str | None = title
         self.id = str(uuid.uuid1())
         self.delivered: int = 0
@@ -110,35 +102,37 @@ class Notification(ArchivableObject):
         self.suppressed: int = 0
         self.fallback: int = 0
         self.dupe: bool = False
+        self.circuit_open: int = 0  # envelopes held back as their transport has been failing
+        self.retry_queued: int = 0  # failed envelopes left to the retry queue
         self.deliveries: dict[DeliveryName, dict[EnvelopeOutcome, list[str] | list[Envelope] | dict[str, Any]]] = {}
         self.delivery_exceptions: dict[DeliveryName, list[str]]
+        # wall clock seconds for each delivery, with its envelopes dispatched concurrently
+        self.delivery_elapsed: dict[DeliveryName, float] = {}
+        # event loop time when all deliveries, including fallbacks, must be complete
+        self._deadline_at: float | None = None
         self._skip_reasons: list[SuppressionReason] = []
+        self._shared_text: dict[tuple[str, Hashable], tuple[str | None, int]] = {}
 
-        self.validate_action_data(action_data)
+        parsed: ActionData = self.validate_action_data(action_data)
         # for compatibility with other notify calls, pass thru surplus data to underlying delivery transports
-        self.extra_data: dict[str, Any] = {
-            k: v for k, v in action_data.items() if k not in STRICT_ACTION_DATA_SCHEMA(action_data)
-        }
-
-        action_data = {k: v for k, v in action_data.items() if k not in self.extra_data}
-        self.extra_data.update(action_data.get(ATTR_DATA, {}))  # nested `data` could be supernotify or target service
-
-        self.priority: str = action_data.get(ATTR_PRIORITY, PRIORITY_MEDIUM)
-        self.message_html: str | None = action_data.get(ATTR_MESSAGE_HTML)
-        self.force_resend: bool = action_data.get(ATTR_FORCE_RESEND, False)
-        self.required_scenario_names: list[str] = ensure_list(action_data.get(ATTR_SCENARIOS_REQUIRE))
-        self.applied_scenario_names: list[str] = ensure_list(action_data.get(ATTR_SCENARIOS_APPLY))
-        self.constrain_scenario_names: list[str] = ensure_list(action_data.get(ATTR_SCENARIOS_CONSTRAIN))
-        self.delivery_selection: str | None = action_data.get(ATTR_DELIVERY_SELECTION)
+        self.extra_data: dict[str, Any] = parsed.extra_data
+
+        self.priority: str = parsed.priority
+        self.message_html: str | None = parsed.message_html
+        self.force_resend: bool = parsed.force_resend
+        self.required_scenario_names: list[str] = parsed.required_scenarios
+        self.applied_scenario_names: list[str] = parsed.applied_scenarios
+        self.constrain_scenario_names: list[str] = parsed.constrain_scenarios
+        self.delivery_selection: str | None = parsed.delivery_selection
         self.delivery_overrides: dict[str, DeliveryCustomization] = {}
 
-        delivery_data = action_data.get(ATTR_DELIVERY)
+        delivery_data = parsed.delivery
         if isinstance(delivery_data, list):
             # a bare list of deliveries implies intent to restrict
             _LOGGER.debug("SUPERNOTIFY defaulting delivery selection as explicit for list %s", delivery_data)
             if self.delivery_selection is None:
                 self.delivery_selection = DELIVERY_SELECTION_EXPLICIT
-            self.delivery_overrides = {k: DeliveryCustomization({}) for k in action_data.get(ATTR_DELIVERY, [])}
+            self.delivery_overrides = {k: DeliveryCustomization({}) for k in delivery_data}
         elif isinstance(delivery_data, str) and delivery_data:
             # a bare list of deliveries implies intent to restrict
             _LOGGER.debug("SUPERNOTIFY defaulting delivery selection as explicit for single %s", delivery_data)
@@ -150,7 +144,7 @@ class Notification(ArchivableObject):
             if self.delivery_selection is None:
                 self.delivery_selection = DELIVERY_SELECTION_IMPLICIT
             _LOGGER.debug("SUPERNOTIFY defaulting delivery selection as implicit for mapping %s", delivery_data)
-            self.delivery_overrides = {k: DeliveryCustomization(v) for k, v in action_data.get(ATTR_DELIVERY, {}).items()}
+            self.delivery_overrides = {k: DeliveryCustomization(v) for k, v in delivery_data.items()}
         elif delivery_data:
             _LOGGER.warning("SUPERNOTIFY Unable to interpret delivery data %s", delivery_data)
             if self.delivery_selection is None:
@@ -159,11 +153,14 @@ class Notification(ArchivableObject):
             if self.delivery_selection is None:
                 self.delivery_selection = DELIVERY_SELECTION_IMPLICIT
 
-        self.action_groups: list[str] | None = nullable_ensure_list(action_data.get(ATTR_ACTION_GROUPS))
-        self.recipients_override: list[str] | None = nullable_ensure_list(action_data.get(ATTR_RECIPIENTS))
-        self.media: dict[str, Any] = action_data.get(ATTR_MEDIA) or {}
-        self.debug: bool = action_data.get(ATTR_DEBUG, False)
-        self.actions: list[dict[str, Any]] = ensure_list(action_data.get(ATTR_ACTIONS))
+        self.action_groups: list[str] | None = parsed.action_groups
+        self.recipients_override: list[str] | None = parsed.recipients
+        self.media: dict[str, Any] = parsed.media
+        self.debug: bool = parsed.debug
+        # decided up front, so untraced notifications pay nothing for the many record calls
+        trace_type: type[DebugTrace] = DebugTrace if context.archive.trace_required(self.debug) else NullDebugTrace
+        self.debug_trace: DebugTrace = trace_type(message=message, title=title, data=action_data, target=target)
+        self.actions: list[dict[str, Any]] = parsed.actions
 
         self.selected_deliveries: dict[str, dict[str, Any]] = {}
         self.enabled_scenarios: dict[str, Scenario] = {}
@@ -172,10 +169,11 @@ class Notification(ArchivableObject):
         self._raw_image_path: Any = None
         self._delivery_error: list[str] | None = None
         self.condition_variables: ConditionVariables
+        self.occupancy: dict[str, list[Recipient]] | None = None
 
     async def initialize(self) -> None:
         """Async post-construction initialization"""
-        self.occupancy: dict[str, list[Recipient]] = self.people_registry.determine_occupancy()
+        self.occupancy = self.people_registry.determine_occupancy()
         self.condition_variables = ConditionVariables(
             self.applied_scenario_names,
             self.required_scenario_names,
@@ -246,7 +244,7 @@ class Notification(ArchivableObject):
                 media_dict[ATTR_MEDIA_SNAPSHOT_URL] = url
         return media_dict
 
-    def validate_action_data(self, action_data: dict[str, Any]) -> None:
+    def validate_action_data(self, action_data: dict[str, Any]) -> ActionData:
         if action_data.get(ATTR_PRIORITY):
             if isinstance(action_data.get(ATTR_PRIORITY), (str, int, float)):
                 if action_data.get(ATTR_PRIORITY) not in PRIORITY_VALUES:
@@ -256,7 +254,7 @@ class Notification(ArchivableObject):
                 self.suppress(SuppressionReason.INVALID_ACTION_DATA)
                 raise vol.Invalid("Priority value must be a simple value")
         try:
-            humanize.validate_with_humanized_errors(action_data, ACTION_DATA_SCHEMA)
+            return ActionData.parse(action_data)
         except vol.Invalid as e:
             _LOGGER.warning("SUPERNOTIFY invalid action data %s: %s", action_data, e)
             self.suppress(SuppressionReason.INVALID_ACTION_DATA)
@@ -284,83 +282,89 @@ class Notification(ArchivableObject):
             self.action_groups = action_groups
 
     def select_deliveries(self) -> dict[str, dict[str, Any]]:
-        scenario_enable_deliveries: list[str] = []
-        scenario_disable_deliveries: list[str] = []
-        default_enable_deliveries: list[str] = []
-        recipients_enable_deliveries: list[str] = []
+        """Select deliveries, reusing a cached plan where the inputs to selection are unchanged
 
-        if self.delivery_selection != DELIVERY_SELECTION_FIXED:
-            for scenario in self.enabled_scenarios.values():
-                scenario_enable_deliveries.extend(scenario.enabling_deliveries())
-            for scenario in self.enabled_scenarios.values():
-                scenario_disable_deliveries.extend(scenario.disabling_deliveries())
+        Plans are invalidated by the delivery registry when a delivery is enabled or disabled
+        """
+        plan_cache = self.context.delivery_registry.selection_plans
+        plan_key = self.selection_plan_key()
+        plan = plan_cache.get(plan_key)
+        if plan is None:
+            trace: list[tuple[str, tuple[str, ...]]] = []
+            results = self._select_deliveries(trace)
+            plan = (tuple(trace), results)
+            plan_cache.put(plan_key, plan)
+        if self.debug_trace.enabled:
+            for stage, stage_deliveries in plan[0]:
+                self.debug_trace.record_delivery_selection(stage, list(stage_deliveries))
+        return {
+            d: {k: list(v) if isinstance(v, list) else v for k, v in delivery_results.items()}
+            for d, delivery_results in plan[1].items()
+        }
+
+    def selection_plan_key(self) -> tuple[Any, ...]:
+        return (
+            frozenset(self.enabled_scenarios),
+            self.delivery_selection,
+            tuple(
+                (delivery, delivery_override.enabled if delivery_override is not None else None)
+                for delivery, delivery_override in self.delivery_overrides.items()
+            ),
+            tuple(recipient.entity_id for recipient in self.all_recipients()),
+        )
 
-            scenario_enable_deliveries = list(set(scenario_enable_deliveries))
-            scenario_disable_deliveries = list(set(scenario_disable_deliveries))
+    def _select_deliveries(self, trace: list[tuple[str, tuple[str, ...]]]) -> dict[str, dict[str, Any]]:
+        # set algebra on bitmasks, each delivery has a stable bit position in the registry
+        registry = self.context.delivery_registry
+        scenario_enable: int = 0
+        scenario_disable: int = 0
+        default_enable: int = 0
+        recipients_enable: int = 0
 
+        if self.delivery_selection != DELIVERY_SELECTION_FIXED:
+            for scenario in self.enabled_scenarios.values():
+                scenario_enable |= scenario.enabling_mask
+                scenario_disable |= scenario.disabling_mask
             for recipient in self.all_recipients():
-                recipients_enable_deliveries.extend(recipient.enabling_delivery_names())
+                recipients_enable |= registry.mask(recipient.enabling_delivery_names())
             if self.delivery_selection == DELIVERY_SELECTION_IMPLICIT:
                 # all deliveries with SELECTION_DEFAULT in CONF_SELECTION
-                default_enable_deliveries = [d.name for d in self.context.delivery_registry.implicit_deliveries]
-
-        self.debug_trace.record_delivery_selection("scenario_enable_deliveries", scenario_enable_deliveries)
-        self.debug_trace.record_delivery_selection("scenario_disable_deliveries", scenario_disable_deliveries)
-        self.debug_trace.record_delivery_selection("default_enable_deliveries", default_enable_deliveries)
-        self.debug_trace.record_delivery_selection("recipient_enable_deliveries", recipients_enable_deliveries)
-
-        override_enable_deliveries: list[str] = []
-        override_disable_deliveries: list[str] = []
-
-        # apply the deliveries defined in the notification action call
-        for delivery, delivery_override in self.delivery_overrides.items():
-            if (
-                (delivery_override is None or delivery_override.enabled is True)
-                and delivery in self.context.delivery_registry.enabled_deliveries
-            ) or (
-                (delivery_override is not None and delivery_override.enabled is True)
-                and delivery in self.context.delivery_registry.disabled_deliveries
-            ):
-                override_enable_deliveries.append(delivery)
-            elif delivery_override is not None and delivery_override.enabled is False:
-                override_disable_deliveries.append(delivery)
-
-        # if self.delivery_selection != DELIVERY_SELECTION_FIXED:
-        #    scenario_disable_deliveries = [
-        #        d.name
-        #        for d in self.context.delivery_registry.deliveries.values()
-        #        if d.selection == [SELECTION_BY_SCENARIO]
-        #        and d.name not in scenario_enable_deliveries
-        #        and (d.name not in override_enable_deliveries or self.delivery_selection != DELIVERY_SELECTION_EXPLICIT)
-        #    ]
-        all_global_enabled: list[str] = list(
-            set(scenario_enable_deliveries + default_enable_deliveries + override_enable_deliveries)
+                default_enable = registry.implicit_mask
+
+        trace.append(("scenario_enable_deliveries", tuple(registry.names(scenario_enable))))
+        trace.append(("scenario_disable_deliveries", tuple(registry.names(scenario_disable))))
+        trace.append(("default_enable_deliveries", tuple(registry.names(default_enable))))
+        trace.append(("recipient_enable_deliveries", tuple(registry.names(recipients_enable))))
+
+        # apply the deliveries defined in the notification action call, a bare delivery name
+        # selects it only if enabled, an explicit enabled:true will select even a disabled delivery
+        override_force = registry.mask(d for d, o in self.delivery_overrides.items() if o is not None and o.enabled is True)
+        override_bare = registry.mask(d for d, o in self.delivery_overrides.items() if o is None)
+        override_enable: int = override_force | (override_bare & registry.enabled_mask)
+        override_disable: int = registry.mask(
+            d for d, o in self.delivery_overrides.items() if o is not None and o.enabled is False
         )
-        all_enabled: list[str] = all_global_enabled + recipients_enable_deliveries
-        # override_enable_deliveries takes precedence: if the action call explicitly
-        # re-enables a delivery that a scenario disabled, remove it from all_disabled.
-        all_disabled: list[str] = [
-            d for d in scenario_disable_deliveries + override_disable_deliveries if d not in override_enable_deliveries
-        ]
-        override_enabled: list[str] = list(set(scenario_enable_deliveries + override_enable_deliveries))
-        self.debug_trace.record_delivery_selection("override_disable_deliveries", override_disable_deliveries)
-        self.debug_trace.record_delivery_selection("override_enable_deliveries", override_enable_deliveries)
 
-        unsorted_maybe_objs: list[Delivery | None] = [
-            self.delivery_registry.deliveries.get(d) for d in all_enabled if d not in all_disabled
-        ]
-        unsorted_objs: list[Delivery] = [
-            d for d in unsorted_maybe_objs if d is not None and (d.enabled or d.name in override_enabled)
+        all_global_enabled: int = scenario_enable | default_enable | override_enable
+        # override_enable takes precedence: if the action call explicitly
+        # re-enables a delivery that a scenario disabled, it isn't disabled.
+        all_disabled: int = (scenario_disable | override_disable) & ~override_enable
+        override_enabled: int = scenario_enable | override_enable
+        trace.append(("override_disable_deliveries", tuple(registry.names(override_disable))))
+        trace.append(("override_enable_deliveries", tuple(registry.names(override_enable))))
+
+        selected_mask: int = (
+            (all_global_enabled | recipients_enable) & ~all_disabled & (registry.enabled_mask | override_enabled)
+        )
+        selected: list[str] = [
+            *registry.names(selected_mask & registry.rank_mask(SelectionRank.FIRST)),
+            *registry.names(selected_mask & registry.rank_mask(SelectionRank.ANY)),
+            *registry.names(selected_mask & registry.rank_mask(SelectionRank.LAST)),
         ]
-        first: list[str] = [d.name for d in unsorted_objs if d.selection_rank == SelectionRank.FIRST]
-        anywhere: list[str] = [d.name for d in unsorted_objs if d.selection_rank == SelectionRank.ANY]
-        last: list[str] = [d.name for d in unsorted_objs if d.selection_rank == SelectionRank.LAST]
-        selected = first + anywhere + last
-        self.debug_trace.record_delivery_selection("ranked", selected)
+        trace.append(("ranked", tuple(selected)))
 
-        # TODO: clean up this ugly logic, reorganize delivery around people
         results: dict[str, dict[str, Any]] = {d: {} for d in selected}
-        personal_deliveries = [d for d in selected if d not in all_global_enabled and d in recipients_enable_deliveries]
+        personal_deliveries = registry.names(selected_mask & recipients_enable & ~all_global_enabled)
         for personal_delivery in personal_deliveries:
             results[personal_delivery].setdefault("recipients", [])
             for recipient in self.all_recipients():
@@ -384,6 +388,8 @@ class Notification(ArchivableObject):
 
         for delivery_name in self.selected_deliveries:
             self.deliveries[delivery_name] = {}
+        if self.context.deadline:
+            self._deadline_at = asyncio.get_running_loop().time() + self.context.deadline
 
         if self._suppression_reason is not None:
             _LOGGER.info("SUPERNOTIFY Suppressing globally silenced/snoozed notification (%s)", self.id)
@@ -391,62 +397,83 @@ class Notification(ArchivableObject):
                 delivery = self.context.delivery_registry.deliveries.get(delivery_name)
                 self.record_result(delivery, suppression_reason=SuppressionReason.SNOOZED)
         else:
-            # Deliveries for transports that call grab_image() are deferred so that
-            # PTZ movement runs concurrently with non-image deliveries (chime, TTS, etc.)
-            camera_configured = bool(self.media.get(ATTR_MEDIA_CAMERA_ENTITY_ID) or self.media.get(ATTR_MEDIA_SNAPSHOT_URL))
-            immediate_deliveries: dict[str, dict[str, Any]] = {}
-            deferred_deliveries: dict[str, dict[str, Any]] = {}
-            for delivery_name, details in self.selected_deliveries.items():
-                d = self.context.delivery_registry.deliveries.get(delivery_name)
-                if d and camera_configured and d.transport.supported_features & TransportFeature.SNAPSHOT_IMAGE:
-                    deferred_deliveries[delivery_name] = details
-                else:
-                    immediate_deliveries[delivery_name] = details
-
-            # Start image grab immediately so PTZ runs while immediate deliveries execute
-            image_task: asyncio.Task | None = None
-            if deferred_deliveries:
-                image_task = asyncio.create_task(_snap_notification_image(self, self.context))
-
-            _LOGGER.debug("SUPERNOTIFY Scheduling %s immediate deliveries", len(deferred_deliveries))
-            await self._schedule_deliveries(immediate_deliveries)
-
-            # Ensure image is ready before running image-requiring deliveries
-            if image_task is not None:
-                wait_timeout: int = 30
-                try:
-                    _LOGGER.debug("SUPERNOTIFY Waiting up to %s for image grab to complete", wait_timeout)
-                    async with asyncio.timeout(wait_timeout):  # TODO: configurable time-out
-                        await image_task
-                except Exception:
-                    _LOGGER.exception("SUPERNOTIFY Failed to pre-grab image")
-
-            _LOGGER.debug("SUPERNOTIFY Scheduling %s deferred deliveries", len(deferred_deliveries))
-            await self._schedule_deliveries(deferred_deliveries)
+            await self._deliver_by_rank()
 
         if self.delivered == 0 and not self._suppression_reason:
-            if self.failed == 0 and not self.dupe:
-                for delivery in self.context.delivery_registry.fallback_by_default_deliveries:
+            # an open circuit is a known failure, skipped without another attempt, while failures
+            # queued for retry are left to the retry rather than also sent by a fallback
+            failing: bool = self.failed > self.retry_queued or self.circuit_open > 0
+            if not failing and not self.dupe and not self.retry_queued:
+                fallbacks = self.context.delivery_registry.fallback_by_default_deliveries
+                if fallbacks:
                     _LOGGER.info(
-                        "SUPERNOTIFY no delivery succeeded, activating fallback_by_default: %s",
-                        delivery.name,
+                        "SUPERNOTIFY no delivery succeeded, activating fallback_by_default: %s", [d.name for d in fallbacks]
                     )
-                    if delivery.name not in self.selected_deliveries:
-                        await self.call_transport(delivery)
-                        self.fallback += 1
+                    await self._deliver_fallbacks(fallbacks)
 
-            if self.failed > 0:
-                for delivery in self.context.delivery_registry.fallback_on_error_deliveries:
+            if failing:
+                fallbacks = self.context.delivery_registry.fallback_on_error_deliveries
+                if fallbacks:
                     _LOGGER.warning(
-                        "SUPERNOTIFY delivery failed, activating fallback_on_error: %s",
-                        delivery.name,
+                        "SUPERNOTIFY delivery failed, activating fallback_on_error: %s", [d.name for d in fallbacks]
                     )
-                    if delivery.name not in self.selected_deliveries:
-                        await self.call_transport(delivery)
-                        self.fallback += 1
+                    await self._deliver_fallbacks(fallbacks)
 
         return self.delivered > 0
 
+    async def _deliver_by_rank(self) -> None:
+        """Deliver in stages by selection rank, FIRST deliveries all completing before ANY start, and then LAST
+
+        Deliveries for transports that call grab_image() are deferred within their stage, so that
+        PTZ movement runs concurrently with non-image deliveries (chime, TTS, etc.)
+        """
+        camera_configured = bool(self.media.get(ATTR_MEDIA_CAMERA_ENTITY_ID) or self.media.get(ATTR_MEDIA_SNAPSHOT_URL))
+        stages: dict[SelectionRank, tuple[dict[str, dict[str, Any]], dict[str, dict[str, Any]]]] = {
+            rank: ({}, {}) for rank in (SelectionRank.FIRST, SelectionRank.ANY, SelectionRank.LAST)
+        }
+        for delivery_name, details in self.selected_deliveries.items():
+            d = self.context.delivery_registry.deliveries.get(delivery_name)
+            immediate, deferred = stages[d.selection_rank if d else SelectionRank.ANY]
+            if d and camera_configured and d.transport.supported_features & TransportFeature.SNAPSHOT_IMAGE:
+                deferred[delivery_name] = details
+            else:
+                immediate[delivery_name] = details
+
+        # Start image grab immediately so PTZ runs while immediate deliveries execute
+        image_task: asyncio.Task | None = None
+        if any(deferred for _immediate, deferred in stages.values()):
+            image_task = asyncio.create_task(_snap_notification_image(self, self.context))
+
+        for rank, (immediate, deferred) in stages.items():
+            if immediate or deferred:
+                _LOGGER.debug(
+                    "SUPERNOTIFY Scheduling %s stage, %s immediate and %s deferred deliveries",
+                    rank,
+                    len(immediate),
+                    len(deferred),
+                )
+                await asyncio.gather(self._schedule_deliveries(immediate), self._schedule_deferred(deferred, image_task))
+
+    async def _schedule_deferred(self, deliveries: dict[str, dict[str, Any]], image_task: asyncio.Task | None) -> None:
+        if not deliveries:
+            return
+        # Ensure image is ready before running image-requiring deliveries
+        if image_task is not None:
+            wait_timeout: int = 30
+            try:
+                _LOGGER.debug("SUPERNOTIFY Waiting up to %s for image grab to complete", wait_timeout)
+                async with asyncio.timeout(wait_timeout):  # TODO: configurable time-out
+                    await image_task
+            except Exception:
+                _LOGGER.exception("SUPERNOTIFY Failed to pre-grab image")
+        await self._schedule_deliveries(deliveries)
+
+    async def _deliver_fallbacks(self, fallbacks: tuple[Delivery, ...]) -> None:
+        """Call fallback deliveries not already selected, all at the same time"""
+        unselected: dict[str, dict[str, Any]] = {d.name: {} for d in fallbacks if d.name not in self.selected_deliveries}
+        self.fallback += len(unselected)
+        await self._schedule_deliveries(unselected)
+
     async def _schedule_deliveries(self, deliveries: dict[str, dict[str, Any]]) -> None:
         delivery_coros = []
         for delivery_name, details in deliveries.items():
@@ -462,6 +489,7 @@ class Notification(ArchivableObject):
                     _LOGGER.error("SUPERNOTIFY Unexpected error in parallel delivery: %s", result)
 
     async def call_transport(self, delivery: Delivery, recipients: list[str] | None = None) -> None:
+        started: float = time.monotonic()
         try:
             transport: Transport = delivery.transport
             if not transport.enabled:
@@ -490,25 +518,72 @@ class Notification(ArchivableObject):
                     reason = SuppressionReason.UNKNOWN
                 self.record_result(delivery, targets=targets, suppression_reason=reason)
 
+            pending: list[Envelope] = []
             for envelope in envelopes:
                 if not self.force_resend and self.context.dupe_checker.check(envelope):
                     _LOGGER.debug("SUPERNOTIFY Suppressing dupe envelope, %s", self.message)
                     self.record_result(delivery, envelope, suppression_reason=SuppressionReason.DUPE)
+                else:
+                    pending.append(envelope)
+
+            # checked last, so only envelopes that would really be sent can take the probe when half open
+            allowed: int = transport.circuit_breaker.allowance(len(pending))
+            if allowed < len(pending):
+                _LOGGER.debug(
+                    "SUPERNOTIFY Holding back %s envelopes for %s, %s transport circuit %s",
+                    len(pending) - allowed,
+                    delivery.name,
+                    transport.name,
+                    transport.circuit_breaker.state,
+                )
+                for envelope in pending[allowed:]:
+                    self.circuit_open += 1
+                    self.record_result(delivery, envelope, suppression_reason=SuppressionReason.CIRCUIT_OPEN)
+                pending = pending[:allowed]
+
+            time_limit: float | None = self.time_limit(delivery)
+            outcomes: list[bool | BaseException] = await asyncio.gather(
+                *(self._dispatch(transport, envelope, time_limit) for envelope in pending), return_exceptions=True
+            )
+            # recorded in envelope order, whatever order the transport calls completed in
+            for envelope, outcome in zip(pending, outcomes, strict=True):
+                if isinstance(outcome, TimeoutError):
+                    _LOGGER.warning("SUPERNOTIFY Timed out delivering %s after %ss", delivery.name, time.monotonic() - started)
+                    envelope.error_count = envelope.error_count + 1
+                    transport.record_error("Timed out", method="deliver")
+                    transport.circuit_breaker.record_failure()
+                    envelope.delivery_error = [f"Timed out after {time.monotonic() - started:.1f}s"]
+                    self.record_result(delivery, envelope, suppression_reason=SuppressionReason.TIMEOUT)
                     continue
-                try:
-                    if not await transport.deliver(envelope, debug_trace=self.debug_trace):
+                if isinstance(outcome, BaseException):
+                    _LOGGER.error("SUPERNOTIFY Failed to deliver %s", delivery.name, exc_info=outcome)
+                    envelope.error_count = envelope.error_count + 1
+                    transport.record_error(str(outcome), method="deliver")
+                    envelope.delivery_error = format_exception(outcome)
+                    transport.circuit_breaker.record_failure()
+                else:
+                    if not outcome:
                         _LOGGER.info(
                             "SUPERNOTIFY No delivery for %s (targets: %s)",
                             delivery.name,
                             envelope.target.as_dict() if envelope.target else "NONE",
                         )
-                    self.record_result(delivery, envelope)
-                except Exception as e2:
-                    _LOGGER.exception("SUPERNOTIFY Failed to deliver %s", delivery.name)
-                    envelope.error_count = envelope.error_count + 1
-                    transport.record_error(str(e2), method="deliver")
-                    envelope.delivery_error = format_exception(e2)
-                    self.record_result(delivery, envelope)
+                    if envelope.delivered:
+                        transport.circuit_breaker.record_success()
+                    elif envelope.error_count:
+                        transport.circuit_breaker.record_failure()
+                self.record_result(delivery, envelope)
+
+            if self.context.retry_queue is not None:
+                for envelope in pending:
+                    # a timed out call may still have reached its target, so not repeated
+                    if (
+                        envelope.error_count
+                        and not envelope.delivered
+                        and envelope.skip_reason != SuppressionReason.TIMEOUT
+                        and self.context.retry_queue.add(envelope)
+                    ):
+                        self.retry_queued += 1
 
         except Exception as e:
             _LOGGER.exception(
@@ -518,6 +593,21 @@ class Notification(ArchivableObject):
             )
             self.delivery_exceptions.setdefault(delivery.name, [])
             self.delivery_exceptions[delivery.name].append("\n".join(format_exception(e)))
+        finally:
+            self.delivery_elapsed[delivery.name] = round(time.monotonic() - started, 3)
+
+    def time_limit(self, delivery: Delivery) -> float | None:
+        """Event loop time for delivery calls to complete by, the sooner of the delivery timeout and notification deadline"""
+        limits: list[float] = []
+        if delivery.timeout:
+            limits.append(asyncio.get_running_loop().time() + delivery.timeout)
+        if self._deadline_at is not None:
+            limits.append(self._deadline_at)
+        return min(limits) if limits else None
+
+    async def _dispatch(self, transport: Transport, envelope: Envelope, time_limit: float | None) -> bool:
+        async with asyncio.timeout_at(time_limit):
+            return await transport.dispatch(envelope, debug_trace=self.debug_trace)
 
     def record_result(
         self,
@@ -625,9 +715,9 @@ class Notification(ArchivableObject):
             total_ok = 0
             total_all = 0
             for d_name, outcomes in self.deliveries.items():
-                for envelope in outcomes.get(EnvelopeOutcome.SUCCESS, []):
-                    dur = sum(c.contents().get("elapsed", 0) for c in getattr(envelope, "calls", [])) * 1000
-                    all_durations[d_name] = dur
+                for _envelope in outcomes.get(EnvelopeOutcome.SUCCESS, []):
+                    # wall time, envelopes of a delivery being dispatched concurrently
+                    all_durations[d_name] = self.delivery_elapsed.get(d_name, 0) * 1000
                     total_ok += 1
                     total_all += 1
                 for _envelope in outcomes.get(EnvelopeOutcome.ERROR, []):
@@ -658,6 +748,17 @@ class Notification(ArchivableObject):
             delivery_override = self.delivery_overrides.get(delivery.transport.name)
         return delivery_override.data if delivery_override and delivery_override.data else {}
 
+    def shared_text(self, kind: str, key: Hashable, render: Callable[[], tuple[str | None, int]]) -> tuple[str | None, int]:
+        """Rendered message or title, with its error count, reused by envelopes with the same sources and text options"""
+        cached: tuple[str | None, int] | None = self._shared_text.get((kind, key))
+        if cached is None:
+            cached = render()
+            self._shared_text[kind, key] = cached
+            self.debug_trace.record_text_render(kind, reused=False)
+        else:
+            self.debug_trace.record_text_render(kind, reused=True)
+        return cached
+
     @property
     def delivered_envelopes(self) -> list[Envelope]:
         result: list[Envelope] = []
@@ -779,10 +880,10 @@ class Notification(ArchivableObject):
         self.debug_trace.record_target(delivery.name, "620_narrow_to_direct", direct_targets)
 
         if delivery.options.get(OPTION_UNIQUE_TARGETS, False):
-            direct_targets = [t - self._already_selected for t in direct_targets]
+            direct_targets = [t.without(self._already_selected) for t in direct_targets]
             self.debug_trace.record_target(delivery.name, "630_make_unique_across_deliveries", direct_targets)
         for direct_target in direct_targets:
-            self._already_selected += direct_target
+            self._already_selected.update(direct_target.pairs())
         self.debug_trace.record_target(delivery.name, "999_final_cut", direct_targets)
         return direct_targets
 
@@ -811,7 +912,7 @@ class Notification(ArchivableObject):
 
     def default_person_ids(self, delivery: Delivery) -> Target:
         # If target not specified on service call or delivery, then default to std list of recipients
-        people: list[Recipient] = self.people_registry.filter_recipients_by_occupancy(delivery.occupancy)
+        people: list[Recipient] = self.people_registry.filter_recipients_by_occupancy(delivery.occupancy, self.occupancy)
         people = [p for p in people if self.recipients_override is None or p.entity_id in self.recipients_override]
         return Target({ATTR_PERSON_ID: [p.entity_id for p in people if p.entity_id]})
 
@@ -823,7 +924,7 @@ class Notification(ArchivableObject):
         for person_id in target.person_ids:
             recipient: Recipient | None = self.people_registry.people.get(person_id)
             if recipient and recipient.enabled:
-                recipient_target = recipient.target(delivery.name)
+                recipient_target = self.people_registry.recipient_target(recipient, delivery.name)
                 if recipient_target.target_specific_data:
                     additional.append(recipient_target)
                 else:
@@ -837,28 +938,20 @@ class Notification(ArchivableObject):
         # now the list of recipients determined, resolve this to target addresses or entities
 
         envelopes: list[Envelope] = []
+        # data layers shared read-only by all the envelopes, highest priority first
+        # action call data is applied last to prioritize it, then scenario customization, target and delivery data
+        shared_layers: list[Mapping[str, Any]] = [{k: v for k, v in self.extra_data.items() if k not in INTERNAL_DATA_KEYS}]
+        # scenario applied at cross-delivery level in apply_enabled_scenarios
+        for scenario in reversed(self.enabled_scenarios.values()):
+            customization: DeliveryCustomization | None = scenario.delivery_customization(delivery.name)
+            if customization and customization.data:
+                shared_layers.append(customization.data)
         for target in targets:
             # a target is always generated, even if there are no recipients
             if target.has_resolved_target() or delivery.target_required != TargetRequired.ALWAYS:
-                envelope_data = {}
-
-                # least priority - delivery derived data
-                envelope_data.update(delivery.data)
-                # next least priority - target derived data
-                if target.target_data:
-                    envelope_data.update(target.target_data)
-
-                # scenario applied at cross-delivery level in apply_enabled_scenarios
-                for scenario in self.enabled_scenarios.values():
-                    customization: DeliveryCustomization | None = scenario.delivery_customization(delivery.name)
-                    if customization and customization.data:
-                        envelope_data.update(customization.data)
-
-                # apply data from action call last to prioritize it
-                envelope_data.update({
-                    k: v for k, v in self.extra_data.items() if k not in INTERNAL_DATA_KEYS
-                })  # action call data
-
+                envelope_data: ChainMap[str, Any] = ChainMap(
+                    *shared_layers, *(layer for layer in (target.target_data, delivery.data) if layer)
+                )
                 envelopes.append(Envelope(delivery, self, target, envelope_data, context=self.context))
 
         return envelopes
@@ -0,0 +1,197 @@
+"""Bounded, priority ordered queue of pending notifications, drained by a pool of async workers"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.const import CONF_ENABLED
+
+from . import DOMAIN
+from .const import CONF_QUEUE_WORKERS, CONF_SIZE, PRIORITY_MEDIUM, PRIORITY_VALUES
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from homeassistant.helpers.typing import ConfigType
+
+    from .hass_api import HomeAssistantAPI
+
+_LOGGER = logging.getLogger(__name__)
+
+QUEUE_DEPTH_ENTITY_ID = f"sensor.{DOMAIN}_queue_depth"
+QUEUE_WAIT_ENTITY_ID = f"sensor.{DOMAIN}_queue_wait"
+STOP_DRAIN_TIMEOUT = 30  # seconds allowed to deliver what is still queued when stopping
+
+
+def priority_rank(priority: Any) -> int:
+    """Numeric rank of a notification priority, higher is more urgent"""
+    if isinstance(priority, int):
+        return priority
+    if isinstance(priority, str):
+        if priority.isdigit():
+            return int(priority)
+        return PRIORITY_VALUES.get(priority, PRIORITY_VALUES[PRIORITY_MEDIUM])
+    return PRIORITY_VALUES[PRIORITY_MEDIUM]
+
+
+class NotificationQueue:
+    """Decouple the notify action caller from delivery
+
+    Entries are ordered by priority rank, highest first, and then by arrival, so a critical
+    notification overtakes any queued low or medium ones. The queue is bounded, a caller
+    awaiting `put` on a full queue is held until a worker frees a slot.
+
+    On stopping, anything already queued is still delivered, within a time limit, and notifications
+    arriving meanwhile are delivered directly rather than queued.
+    """
+
+    def __init__(self, config: ConfigType | None, hass_api: HomeAssistantAPI) -> None:
+        config = config or {}
+        self.hass_api: HomeAssistantAPI = hass_api
+        self.enabled: bool = config.get(CONF_ENABLED, False)
+        self.worker_count: int = config.get(CONF_QUEUE_WORKERS, 4)
+        self.size: int = config.get(CONF_SIZE, 100)
+        self._queue: asyncio.PriorityQueue[tuple[int, int, float, tuple[Any, ...]]] | None = None
+        self._workers: list[asyncio.Task[None]] = []
+        self._sequence = itertools.count()
+        self._handler: Callable[..., Awaitable[None]] | None = None
+        self._stopping: bool = False
+        self._putters: set[asyncio.Future[None]] = set()
+        self.processed: int = 0
+        self.last_wait: float = 0.0
+        self.max_wait: float = 0.0
+        self.total_wait: float = 0.0
+        self.abandoned: int = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self, handler: Callable[..., Awaitable[None]]) -> None:
+        if not self.enabled or self.running:
+            return
+        self._handler = handler
+        self._stopping = False
+        self._queue = asyncio.PriorityQueue(maxsize=self.size)
+        self._workers = [
+            self.hass_api.create_background_task(self._work(), f"{DOMAIN}_queue_worker_{i}") for i in range(self.worker_count)
+        ]
+        _LOGGER.info("SUPERNOTIFY notification queue started, %s workers, size %s", self.worker_count, self.size)
+        self.update_sensors()
+
+    async def stop(self, drain_timeout: float = STOP_DRAIN_TIMEOUT) -> None:
+        """Deliver what is queued, waiting up to `drain_timeout` seconds, then stop the workers
+
+        Callers still waiting for a slot after that are failed, and anything left in the queue abandoned
+        """
+        if not self.running or self._queue is None:
+            return
+        self._stopping = True
+        if self.depth or self._putters:
+            _LOGGER.info("SUPERNOTIFY notification queue stopping, delivering %s queued", self.depth)
+        try:
+            async with asyncio.timeout(drain_timeout):
+                # callers already waiting for a slot get to queue first, none are added once stopping
+                if self._putters:
+                    await asyncio.wait(set(self._putters))
+                await self._queue.join()
+        except TimeoutError:
+            _LOGGER.warning("SUPERNOTIFY notification queue not drained after %ss", drain_timeout)
+        workers = self._workers
+        self._workers = []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for putter in self._putters:
+            putter.cancel()
+        abandoned: int = 0
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+            abandoned += 1
+        self.abandoned += abandoned
+        if abandoned or self._putters:
+            _LOGGER.warning(
+                "SUPERNOTIFY notification queue stopped, abandoned %s queued and %s waiting to queue",
+                abandoned,
+                len(self._putters),
+            )
+        else:
+            _LOGGER.info("SUPERNOTIFY notification queue stopped")
+        self.update_sensors()
+
+    async def put(self, priority: Any, *args: Any) -> None:
+        """Queue a notification for delivery, waiting for a free slot if the queue is full"""
+        if self._queue is None or self._handler is None:
+            raise RuntimeError("SUPERNOTIFY notification queue not started")
+        if self._stopping:
+            # no new work for workers about to stop, so deliver before returning
+            await self._handler(*args)
+            return
+        putter: asyncio.Future[None] = asyncio.ensure_future(
+            self._queue.put((-priority_rank(priority), next(self._sequence), time.monotonic(), args))
+        )
+        self._putters.add(putter)
+        try:
+            await putter
+        except asyncio.CancelledError:
+            current: asyncio.Task[Any] | None = asyncio.current_task()
+            if self._stopping and (current is None or not current.cancelling()):
+                raise RuntimeError("SUPERNOTIFY notification queue stopped before notification queued") from None
+            raise
+        finally:
+            self._putters.discard(putter)
+        self.update_sensors()
+
+    async def join(self) -> None:
+        """Wait until everything queued so far has been delivered"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _work(self) -> None:
+        if self._queue is None or self._handler is None:
+            return
+        while True:
+            _rank, _seq, queued_at, args = await self._queue.get()
+            try:
+                self.record_wait(time.monotonic() - queued_at)
+                await self._handler(*args)
+            except Exception:
+                # handler is expected to be its own fault barrier, this keeps the worker alive regardless
+                _LOGGER.exception("SUPERNOTIFY queue worker failed to process notification")
+            finally:
+                self._queue.task_done()
+                self.update_sensors()
+
+    def record_wait(self, wait: float) -> None:
+        self.processed += 1
+        self.last_wait = wait
+        self.max_wait = max(self.max_wait, wait)
+        self.total_wait += wait
+
+    def attributes(self) -> dict[str, Any]:
+        return {
+            CONF_ENABLED: self.enabled,
+            CONF_QUEUE_WORKERS: self.worker_count,
+            CONF_SIZE: self.size,
+            "processed": self.processed,
+            "abandoned": self.abandoned,
+            "max_wait": round(self.max_wait, 3),
+            "mean_wait": round(self.total_wait / self.processed, 3) if self.processed else 0.0,
+        }
+
+    def update_sensors(self) -> None:
+        if not self.enabled:
+            return
+        self.hass_api.set_state(QUEUE_DEPTH_ENTITY_ID, self.depth, self.attributes())
+        self.hass_api.set_state(
+            QUEUE_WAIT_ENTITY_ID, round(self.last_wait, 3), {"unit_of_measurement": "s", **self.attributes()}
+        )
@@ -4,7 +4,6 @@ from __future__ import annotations
 
 import json
 import logging
-from dataclasses import asdict
 from traceback import format_exception
 from typing import TYPE_CHECKING, Any
 
@@ -35,14 +34,17 @@ from homeassistant.helpers.reload import async_setup_reload_service
 
 from . import DOMAIN, PLATFORMS
 from .archive import ARCHIVE_PURGE_MIN_INTERVAL, NotificationArchive
-from .common import DupeChecker, sanitize
+from .common import DupeChecker, boolify, sanitize
 from .const import (
     ATTR_ACTION,
+    ATTR_BLOCKING,
     ATTR_DATA,
+    ATTR_PRIORITY,
     CONF_ACTION_GROUPS,
     CONF_ACTIONS,
     CONF_ARCHIVE,
     CONF_CAMERAS,
+    CONF_DEADLINE,
     CONF_DELIVERY,
     CONF_DUPE_CHECK,
     CONF_HOUSEKEEPING,
@@ -52,8 +54,10 @@ from .const import (
     CONF_MEDIA_STORAGE_DAYS,
     CONF_MEDIA_URL_PREFIX,
     CONF_MOBILE_DISCOVERY,
+    CONF_QUEUE,
     CONF_RECIPIENTS,
     CONF_RECIPIENTS_DISCOVERY,
+    CONF_RETRY,
     CONF_SCENARIOS,
     CONF_SNOOZE,
     CONF_TEMPLATE_PATH,
@@ -66,10 +70,13 @@ from .hass_api import HomeAssistantAPI
 from .media_grab import MediaStorage
 from .model import ConditionVariables, SuppressionReason
 from .notification import Notification
+from .notification_queue import NotificationQueue
 from .people import PeopleRegistry, Recipient
+from .retry_queue import RetryQueue
 from .scenario import ScenarioRegistry
 from .schema import SUPERNOTIFY_SCHEMA as PLATFORM_SCHEMA
 from .snoozer import Snoozer
+from .state_store import StateStore
 from .transports.alexa_devices import AlexaDevicesTransport
 from .transports.alexa_media_player import AlexaMediaPlayerTransport
 from .transports.chime import ChimeTransport
@@ -151,6 +158,9 @@ async def async_get_service(
         cameras=config[CONF_CAMERAS],
         dupe_check=config[CONF_DUPE_CHECK],
         snooze=config[CONF_SNOOZE],
+        queue=config[CONF_QUEUE],
+        deadline=config.get(CONF_DEADLINE),
+        retry=config[CONF_RETRY],
     )
     await service.initialize()
 
@@ -172,6 +182,9 @@ async def async_get_service(
             CONF_CAMERAS: config.get(CONF_CAMERAS, {}),
             CONF_DUPE_CHECK: config.get(CONF_DUPE_CHECK, {}),
             CONF_SNOOZE: config.get(CONF_SNOOZE, {}),
+            CONF_QUEUE: config.get(CONF_QUEUE, {}),
+            CONF_RETRY: config.get(CONF_RETRY, {}),
+            CONF_DEADLINE: config.get(CONF_DEADLINE),
         }
 
     def supplemental_action_refresh_entities(_call: ServiceCall) -> None:
@@ -361,6 +374,9 @@ class SupernotifyAction(BaseNotificationService):
         cameras: list[dict[str, Any]] | None = None,
         dupe_check: dict[str, Any] | None = None,
         snooze: dict[str, Any] | None = None,
+        queue: dict[str, Any] | None = None,
+        deadline: float | None = None,
+        retry: dict[str, Any] | None = None,
     ) -> None:
         """Initialize the service."""
         self.last_notification: Notification | None = None
@@ -368,12 +384,14 @@ class SupernotifyAction(BaseNotificationService):
         self.housekeeping: dict[str, Any] = housekeeping or {}
         self.sent: int = 0
         hass_api = HomeAssistantAPI(hass)
+        delivery_registry = DeliveryRegistry(deliveries or {}, transport_configs or {}, TRANSPORTS)
+        self.retry_queue = RetryQueue(retry, hass_api, delivery_registry)
 
         self.context = Context(
             hass_api,
             PeopleRegistry(recipients or [], hass_api, discover=recipients_discovery, mobile_discovery=mobile_discovery),
             ScenarioRegistry(scenarios or {}),
-            DeliveryRegistry(deliveries or {}, transport_configs or {}, TRANSPORTS),
+            delivery_registry,
             DupeChecker(dupe_check or {}),
             NotificationArchive(archive or {}, hass_api),
             MediaStorage(
@@ -387,8 +405,12 @@ class SupernotifyAction(BaseNotificationService):
             mobile_actions,
             template_path,
             cameras=cameras,
+            deadline=deadline,
+            retry_queue=self.retry_queue,
         )
 
+        self.queue = NotificationQueue(queue, hass_api)
+        self.state_store = StateStore(hass_api, self.context.dupe_checker, self.context.snoozer)
         self.exposed_entities: list[str] = []
 
     async def initialize(self) -> None:
@@ -403,6 +425,8 @@ class SupernotifyAction(BaseNotificationService):
         )
         await self.context.archive.initialize()
         await self.context.media_storage.initialize(self.context.hass_api)
+        await self.state_store.initialize()
+        await self.retry_queue.initialize()
 
         self.expose_entities()
         self.context.hass_api.subscribe_event("mobile_app_notification_action", self.on_mobile_action)
@@ -420,13 +444,20 @@ class SupernotifyAction(BaseNotificationService):
             )
 
         self.context.hass_api.subscribe_event(EVENT_HOMEASSISTANT_STOP, self.async_shutdown)
+        self.queue.start(self.dispatch)
 
     async def async_shutdown(self, event: Event) -> None:
         _LOGGER.info("SUPERNOTIFY shutting down, %s (%s)", event.event_type, event.time_fired)
+        await self.queue.stop()
+        self.retry_queue.stop()
         self.shutdown()
 
     async def async_unregister_services(self) -> None:
         _LOGGER.info("SUPERNOTIFY unregistering")
+        await self.queue.stop()
+        self.retry_queue.stop()
+        await self.state_store.save()  # flush pending delayed write before a reload reads it back
+        await self.retry_queue.save()
         self.shutdown()
         return await super().async_unregister_services()
 
@@ -437,11 +468,19 @@ class SupernotifyAction(BaseNotificationService):
     async def async_send_message(
         self, message: str = "", title: str | None = None, target: list[str] | str | None = None, **kwargs: Any
     ) -> None:
-        """Send a message via chosen transport."""
+        """Send a message via chosen transport, or queue it if worker pool configured"""
         data = kwargs.get(ATTR_DATA, {})
-        notification = None
         _LOGGER.debug("Message: %s, target: %s, data: %s", message, target, data)
+        if self.queue.running and not boolify((data or {}).get(ATTR_BLOCKING), default=False):
+            await self.queue.put((data or {}).get(ATTR_PRIORITY), message, title, target, data)
+        else:
+            await self.dispatch(message, title, target, data)
 
+    async def dispatch(
+        self, message: str = "", title: str | None = None, target: list[str] | str | None = None, data: Any = None
+    ) -> None:
+        """Build and deliver a notification, then archive it"""
+        notification = None
         try:
             notification = Notification(self.context, message, title, target, data)
             await notification.initialize()
@@ -543,16 +582,21 @@ class SupernotifyAction(BaseNotificationService):
                     if new_state.state == "off" and recipient.enabled:
                         recipient.enabled = False
                         _LOGGER.info(f"SUPERNOTIFY Disabling recipient {recipient.entity_id}")
+                        self.context.people_registry.recipient_changed(recipient.entity_id)
                         changes += 1
                     elif new_state.state == "on" and not recipient.enabled:
                         recipient.enabled = True
                         _LOGGER.info(f"SUPERNOTIFY Enabling recipient {recipient.entity_id}")
+                        self.context.people_registry.recipient_changed(recipient.entity_id)
                         changes += 1
                     else:
                         _LOGGER.info(f"SUPERNOTIFY No change to recipient {recipient.entity_id}, already {new_state}")
 
             else:
                 _LOGGER.warning("SUPERNOTIFY entity event with nothing to do:%s", event)
+        if changes:
+            # any toggle may alter which deliveries a notification selects
+            self.context.delivery_registry.selection_plans.clear()
 
     def expose_entity(
         self,
@@ -674,7 +718,7 @@ class SupernotifyAction(BaseNotificationService):
 
         enabled = []
         disabled = []
-        dcvars = asdict(cvars)
+        dcvars = cvars.contents()
         for s in self.context.scenario_registry.scenarios.values():
             if await s.trace(cvars):
                 enabled.append(safe_json(s.attributes(include_trace=True)))
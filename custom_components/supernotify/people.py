@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+from types import MappingProxyType
 from typing import TYPE_CHECKING, Any
 
 from homeassistant.components.binary_sensor import (
@@ -18,6 +19,7 @@ from homeassistant.const import (
     STATE_NOT_HOME,
     EntityCategory,
 )
+from homeassistant.core import callback
 from homeassistant.helpers import device_registry, entity_registry
 
 from .common import ensure_list
@@ -48,13 +50,18 @@ from .const import (
 from .model import DeliveryCustomization, Target
 
 if TYPE_CHECKING:
-    from homeassistant.core import State
+    import datetime as dt
+    from collections.abc import Mapping
+
+    from homeassistant.core import CALLBACK_TYPE, Event, State
 
     from .hass_api import DeviceInfo, HomeAssistantAPI
 
 
 _LOGGER = logging.getLogger(__name__)
 
+REDISCOVERY_DELAY = 5  # seconds after the last device registry change before looking for new mobile devices
+
 
 class Recipient:
     """Recipient to distinguish from the native HA Person"""
@@ -199,6 +206,14 @@ class PeopleRegistry:
         self.device_registry = device_registry
         self.mobile_discovery = mobile_discovery
         self.discover = discover
+        # resolved target per recipient, with a row entry only for deliveries the recipient personalises
+        self._base_targets: dict[str, Target] = {}
+        self._recipient_configs: dict[str, dict[str, Any]] = {}
+        self._rediscovery: CALLBACK_TYPE | None = None
+        self._target_table: dict[str, Mapping[str, Target]] = {}
+        # person states as last seen, and the home/away split derived from them
+        self._person_states: dict[str, State | None] = {}
+        self._occupancy: dict[str, list[Recipient]] | None = None
 
     def initialize(self) -> None:
         recipients: dict[str, dict[str, Any]] = {}
@@ -224,6 +239,65 @@ class PeopleRegistry:
             recipient.initialize(self)
 
             self.people[recipient.entity_id] = recipient
+            self._recipient_configs[recipient.entity_id] = r
+            self.refresh_targets(recipient.entity_id)
+
+        self._person_states = {}
+        self._occupancy = None
+        if any(p.mobile_discovery for p in self.people.values()):
+            self.hass_api.subscribe_event(device_registry.EVENT_DEVICE_REGISTRY_UPDATED, self._device_registry_listener)
+
+    @callback
+    def _device_registry_listener(self, _event: Event[device_registry.EventDeviceRegistryUpdatedData]) -> None:
+        # mobile app registers its entities and notify action after the device, and changes arrive in bursts
+        if self._rediscovery is not None:
+            self._rediscovery()
+        self._rediscovery = self.hass_api.call_later(REDISCOVERY_DELAY, self._rediscover_mobile_devices)
+
+    @callback
+    def _rediscover_mobile_devices(self, _now: dt.datetime | None = None) -> None:
+        """Rediscover mobile devices, since one may have been added, removed or renamed"""
+        self._rediscovery = None
+        self.hass_api.build_mobile_app_cache()
+        for entity_id, existing in list(self.people.items()):
+            if not existing.mobile_discovery:
+                continue
+            recipient: Recipient = Recipient(self._recipient_configs[entity_id], default_mobile_discovery=self.mobile_discovery)
+            recipient.initialize(self)
+            recipient.enabled = existing.enabled
+            if recipient.mobile_devices != existing.mobile_devices:
+                _LOGGER.info("SUPERNOTIFY Mobile devices changed for %s", entity_id)
+                self.people[entity_id] = recipient
+                self.recipient_changed(entity_id)
+
+    def recipient_changed(self, entity_id: str) -> None:
+        """Refresh anything derived from a recipient after its configuration or enablement changed"""
+        self.refresh_targets(entity_id)
+        self._occupancy = None
+
+    def refresh_targets(self, entity_id: str) -> None:
+        """Rebuild the precomputed targets for a recipient"""
+        recipient: Recipient | None = self.people.get(entity_id)
+        if recipient is None:
+            self._base_targets.pop(entity_id, None)
+            self._target_table.pop(entity_id, None)
+            return
+        self._base_targets[entity_id] = recipient.target("")
+        self._target_table[entity_id] = MappingProxyType({
+            d: recipient.target(d) for d in recipient.delivery_overrides if recipient.delivery_overrides[d].enabled is not False
+        })
+
+    def recipient_target(self, recipient: Recipient, delivery_name: str) -> Target:
+        """Resolved target for a recipient on a delivery, copied from the precomputed table so free to modify"""
+        row: Mapping[str, Target] | None = self._target_table.get(recipient.entity_id)
+        if row is None:
+            self.refresh_targets(recipient.entity_id)
+            row = self._target_table.get(recipient.entity_id)
+            if row is None:
+                # not a registered recipient
+                return recipient.target(delivery_name)
+        personal_target: Target | None = row.get(delivery_name)
+        return (personal_target if personal_target is not None else self._base_targets[recipient.entity_id]).safe_copy()
 
     def person_attributes(self, entity_id: str) -> dict[str, Any] | None:
         state: State | None = self.hass_api.get_state(entity_id)
@@ -237,7 +311,13 @@ class PeopleRegistry:
     def enabled_recipients(self) -> list[Recipient]:
         return [p for p in self.people.values() if p.enabled]
 
-    def filter_recipients_by_occupancy(self, delivery_occupancy: str) -> list[Recipient]:
+    def filter_recipients_by_occupancy(
+        self, delivery_occupancy: str, occupancy: dict[str, list[Recipient]] | None = None
+    ) -> list[Recipient]:
+        """Select enabled recipients by occupancy rule
+
+        Pass in the occupancy determined at the start of a notification to keep it consistent throughout
+        """
         if delivery_occupancy == OCCUPANCY_NONE:
             return []
 
@@ -245,7 +325,8 @@ class PeopleRegistry:
         if delivery_occupancy == OCCUPANCY_ALL:
             return people
 
-        occupancy = self.determine_occupancy()
+        if occupancy is None:
+            occupancy = self.determine_occupancy()
 
         away = occupancy[STATE_NOT_HOME]
         at_home = occupancy[STATE_HOME]
@@ -276,6 +357,18 @@ class PeopleRegistry:
         return None
 
     def determine_occupancy(self) -> dict[str, list[Recipient]]:
+        """Enabled recipients split by home and away, shared until a person's state changes, so not to be modified
+
+        Home Assistant replaces a State object on every change, so the split is rebuilt only if any person's
+        current State is not the one last seen, which also picks up a change not yet announced by an event
+        """
+        states: dict[str, State | None] = {person_id: self.hass_api.get_state(person_id) for person_id in self.people}
+        if self._occupancy is None or any(state is not self._person_states.get(p) for p, state in states.items()):
+            self._person_states = states
+            self._occupancy = self._build_occupancy()
+        return self._occupancy
+
+    def _build_occupancy(self) -> dict[str, list[Recipient]]:
         results: dict[str, list[Recipient]] = {STATE_HOME: [], STATE_NOT_HOME: []}
         for person_id, person_config in self.people.items():
             if person_config.enabled:
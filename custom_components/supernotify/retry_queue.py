@@ -0,0 +1,268 @@
+"""Persistent queue of failed envelopes, re-sent with exponential backoff by a single timer"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.const import CONF_ENABLED
+from homeassistant.core import callback
+from homeassistant.helpers.json import json_dumps
+
+from . import DOMAIN
+from .const import CONF_BACKOFF, CONF_MAX_ATTEMPTS, CONF_MAX_BACKOFF, CONF_PRIORITY, CONF_SIZE, PRIORITY_MEDIUM
+from .envelope import Envelope
+
+if TYPE_CHECKING:
+    import datetime as dt
+
+    from homeassistant.core import CALLBACK_TYPE
+    from homeassistant.helpers.storage import Store
+    from homeassistant.helpers.typing import ConfigType
+
+    from .delivery import DeliveryRegistry
+    from .hass_api import HomeAssistantAPI
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.retry"
+SAVE_DELAY = 10  # seconds, multiple changes within this window are coalesced into a single write
+
+RETRY_DEPTH_ENTITY_ID = f"sensor.{DOMAIN}_retry_depth"
+RETRY_AGE_ENTITY_ID = f"sensor.{DOMAIN}_retry_age"
+
+
+@dataclass
+class RetryEntry:
+    envelope: dict[str, Any]  # Envelope.snapshot()
+    priority: str
+    failed_at: float  # epoch seconds of the original failure
+    next_attempt: float  # epoch seconds
+    attempts: int = 0
+    last_error: str | None = None
+
+    def dump(self) -> dict[str, Any]:
+        return {
+            "envelope": self.envelope,
+            "priority": self.priority,
+            "failed_at": round(self.failed_at, 1),
+            "next_attempt": round(self.next_attempt, 1),
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+        }
+
+
+class RetryQueue:
+    """Re-send envelopes that failed, surviving Home Assistant restarts
+
+    Each envelope is retried up to `max_attempts` times, waiting `backoff` seconds before the first retry,
+    doubling for each one after up to `max_backoff`, and randomly shortened by up to half so a batch of
+    failures don't all retry in lockstep. Both can be overridden for each priority, with a `max_attempts`
+    of 0 for no retries at that priority. A single timer is kept set for the next envelope due.
+    """
+
+    def __init__(self, config: ConfigType | None, hass_api: HomeAssistantAPI, delivery_registry: DeliveryRegistry) -> None:
+        config = config or {}
+        self.hass_api: HomeAssistantAPI = hass_api
+        self.delivery_registry: DeliveryRegistry = delivery_registry
+        self.enabled: bool = config.get(CONF_ENABLED, False)
+        self.size: int = config.get(CONF_SIZE, 100)
+        self.default_policy: dict[str, float] = {
+            CONF_MAX_ATTEMPTS: config.get(CONF_MAX_ATTEMPTS, 5),
+            CONF_BACKOFF: config.get(CONF_BACKOFF, 30),
+            CONF_MAX_BACKOFF: config.get(CONF_MAX_BACKOFF, 3600),
+        }
+        self.priority_policies: dict[str, dict[str, float]] = config.get(CONF_PRIORITY) or {}
+        self.entries: dict[str, RetryEntry] = {}
+        self._in_flight: set[str] = set()
+        self._store: Store[dict[str, Any]] | None = None
+        self._timer: CALLBACK_TYPE | None = None
+        self.retried: int = 0
+        self.recovered: int = 0
+        self.abandoned: int = 0
+
+    async def initialize(self) -> None:
+        if not self.enabled:
+            return
+        try:
+            self._store = self.hass_api.create_store(STORAGE_KEY, STORAGE_VERSION)
+            saved: dict[str, Any] | None = await self._store.async_load()
+        except Exception as e:
+            _LOGGER.warning("SUPERNOTIFY Unable to load saved retries, retries will not persist: %s", e)
+            self._store = None
+            saved = None
+        if saved:
+            for key, entry in (saved.get("entries") or {}).items():
+                try:
+                    self.entries[key] = RetryEntry(**entry)
+                except TypeError as e:
+                    _LOGGER.warning("SUPERNOTIFY Discarding unreadable saved retry %s: %s", key, e)
+            _LOGGER.info("SUPERNOTIFY Restored %s envelopes to retry", len(self.entries))
+        self.schedule()
+        self.update_sensors()
+
+    def stop(self) -> None:
+        if self._timer is not None:
+            self._timer()
+            self._timer = None
+
+    def policy(self, priority: str | None) -> dict[str, float]:
+        return {**self.default_policy, **self.priority_policies.get(priority or PRIORITY_MEDIUM, {})}
+
+    def backoff(self, priority: str | None, attempt: int) -> float:
+        """Seconds to wait before a retry attempt, counting from 1"""
+        policy: dict[str, float] = self.policy(priority)
+        delay: float = min(policy[CONF_MAX_BACKOFF], policy[CONF_BACKOFF] * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def add(self, envelope: Envelope) -> bool:
+        """Queue a failed envelope for retry, if retries enabled for its priority"""
+        if not self.enabled or not self.policy(envelope.priority)[CONF_MAX_ATTEMPTS]:
+            return False
+        try:
+            snapshot: dict[str, Any] = envelope.snapshot()
+            json_dumps(snapshot)  # fail now rather than when the whole queue is saved
+        except Exception as e:
+            _LOGGER.warning("SUPERNOTIFY Unable to queue %s for retry: %s", envelope.delivery_name, e)
+            return False
+        while len(self.entries) >= self.size:
+            oldest: str = min(self.entries, key=lambda k: self.entries[k].failed_at)
+            _LOGGER.warning("SUPERNOTIFY Retry queue full, abandoning %s", self.entries[oldest].envelope.get("delivery"))
+            del self.entries[oldest]
+            self.abandoned += 1
+        now: float = time.time()
+        self.entries[uuid.uuid4().hex] = RetryEntry(
+            envelope=snapshot,
+            priority=envelope.priority,
+            failed_at=now,
+            next_attempt=now + self.backoff(envelope.priority, 1),
+            last_error=envelope.delivery_error[-1].strip() if envelope.delivery_error else None,
+        )
+        self.changed()
+        return True
+
+    def changed(self) -> None:
+        self.schedule()
+        if self._store is not None:
+            self._store.async_delay_save(self.dump, SAVE_DELAY)
+        self.update_sensors()
+
+    def schedule(self) -> None:
+        """Set the single timer for the next envelope due, replacing any previous one"""
+        if self._timer is not None:
+            self._timer()
+            self._timer = None
+        waiting: list[float] = [e.next_attempt for k, e in self.entries.items() if k not in self._in_flight]
+        if waiting:
+            self._timer = self.hass_api.call_later(max(0.0, min(waiting) - time.time()), self._on_timer)
+
+    @callback
+    def _on_timer(self, _now: dt.datetime) -> None:
+        self._timer = None
+        self.hass_api.create_background_task(self.retry_due(), f"{DOMAIN}_retry")
+
+    async def retry_due(self) -> None:
+        now: float = time.time()
+        due: list[str] = [k for k, e in self.entries.items() if e.next_attempt <= now and k not in self._in_flight]
+        self._in_flight.update(due)
+        try:
+            outcomes: list[bool | BaseException] = await asyncio.gather(
+                *(self.retry(self.entries[k]) for k in due), return_exceptions=True
+            )
+            for key, outcome in zip(due, outcomes, strict=True):
+                entry: RetryEntry | None = self.entries.get(key)
+                if entry is None:  # evicted while in flight
+                    continue
+                if outcome is True:
+                    _LOGGER.info("SUPERNOTIFY Retry %s of %s succeeded", entry.attempts, entry.envelope.get("delivery"))
+                    self.recovered += 1
+                    del self.entries[key]
+                elif isinstance(outcome, TimeoutError) or entry.attempts >= self.policy(entry.priority)[CONF_MAX_ATTEMPTS]:
+                    # a timed out call may still have reached its target, so not repeated
+                    _LOGGER.warning(
+                        "SUPERNOTIFY Abandoning %s after %s retries: %s",
+                        entry.envelope.get("delivery"),
+                        entry.attempts,
+                        entry.last_error,
+                    )
+                    self.abandoned += 1
+                    del self.entries[key]
+                else:
+                    entry.next_attempt = time.time() + self.backoff(entry.priority, entry.attempts + 1)
+        finally:
+            self._in_flight.difference_update(due)
+            self.changed()
+
+    async def retry(self, entry: RetryEntry) -> bool:
+        entry.attempts += 1
+        self.retried += 1
+        delivery = self.delivery_registry.deliveries.get(entry.envelope.get("delivery"))
+        if delivery is None:
+            entry.last_error = "delivery no longer configured or enabled"
+            return False
+        if not delivery.transport.enabled or not delivery.transport.circuit_breaker.allow():
+            entry.last_error = "transport unavailable"
+            return False
+        envelope: Envelope = Envelope.restore(delivery, entry.envelope)
+        try:
+            async with asyncio.timeout(delivery.timeout):
+                await delivery.transport.dispatch(envelope)
+        except TimeoutError:
+            delivery.transport.circuit_breaker.record_failure()
+            entry.last_error = f"Timed out after {delivery.timeout}s"
+            raise
+        except Exception as e:
+            delivery.transport.circuit_breaker.record_failure()
+            entry.last_error = str(e)
+            raise
+        if envelope.delivered:
+            delivery.transport.circuit_breaker.record_success()
+            return True
+        if envelope.error_count:
+            delivery.transport.circuit_breaker.record_failure()
+        entry.last_error = envelope.delivery_error[-1].strip() if envelope.delivery_error else str(envelope.skip_reason)
+        return False
+
+    def dump(self) -> dict[str, Any]:
+        return {"entries": {k: e.dump() for k, e in self.entries.items()}}
+
+    async def save(self) -> None:
+        """Write immediately, rather than waiting for the delayed save"""
+        if self._store is not None:
+            await self._store.async_save(self.dump())
+
+    @property
+    def depth(self) -> int:
+        return len(self.entries)
+
+    @property
+    def oldest_age(self) -> float:
+        return max((time.time() - e.failed_at for e in self.entries.values()), default=0.0)
+
+    def attributes(self) -> dict[str, Any]:
+        return {
+            CONF_ENABLED: self.enabled,
+            CONF_SIZE: self.size,
+            **self.default_policy,
+            CONF_PRIORITY: self.priority_policies,
+            "retried": self.retried,
+            "recovered": self.recovered,
+            "abandoned": self.abandoned,
+            "next_attempt_in": round(max(0.0, min(e.next_attempt for e in self.entries.values()) - time.time()), 1)
+            if self.entries
+            else None,
+        }
+
+    def update_sensors(self) -> None:
+        if not self.enabled:
+            return
+        self.hass_api.set_state(RETRY_DEPTH_ENTITY_ID, self.depth, self.attributes())
+        self.hass_api.set_state(
+            RETRY_AGE_ENTITY_ID, round(self.oldest_age, 1), {"unit_of_measurement": "s", **self.attributes()}
+        )
@@ -7,6 +7,7 @@ from typing import TYPE_CHECKING, Any
 from homeassistant.const import CONF_ENABLED
 from homeassistant.helpers import issue_registry as ir
 
+from .condition_cache import MemoizedConditions
 from .const import ATTR_MEDIA
 from .model import DeliveryCustomization
 
@@ -74,6 +75,9 @@ class Scenario:
         self._delivery_selector: dict[str, str] = {}
         self.last_trace: ActionTrace | None = None
         self.startup_issue_count: int = 0
+        # delivery registry bitmasks, precomputed once delivery overrides resolved
+        self.enabling_mask: int = 0
+        self.disabling_mask: int = 0
 
         delivery_data = scenario_definition.get(CONF_DELIVERY)
         if isinstance(delivery_data, list):
@@ -164,6 +168,9 @@ class Scenario:
                     learn_more_url="https://supernotify.rhizomatics.org.uk/scenarios/",
                 )
 
+        self.enabling_mask = self.delivery_registry.mask(self.enabling_deliveries())
+        self.disabling_mask = self.delivery_registry.mask(self.disabling_deliveries())
+
         if valid_action_group_names is not None:
             invalid_action_groups: list[str] = []
             for action_group_name in self.action_groups:
@@ -213,6 +220,8 @@ class Scenario:
             attrs[ATTR_FRIENDLY_NAME] = self.alias
         if include_condition:
             attrs["conditions"] = self.conditions_config
+            if isinstance(self.conditions, MemoizedConditions):
+                attrs["condition_cache"] = self.conditions.attributes()
         if include_trace and self.last_trace:
             attrs["trace"] = self.last_trace.as_extended_dict()
         return attrs
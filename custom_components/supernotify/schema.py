@@ -20,6 +20,7 @@ from homeassistant.const import (
     CONF_ID,
     CONF_NAME,
     CONF_TARGET,
+    CONF_TIMEOUT,
     CONF_URL,
 )
 from homeassistant.helpers import config_validation as cv
@@ -34,6 +35,7 @@ from .const import (
     ATTR_ACTION_URL,
     ATTR_ACTION_URL_TITLE,
     ATTR_ACTIONS,
+    ATTR_BLOCKING,
     ATTR_DATA,
     ATTR_DEBUG,
     ATTR_DELIVERY,
@@ -76,10 +78,15 @@ from .const import (
     CONF_ARCHIVE_MQTT_TOPIC,
     CONF_ARCHIVE_PATH,
     CONF_ARCHIVE_PURGE_INTERVAL,
+    CONF_ARCHIVE_TRACE_SAMPLE,
+    CONF_BACKOFF,
     CONF_CAMERA,
     CONF_CAMERAS,
+    CONF_CIRCUIT_BREAKER,
     CONF_CLASS,
+    CONF_CONCURRENCY,
     CONF_DATA,
+    CONF_DEADLINE,
     CONF_DELIVERY,
     CONF_DELIVERY_DEFAULTS,
     CONF_DEVICE_DISCOVERY,
@@ -90,10 +97,13 @@ from .const import (
     CONF_DUPE_CHECK,
     CONF_DUPE_POLICY,
     CONF_DURATION,
+    CONF_FAILURE_THRESHOLD,
     CONF_HOUSEKEEPING,
     CONF_HOUSEKEEPING_TIME,
     CONF_LINKS,
     CONF_MANUFACTURER,
+    CONF_MAX_ATTEMPTS,
+    CONF_MAX_BACKOFF,
     CONF_MEDIA,
     CONF_MEDIA_PATH,
     CONF_MEDIA_STORAGE_DAYS,
@@ -108,12 +118,16 @@ from .const import (
     CONF_PERSON,
     CONF_PHONE_NUMBER,
     CONF_PRIORITY,
+    CONF_PROBE_INTERVAL,
     CONF_PTZ_CAMERA,
     CONF_PTZ_DELAY,
     CONF_PTZ_METHOD,
     CONF_PTZ_PRESET_DEFAULT,
+    CONF_QUEUE,
+    CONF_QUEUE_WORKERS,
     CONF_RECIPIENTS,
     CONF_RECIPIENTS_DISCOVERY,
+    CONF_RETRY,
     CONF_SCENARIOS,
     CONF_SELECTION,
     CONF_SELECTION_RANK,
@@ -132,6 +146,7 @@ from .const import (
     CONF_TUNE,
     CONF_URI,
     CONF_VOLUME,
+    CONF_WINDOW,
     DELIVERY_SELECTION_VALUES,
     OCCUPANCY_ALL,
     OCCUPANCY_VALUES,
@@ -204,10 +219,12 @@ class SelectionRank(StrEnum):
 type ConditionsFunc = Callable[[TemplateVarsType], bool]
 
 
+RE_PHONE = re.compile(r"^(\+\d{1,3})?\s?\(?\d{1,4}\)?[\s.-]?\d{3}[\s.-]?\d{4}$")
+
+
 def phone(value: str) -> str:
     """Validate a phone number"""
-    regex = re.compile(r"^(\+\d{1,3})?\s?\(?\d{1,4}\)?[\s.-]?\d{3}[\s.-]?\d{4}$")
-    if not regex.match(value):
+    if not RE_PHONE.match(value):
         raise vol.Invalid("Invalid Phone Number")
     return str(value)
 
@@ -274,6 +291,31 @@ LINK_SCHEMA = vol.Schema({
 
 SNOOZE_SCHEMA = vol.Schema({vol.Optional(CONF_SNOOZE_TIME, default=60 * 60): cv.positive_int})
 
+CIRCUIT_BREAKER_SCHEMA = vol.Schema({
+    vol.Optional(CONF_ENABLED, default=True): cv.boolean,
+    vol.Optional(CONF_FAILURE_THRESHOLD, default=5): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    vol.Optional(CONF_WINDOW, default=300): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
+    vol.Optional(CONF_PROBE_INTERVAL, default=60): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
+})
+
+QUEUE_SCHEMA = vol.Schema({
+    vol.Optional(CONF_ENABLED, default=False): cv.boolean,
+    vol.Optional(CONF_QUEUE_WORKERS, default=4): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    vol.Optional(CONF_SIZE, default=100): cv.positive_int,
+})
+
+RETRY_POLICY_SCHEMA = vol.Schema({
+    vol.Optional(CONF_MAX_ATTEMPTS): vol.All(vol.Coerce(int), vol.Range(min=0)),
+    vol.Optional(CONF_BACKOFF): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
+    vol.Optional(CONF_MAX_BACKOFF): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
+})
+
+RETRY_SCHEMA = RETRY_POLICY_SCHEMA.extend({
+    vol.Optional(CONF_ENABLED, default=False): cv.boolean,
+    vol.Optional(CONF_SIZE, default=100): cv.positive_int,
+    vol.Optional(CONF_PRIORITY, default=dict): {vol.In(PRIORITY_VALUES): RETRY_POLICY_SCHEMA},
+})
+
 DELIVERY_CONFIG_SCHEMA = vol.Schema({  # shared by Transport Defaults and Delivery definitions
     # defaults set in model.DeliveryConfig
     vol.Optional(CONF_ACTION): cv.service,  # previously 'service:'
@@ -298,6 +340,7 @@ DELIVERY_CONFIG_SCHEMA = vol.Schema({  # shared by Transport Defaults and Delive
         SelectionRank.FIRST,
         SelectionRank.LAST,
     ]),
+    vol.Optional(CONF_TIMEOUT): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
 })
 
 
@@ -337,6 +380,8 @@ TRANSPORT_SCHEMA = vol.All(
         vol.Optional(CONF_DEVICE_DISCOVERY): cv.boolean,
         vol.Optional(CONF_ENABLED, default=True): cv.boolean,
         vol.Optional(CONF_DELIVERY_DEFAULTS): DELIVERY_CONFIG_SCHEMA,
+        vol.Optional(CONF_CONCURRENCY): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(CONF_CIRCUIT_BREAKER): CIRCUIT_BREAKER_SCHEMA,
     }),
 )
 # Idea - differentiate enabled as recipient vs as occupant, for ALL_IN etc check
@@ -438,6 +483,7 @@ ARCHIVE_SCHEMA = vol.All(
         vol.Optional(CONF_ARCHIVE_EVENT_NAME, default="supernotification"): cv.string,
         vol.Optional(CONF_ARCHIVE_EVENT_SELECTION, default=OutcomeSelection.NONE): parse_event_policy,
         vol.Optional(CONF_ARCHIVE_DIAGNOSTICS, default=OutcomeSelection.ERROR): parse_event_policy,
+        vol.Optional(CONF_ARCHIVE_TRACE_SAMPLE, default=1): vol.All(vol.Coerce(int), vol.Range(min=1)),
         vol.Optional(CONF_DEBUG, default=False): cv.boolean,
     }),
 )
@@ -467,6 +513,9 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend({
     vol.Optional(CONF_TRANSPORTS, default=dict): {cv.string: TRANSPORT_SCHEMA},
     vol.Optional(CONF_CAMERAS, default=list): vol.All(cv.ensure_list, [CAMERA_SCHEMA]),
     vol.Optional(CONF_SNOOZE, default=dict): SNOOZE_SCHEMA,
+    vol.Optional(CONF_QUEUE, default=dict): QUEUE_SCHEMA,
+    vol.Optional(CONF_RETRY, default=dict): RETRY_SCHEMA,
+    vol.Optional(CONF_DEADLINE): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
 })
 SUPERNOTIFY_SCHEMA = PLATFORM_SCHEMA
 
@@ -507,8 +556,10 @@ ACTION_DATA_SCHEMA = vol.Schema(
         vol.Optional(ATTR_FORCE_RESEND, default=False): cv.boolean,
         vol.Optional(ATTR_DATA): vol.Any(None, DATA_SCHEMA),
         vol.Optional(ATTR_TIMESTAMP): cv.string,
+        vol.Optional(ATTR_BLOCKING): cv.boolean,
     },
     extra=vol.ALLOW_EXTRA,  # allow other data, e.g. the android/ios mobile push
 )
 
-STRICT_ACTION_DATA_SCHEMA = ACTION_DATA_SCHEMA.extend({}, extra=vol.REMOVE_EXTRA)
+# everything else in action data is passed through to transports
+ACTION_DATA_KEYS: frozenset[str] = frozenset(str(k) for k in ACTION_DATA_SCHEMA.schema)
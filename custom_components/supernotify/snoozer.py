@@ -11,6 +11,8 @@ from .const import ATTR_ACTION, ATTR_MOBILE_APP_ID, ATTR_PERSON_ID, CONF_SNOOZE_
 from .model import CommandType, GlobalTargetType, QualifiedTargetType, RecipientType, Target, TargetType
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from homeassistant.core import Event
 
     from .delivery import Delivery
@@ -80,6 +82,32 @@ class Snooze:
             "snooze_until": dt_util.as_local(self.snooze_until).strftime("%H:%M:%S") if self.snooze_until else None,
         }
 
+    def dump(self) -> list[Any]:
+        """Compact positional form for persistence, reversed by `undump`"""
+        return [
+            self.target_type,
+            self.target,
+            self.recipient_type,
+            self.recipient,
+            self.reason,
+            self.snoozed_at.timestamp(),
+            self.snooze_until.timestamp() if self.snooze_until else None,
+        ]
+
+    @classmethod
+    def undump(cls, dumped: list[Any]) -> Snooze:
+        target_type, target, recipient_type, recipient, reason, snoozed_at, snooze_until = dumped
+        snooze = cls(
+            GlobalTargetType(target_type) if target_type in GlobalTargetType else QualifiedTargetType(target_type),
+            RecipientType(recipient_type),
+            target,
+            recipient,
+            reason=reason,
+        )
+        snooze.snoozed_at = dt_util.utc_from_timestamp(snoozed_at)
+        snooze.snooze_until = dt_util.utc_from_timestamp(snooze_until) if snooze_until is not None else None
+        return snooze
+
 
 class Snoozer:
     """Manage snoozing"""
@@ -89,6 +117,11 @@ class Snoozer:
         self.people_registry: PeopleRegistry | None = people_registry
         self.config = config or {}
         self.snooze_period = timedelta(seconds=self.config.get(CONF_SNOOZE_TIME, 60 * 60))
+        self.on_change: Callable[[], None] | None = None
+
+    def changed(self) -> None:
+        if self.on_change:
+            self.on_change()
 
     def handle_command_event(self, event: Event, people: list[Recipient] | None = None) -> None:
         people = people or []
@@ -171,14 +204,18 @@ class Snoozer:
         if cmd == CommandType.SNOOZE:
             snooze = Snooze(target_type, recipient_type, target, recipient, snooze_for, reason=reason)
             self.snoozes[snooze.short_key()] = snooze
+            self.changed()
         elif cmd == CommandType.SILENCE:
             snooze = Snooze(target_type, recipient_type, target, recipient, reason=reason)
             self.snoozes[snooze.short_key()] = snooze
+            self.changed()
         elif cmd == CommandType.NORMAL:
             anti_snooze = Snooze(target_type, recipient_type, target, recipient)
             to_del = [k for k, v in self.snoozes.items() if v.short_key() == anti_snooze.short_key()]
             for k in to_del:
                 del self.snoozes[k]
+            if to_del:
+                self.changed()
         else:
             _LOGGER.warning(  # type: ignore
                 "SUPERNOTIFY Invalid mobile cmd %s (target_type: %s, target: %s, recipient_type: %s)",
@@ -192,15 +229,37 @@ class Snoozer:
         to_del = [k for k, v in self.snoozes.items() if not v.active()]
         for k in to_del:
             del self.snoozes[k]
+        if to_del:
+            self.changed()
 
     def clear(self) -> int:
         cleared = len(self.snoozes)
         self.snoozes.clear()
+        if cleared:
+            self.changed()
         return cleared
 
     def export(self) -> list[dict[str, Any]]:
         return [s.export() for s in self.snoozes.values()]
 
+    def dump(self) -> list[list[Any]]:
+        """Compact form of active snoozes, for persistence"""
+        return [s.dump() for s in self.snoozes.values() if s.active()]
+
+    def load(self, dumped: list[list[Any]] | None) -> int:
+        """Restore snoozes from `dump`, skipping any that ended while not running"""
+        loaded: int = 0
+        for snooze_dump in dumped or []:
+            try:
+                snooze = Snooze.undump(snooze_dump)
+            except Exception as e:
+                _LOGGER.warning("SUPERNOTIFY Discarding unreadable saved snooze %s: %s", snooze_dump, e)
+                continue
+            if snooze.active():
+                self.snoozes[snooze.short_key()] = snooze
+                loaded += 1
+        return loaded
+
     def current_snoozes(self, priority: str, delivery: Delivery) -> list[Snooze]:
         inscope_snoozes: list[Snooze] = []
 
@@ -0,0 +1,59 @@
+"""Persist short lived runtime state, dupe check cache and snoozes, across Home Assistant restarts"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any
+
+from . import DOMAIN
+
+if TYPE_CHECKING:
+    from homeassistant.helpers.storage import Store
+
+    from .common import DupeChecker
+    from .hass_api import HomeAssistantAPI
+    from .snoozer import Snoozer
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.state"
+SAVE_DELAY = 10  # seconds, multiple changes within this window are coalesced into a single write
+
+KEY_DUPES = "dupes"
+KEY_SNOOZES = "snoozes"
+
+
+class StateStore:
+    def __init__(self, hass_api: HomeAssistantAPI, dupe_checker: DupeChecker, snoozer: Snoozer) -> None:
+        self.hass_api: HomeAssistantAPI = hass_api
+        self.dupe_checker: DupeChecker = dupe_checker
+        self.snoozer: Snoozer = snoozer
+        self._store: Store[dict[str, Any]] | None = None
+
+    async def initialize(self) -> None:
+        try:
+            self._store = self.hass_api.create_store(STORAGE_KEY, STORAGE_VERSION)
+            saved: dict[str, Any] | None = await self._store.async_load()
+        except Exception as e:
+            _LOGGER.warning("SUPERNOTIFY Unable to load saved state, dupe checks and snoozes will not persist: %s", e)
+            self._store = None
+            return
+        if saved:
+            dupes = self.dupe_checker.load(saved.get(KEY_DUPES))
+            snoozes = self.snoozer.load(saved.get(KEY_SNOOZES))
+            _LOGGER.info("SUPERNOTIFY Restored %s dupe check entries and %s snoozes", dupes, snoozes)
+        self.dupe_checker.on_change = self.schedule_save
+        self.snoozer.on_change = self.schedule_save
+
+    def schedule_save(self) -> None:
+        if self._store is not None:
+            self._store.async_delay_save(self.dump, SAVE_DELAY)
+
+    def dump(self) -> dict[str, Any]:
+        return {KEY_DUPES: self.dupe_checker.dump(), KEY_SNOOZES: self.snoozer.dump()}
+
+    async def save(self) -> None:
+        """Write immediately, rather than waiting for the delayed save"""
+        if self._store is not None:
+            await self._store.async_save(self.dump())
@@ -1,19 +1,23 @@
 from __future__ import annotations
 
+import asyncio
 import datetime as dt
 import logging
+import re
 import time
 import unicodedata
 from abc import abstractmethod
 from traceback import format_exception
 from typing import TYPE_CHECKING, Any
-from urllib.parse import urlparse
 
+from cachetools import LRUCache
 from homeassistant.components.notify.const import ATTR_TARGET
 from homeassistant.const import (
     ATTR_ENTITY_ID,
     ATTR_FRIENDLY_NAME,
     ATTR_NAME,
+    STATE_OFF,
+    STATE_ON,
 )
 from homeassistant.exceptions import IntegrationError
 from homeassistant.util import dt as dt_util
@@ -26,7 +30,9 @@ from custom_components.supernotify.model import (
     TransportFeature,
 )
 
-from .common import CallRecord
+from . import DOMAIN
+from .circuit_breaker import CircuitBreaker
+from .common import CallRecord, sanitize
 from .const import (
     ATTR_ENABLED,
     CONF_DELIVERY_DEFAULTS,
@@ -38,12 +44,39 @@ if TYPE_CHECKING:
 
     from .context import Context
     from .delivery import Delivery, DeliveryRegistry
+    from .envelope import Envelope
     from .hass_api import HomeAssistantAPI
     from .people import PeopleRegistry
 
 _LOGGER = logging.getLogger(__name__)
 
 
+# symbols, emoji and combining marks are dropped from simplified text
+SIMPLIFY_CACHE_SIZE = 2048  # code points remembered, ample for the scripts and emoji in use at any one time
+SIMPLIFY_STRIPPED_CATEGORIES: frozenset[str] = frozenset(("So", "Sk", "Sm", "Mn"))
+# same test as urllib.parse for a word with a scheme, e.g. http:, mailto:
+URL_SCHEME_RE = re.compile(r"[\x00-\x20]*[A-Za-z][A-Za-z0-9+\-.]*:")
+
+
+class SimplifyTable(LRUCache[int, int | None]):
+    """str.translate table for simplify, classifying each code point on first sight and remembering
+    the most recently seen, with fixed replacements that are never evicted"""
+
+    def __init__(self, fixed: dict[int, int | None], maxsize: int) -> None:
+        super().__init__(maxsize=maxsize)
+        self.fixed: dict[int, int | None] = fixed
+
+    def __missing__(self, codepoint: int) -> int | None:
+        if codepoint in self.fixed:
+            return self.fixed[codepoint]
+        mapped: int | None = None if unicodedata.category(chr(codepoint)) in SIMPLIFY_STRIPPED_CATEGORIES else codepoint
+        self[codepoint] = mapped
+        return mapped
+
+
+SIMPLIFY_TABLE = SimplifyTable(str.maketrans("_", " ", "()£$<>"), maxsize=SIMPLIFY_CACHE_SIZE)
+
+
 class Transport:
     """Base class for delivery transports.
 
@@ -70,6 +103,12 @@ class Transport:
         self.last_error_in: str | None = None
         self.last_error_message: str | None = None
         self.error_count: int = 0
+        # shared by all notifications, so a slow integration can't be flooded with concurrent calls
+        self.concurrency: int = self.transport_config.concurrency
+        self._dispatch_slots: asyncio.Semaphore | None = None
+        self.circuit_breaker: CircuitBreaker = CircuitBreaker(
+            self.name, self.transport_config.circuit_breaker, on_change=self.update_entity
+        )
 
     async def initialize(self) -> None:
         """Async post-construction initialization"""
@@ -111,14 +150,32 @@ class Transport:
             attrs["last_error_in"] = self.last_error_in
             attrs["last_error_message"] = self.last_error_message
         attrs["error_count"] = self.error_count
+        attrs["concurrency"] = self.concurrency
+        attrs["circuit_breaker"] = self.circuit_breaker.attributes()
+        attrs["template_cache"] = self.hass_api.template_cache_attributes()
         attrs.update(self.extra_attributes())
         return attrs
 
     def extra_attributes(self) -> dict[str, Any]:
         return {}
 
+    def update_entity(self) -> None:
+        """Refresh the transport's binary sensor, e.g. on circuit breaker state change"""
+        self.hass_api.set_state(
+            f"binary_sensor.{DOMAIN}_transport_{self.name}",
+            STATE_ON if self.enabled else STATE_OFF,
+            sanitize(self.attributes()),
+        )
+
+    async def dispatch(self, envelope: Envelope, debug_trace: DebugTrace | None = None) -> bool:
+        """Deliver an envelope, waiting for a free slot if the transport's concurrency limit is reached"""
+        if self._dispatch_slots is None:
+            self._dispatch_slots = asyncio.Semaphore(self.concurrency)
+        async with self._dispatch_slots:
+            return await self.deliver(envelope, debug_trace=debug_trace)
+
     @abstractmethod
-    async def deliver(self, envelope: Envelope, debug_trace: DebugTrace | None = None) -> bool:  # type: ignore # noqa: F821
+    async def deliver(self, envelope: Envelope, debug_trace: DebugTrace | None = None) -> bool:  # type: ignore
         """Delivery implementation
 
         Args:
@@ -135,7 +192,7 @@ class Transport:
 
     async def call_action(
         self,
-        envelope: Envelope,  # type: ignore # noqa: F821
+        envelope: Envelope,  # type: ignore
         qualified_action: str | None = None,
         action_data: dict[str, Any] | None = None,
         target_data: dict[str, Any] | None = None,
@@ -243,9 +300,7 @@ class Transport:
         if not text:
             return None
         if strip_urls:
-            words = text.split()
-            text = " ".join(word for word in words if not urlparse(word).scheme)
-        text = text.translate(str.maketrans("_", " ", "()£$<>"))
-        text = "".join(c for c in text if unicodedata.category(c) not in ("So", "Sk", "Sm", "Mn"))
+            text = " ".join(word for word in text.split() if ":" not in word or URL_SCHEME_RE.match(word) is None)
+        text = text.translate(SIMPLIFY_TABLE)
         _LOGGER.debug("SUPERNOTIFY Simplified text to: %s", text)
         return text
@@ -60,7 +60,7 @@ from __future__ import annotations
 import asyncio
 import logging
 import re
-from typing import TYPE_CHECKING, Any, cast
+from typing import TYPE_CHECKING, Any
 
 from homeassistant.components.notify.const import ATTR_DATA, ATTR_MESSAGE, ATTR_TARGET, ATTR_TITLE
 from homeassistant.const import ATTR_ENTITY_ID
@@ -104,6 +104,9 @@ _MUSIC_RESUME_DELAY = 2.0
 
 _LOGGER = logging.getLogger(__name__)
 
+# announcements still being waited on to restore volume and music, referenced so not garbage collected
+_restoring: set[asyncio.Task[None]] = set()
+
 
 def _estimate_tts_duration(message: str, char_weight: float = _CHAR_WEIGHT) -> float:
     """Estimate pronunciation duration in seconds, stripping SSML first.
@@ -258,7 +261,7 @@ class AlexaMediaPlayerTransport(Transport):
 
         # envelope.data is a flat dict — keys like volume, type, method
         # are at the top level, not nested under a "data" key.
-        raw_data: dict[str, Any] = dict(envelope.data) if envelope.data else {}
+        raw_data: dict[str, Any] = envelope.data.copy() if envelope.data else {}
 
         volume_raw = raw_data.pop("volume", None)
         restore_volume: bool = boolify(raw_data.pop("restore_volume", True), default=True)
@@ -273,9 +276,7 @@ class AlexaMediaPlayerTransport(Transport):
         requested_volume: float | None = None
         if isinstance(volume_raw, str) and "{{" in volume_raw:
             try:
-                context_vars = (
-                    cast("dict[str, Any]", envelope.condition_variables.as_dict()) if envelope.condition_variables else {}
-                )
+                context_vars = envelope.condition_variables.as_dict() if envelope.condition_variables else {}
                 rendered = self.hass_api.template(volume_raw).async_render(variables=context_vars)
                 requested_volume = float(rendered)
                 _LOGGER.debug("SUPERNOTIFY alexa_media_player: resolved volume template to %.2f", requested_volume)
@@ -331,8 +332,28 @@ class AlexaMediaPlayerTransport(Transport):
                 len(RE_SSML_TAG.sub("", envelope.message)),
                 tts_char_speed,
             )
-            await asyncio.sleep(tts_duration)
             if needs_post_announce:
-                await self._post_announce(states, restore_volume and requested_volume is not None, pause_music)
+                # shielded, so a delivery timeout during the wait doesn't leave the volume changed or music paused
+                restore: asyncio.Task[None] = asyncio.create_task(
+                    self._post_announce_after(
+                        tts_duration, states, restore_volume and requested_volume is not None, pause_music
+                    )
+                )
+                _restoring.add(restore)
+                restore.add_done_callback(_restoring.discard)
+                await asyncio.shield(restore)
+            else:
+                await asyncio.sleep(tts_duration)
 
         return result
+
+    async def _post_announce_after(
+        self,
+        tts_duration: float,
+        states: dict[str, dict[str, Any]],
+        restore_volume: bool,
+        pause_music: bool,
+    ) -> None:
+        """Wait for the announcement to be spoken, then restore volume and resume music"""
+        await asyncio.sleep(tts_duration)
+        await self._post_announce(states, restore_volume, pause_music)
@@ -34,7 +34,6 @@ from custom_components.supernotify.const import (
 )
 from custom_components.supernotify.model import (
     DebugTrace,
-    SelectionRule,
     Target,
     TargetRequired,
     TransportConfig,
@@ -284,7 +283,7 @@ class ChimeTransport(Transport):
     async def deliver(self, envelope: Envelope, debug_trace: DebugTrace | None = None) -> bool:
         data: dict[str, Any] = {}
         data.update(envelope.delivery.data)
-        data.update(envelope.data or {})
+        data.update(envelope.data.copy() if envelope.data else {})
         target: Target = envelope.target
 
         # chime_repeat = data.pop("chime_repeat", 1)
@@ -305,7 +304,7 @@ class ChimeTransport(Transport):
             e: ChimeTargetConfig(tune=chime_tune, volume=chime_volume, duration=chime_duration, entity_id=e)
             for e in self.hass_api.expand_group(target.entity_ids)
         }
-        model_filter = SelectionRule(envelope.delivery.options.get(OPTION_DEVICE_MODEL_SELECT))
+        model_filter = envelope.delivery.selection_rule(OPTION_DEVICE_MODEL_SELECT)
         dev_reg = self.hass_api.device_registry()
         expanded_targets.update({
             d: ChimeTargetConfig(tune=chime_tune, volume=chime_volume, duration=chime_duration, device_id=d)
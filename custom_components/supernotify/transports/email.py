@@ -31,6 +31,8 @@ from custom_components.supernotify.model import DebugTrace, DeliveryConfig, Mess
 from custom_components.supernotify.transport import Transport
 
 if TYPE_CHECKING:
+    from collections.abc import Mapping
+
     from homeassistant.helpers.typing import ConfigType
 
     from custom_components.supernotify.context import Context
@@ -146,7 +148,7 @@ class EmailTransport(Transport):
     async def deliver(self, envelope: Envelope, debug_trace: DebugTrace | None = None) -> bool:
         _LOGGER.debug("SUPERNOTIFY notify_email: %s %s", envelope.delivery_name, envelope.target.email)
 
-        data: dict[str, Any] = envelope.data or {}
+        data: Mapping[str, Any] = envelope.data or {}
         html: str | None = data.get("html")
         template_name: str | None = data.get(CONF_TEMPLATE, envelope.delivery.template)
         strict_template: bool = envelope.delivery.options.get(OPTION_STRICT_TEMPLATE, False)
@@ -172,7 +174,7 @@ class EmailTransport(Transport):
             # default to SMTP platform default recipients if no explicit addresses
 
         if data and data.get("data"):
-            action_data[ATTR_DATA] = data.get("data")
+            action_data[ATTR_DATA] = envelope.data.editable("data")
 
         image_path: Path | None = await envelope.grab_image()
         if image_path:
@@ -33,7 +33,6 @@ from custom_components.supernotify.const import (
     TRANSPORT_GENERIC,
 )
 from custom_components.supernotify.model import (
-    DataFilter,
     DebugTrace,
     MessageOnlyPolicy,
     Target,
@@ -132,7 +131,7 @@ class GenericTransport(Transport):
 
     async def deliver(self, envelope: Envelope, debug_trace: DebugTrace | None = None) -> bool:
         # inputs
-        data: dict[str, Any] = envelope.data or {}
+        data: dict[str, Any] = envelope.data.copy() if envelope.data else {}
         core_action_data: dict[str, Any] = envelope.core_action_data(force_message=False)
         raw_mode: bool = envelope.delivery.options.get(OPTION_RAW, False)
         qualified_action: str | None = envelope.delivery.action
@@ -309,8 +308,7 @@ def ntfy(
                 results.append(MiniEnvelope(action_data=call_data))
     notify_entities = target.domain_entity_ids(NOTIFY_DOMAIN)
 
-    rules = delivery.options.get(OPTION_DATA_KEYS_SELECT)
-    action_data = DataFilter(rules).apply(action_data)
+    action_data = delivery.data_filter.apply(action_data)
 
     if not results or notify_entities:
         if len(results) == 1:
@@ -369,8 +367,7 @@ def notify_events(
         action_data[ATTR_DATA].setdefault("images", [])
         action_data[ATTR_DATA]["images"].append({"url": input_data.get(ATTR_MEDIA, {}).get(ATTR_MEDIA_SNAPSHOT_URL)})
 
-    rules = delivery.options.get(OPTION_DATA_KEYS_SELECT)
-    action_data = DataFilter(rules).apply(action_data)
+    action_data = delivery.data_filter.apply(action_data)
     results.append(MiniEnvelope(action_data=dict(action_data)))
 
     return results
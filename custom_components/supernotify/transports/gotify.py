@@ -126,7 +126,7 @@ class GotifyTransport(Transport):
     async def deliver(self, envelope: Envelope, debug_trace: DebugTrace | None = None) -> bool:
         _LOGGER.debug("SUPERNOTIFY gotify %s", envelope.message)
 
-        raw_data: dict[str, Any] = dict(envelope.data) if envelope.data else {}
+        raw_data: dict[str, Any] = envelope.data.copy() if envelope.data else {}
 
         # --- Extract gotify_* keys (must not reach the notify service) ---
         priority_ovr_raw = raw_data.pop("gotify_priority", None)
@@ -152,7 +152,7 @@ class LaMetricTransport(Transport):
         _LOGGER.debug("SUPERNOTIFY lametric %s", envelope.message)
 
         # 1. Extract raw data (flat dict — rule #6)
-        raw_data: dict[str, Any] = dict(envelope.data) if envelope.data else {}
+        raw_data: dict[str, Any] = envelope.data.copy() if envelope.data else {}
 
         # 2. Pop device_id (required — configured in delivery data)
         device_id: str | None = raw_data.pop("device_id", None)
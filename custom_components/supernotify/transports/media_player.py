@@ -19,6 +19,8 @@ from custom_components.supernotify.model import DebugTrace, TransportConfig, Tra
 from custom_components.supernotify.transport import Transport
 
 if TYPE_CHECKING:
+    from collections.abc import Mapping
+
     from custom_components.supernotify.envelope import Envelope
 
 RE_VALID_MEDIA_PLAYER = r"media_player\.[A-Za-z0-9_]+"
@@ -49,7 +51,7 @@ class MediaPlayerTransport(Transport):
     async def deliver(self, envelope: Envelope, debug_trace: DebugTrace | None = None) -> bool:
         _LOGGER.debug("SUPERNOTIFY notify_media: %s", envelope.data)
 
-        data: dict[str, Any] = envelope.data or {}
+        data: Mapping[str, Any] = envelope.data or {}
         media_players: list[str] = envelope.target.entity_ids or []
         media_type: str = data.get("media_content_type", "image")
         if not media_players:
@@ -77,7 +77,6 @@ from custom_components.supernotify.model import (
     MessageOnlyPolicy,
     QualifiedTargetType,
     RecipientType,
-    SelectionRule,
     Target,
     TargetRequired,
     TransportConfig,
@@ -254,7 +253,7 @@ class MobilePushTransport(Transport):
             return False
 
         # 1. Extract SuperNotify push_* keys; raw_data becomes passthrough-only
-        raw_data: dict[str, Any] = dict(envelope.data) if envelope.data else {}
+        raw_data: dict[str, Any] = envelope.data.copy() if envelope.data else {}
         push_data = self._extract_push_data(raw_data)
 
         action_groups = envelope.action_groups
@@ -350,7 +349,7 @@ class MobilePushTransport(Transport):
         action_data = envelope.core_action_data()
         action_data[ATTR_DATA] = data
         clear_notification = bool(push_data["clear_notification"] and notification_tag)
-        model_filter = SelectionRule(envelope.delivery.options.get(OPTION_DEVICE_MODEL_SELECT))
+        model_filter = envelope.delivery.selection_rule(OPTION_DEVICE_MODEL_SELECT)
         hits = 0
 
         for mobile_target in envelope.target.mobile_app_ids:
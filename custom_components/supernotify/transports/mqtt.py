@@ -52,7 +52,7 @@ class MQTTTransport(Transport):
             _LOGGER.warning("SUPERNOTIFY notify_mqtt: No topic for publication")
             return False
 
-        action_data: dict[str, Any] = dict(envelope.data)
+        action_data: dict[str, Any] = envelope.data.copy()
         if isinstance(action_data.get("payload"), dict):
             action_data["payload"] = json.dumps(action_data["payload"])
         return await self.call_action(envelope, action_data=action_data)
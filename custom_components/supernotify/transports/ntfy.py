@@ -125,7 +125,7 @@ class NtfyTransport(Transport):
     async def deliver(self, envelope: Envelope, debug_trace: DebugTrace | None = None) -> bool:
         _LOGGER.debug("SUPERNOTIFY ntfy %s", envelope.message)
 
-        raw_data: dict[str, Any] = dict(envelope.data) if envelope.data else {}
+        raw_data: dict[str, Any] = envelope.data.copy() if envelope.data else {}
 
         device_id = raw_data.pop("ntfy_device_id", None)
         priority_ovr = raw_data.pop("ntfy_priority", None)
@@ -11,6 +11,8 @@ from custom_components.supernotify.model import DebugTrace, TargetRequired, Tran
 from custom_components.supernotify.transport import Transport
 
 if TYPE_CHECKING:
+    from collections.abc import Mapping
+
     from custom_components.supernotify.envelope import Envelope
 
 _LOGGER = logging.getLogger(__name__)
@@ -34,7 +36,7 @@ class PersistentTransport(Transport):
         return config
 
     async def deliver(self, envelope: Envelope, debug_trace: DebugTrace | None = None) -> bool:
-        data = envelope.data or {}
+        data: Mapping[str, Any] = envelope.data or {}
 
         notification_id = data.get(ATTR_NOTIFICATION_ID) or envelope.delivery.data.get(ATTR_NOTIFICATION_ID)
         action_data = envelope.core_action_data()
@@ -119,7 +119,7 @@ class PushoverTransport(Transport):
     async def deliver(self, envelope: Envelope, debug_trace: DebugTrace | None = None) -> bool:
         _LOGGER.debug("SUPERNOTIFY pushover %s", envelope.message)
 
-        raw_data: dict[str, Any] = dict(envelope.data) if envelope.data else {}
+        raw_data: dict[str, Any] = envelope.data.copy() if envelope.data else {}
 
         # --- Pop pushover_* keys (must not be forwarded to the service) ---
         priority_ovr_raw = raw_data.pop("pushover_priority", None)
@@ -19,6 +19,8 @@ from custom_components.supernotify.transport import (
 )
 
 if TYPE_CHECKING:
+    from collections.abc import Mapping
+
     from custom_components.supernotify.envelope import Envelope
 
 RE_VALID_PHONE = r"^(\+\d{1,3})?\s?\(?\d{1,4}\)?[\s.-]?\d{3}[\s.-]?\d{4}$"
@@ -55,7 +57,7 @@ class SMSTransport(Transport):
     async def deliver(self, envelope: Envelope, debug_trace: DebugTrace | None = None) -> bool:
         _LOGGER.debug("SUPERNOTIFY notify_sms: %s", envelope.delivery_name)
 
-        data: dict[str, Any] = envelope.data or {}
+        data: Mapping[str, Any] = envelope.data or {}
         mobile_numbers = envelope.target.phone or []
 
         if not envelope.message:
@@ -72,6 +74,6 @@ class SMSTransport(Transport):
 
         action_data = {"message": message[: self.MAX_MESSAGE_LENGTH], ATTR_TARGET: mobile_numbers}
         if data and data.get("data"):
-            action_data[ATTR_DATA] = data.get("data", {})
+            action_data[ATTR_DATA] = envelope.data.editable("data", {})
 
         return await self.call_action(envelope, action_data=action_data)
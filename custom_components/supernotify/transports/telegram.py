@@ -180,7 +180,7 @@ class TelegramTransport(Transport):
     async def deliver(self, envelope: Envelope, debug_trace: DebugTrace | None = None) -> bool:
         _LOGGER.debug("SUPERNOTIFY telegram %s", envelope.message)
 
-        raw_data: dict[str, Any] = dict(envelope.data) if envelope.data else {}
+        raw_data: dict[str, Any] = envelope.data.copy() if envelope.data else {}
 
         # Pop Telegram-specific data keys
         parse_mode = raw_data.pop("telegram_parse_mode", None)
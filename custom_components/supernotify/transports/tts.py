@@ -25,7 +25,6 @@ from custom_components.supernotify.const import (
 from custom_components.supernotify.model import (
     DebugTrace,
     MessageOnlyPolicy,
-    SelectionRule,
     Target,
     TargetRequired,
     TransportConfig,
@@ -106,7 +105,7 @@ class TTSTransport(Transport):
         if ATTR_CACHE in envelope.data:
             action_data[ATTR_CACHE] = envelope.data[ATTR_CACHE]
         if ATTR_OPTIONS in envelope.data:
-            action_data[ATTR_OPTIONS] = envelope.data[ATTR_OPTIONS]
+            action_data[ATTR_OPTIONS] = envelope.data.editable(ATTR_OPTIONS)
         target_data: dict[str, Any] = {ATTR_ENTITY_ID: envelope.delivery.options.get(OPTION_TTS_ENTITY_ID)}
 
         if targets and len(targets) == 1:
@@ -122,7 +121,7 @@ class TTSTransport(Transport):
         if "media_stream" in envelope.data:
             action_data["media_stream"] = envelope.data["media_stream"]
 
-        manufacturer_filter = SelectionRule(envelope.delivery.options.get(OPTION_DEVICE_MANUFACTURER_SELECT))
+        manufacturer_filter = envelope.delivery.selection_rule(OPTION_DEVICE_MANUFACTURER_SELECT)
         at_least_one: bool = False
         for target in targets:
             mobile_info: DeviceInfo | None = self.context.hass_api.mobile_app_by_id(target)
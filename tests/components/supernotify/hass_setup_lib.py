@@ -352,7 +352,7 @@ class TestingContext(Context):
         }
         if self.initialized:
             delivery = Delivery(delivery_name, {CONF_TRANSPORT: transport, **kwargs}, self.transport(transport))
-            self.delivery_registry.deliveries[delivery_name] = delivery
+            self.delivery_registry.add_delivery(delivery)
 
 
 def register_mobile_app(
@@ -20,6 +20,7 @@ from custom_components.supernotify.const import (
     CONF_ARCHIVE_MQTT_RETAIN,
     CONF_ARCHIVE_MQTT_TOPIC,
     CONF_ARCHIVE_PATH,
+    CONF_ARCHIVE_TRACE_SAMPLE,
 )
 from custom_components.supernotify.notify import SupernotifyAction
 from custom_components.supernotify.schema import SCENARIO_SCHEMA, EnvelopeOutcome, OutcomeSelection
@@ -166,6 +167,17 @@ def test_event_archiver_specific_diagnostic_flags(mock_hass_api: HomeAssistantAP
     assert archiver.diagnostics == flags
 
 
+def test_trace_required(mock_hass_api: HomeAssistantAPI) -> None:
+    assert not NotificationArchive({}, mock_hass_api).trace_required()
+    assert NotificationArchive({}, mock_hass_api).trace_required(debug=True)
+    no_diagnostics = NotificationArchive({CONF_ENABLED: True, CONF_ARCHIVE_DIAGNOSTICS: OutcomeSelection.NONE}, mock_hass_api)
+    assert not no_diagnostics.trace_required()
+
+    uut = NotificationArchive({CONF_ENABLED: True, CONF_ARCHIVE_TRACE_SAMPLE: 3}, mock_hass_api)
+    assert [uut.trace_required() for _ in range(6)] == [True, False, False, True, False, False]
+    assert uut.trace_required(debug=True)
+
+
 async def test_archive_directory_init_path_not_creatable() -> None:
     from custom_components.supernotify.archive import ArchiveDirectory
 
@@ -0,0 +1,98 @@
+from unittest.mock import Mock, patch
+
+from custom_components.supernotify.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now: float = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_opens_after_consecutive_failures() -> None:
+    clock = Clock()
+    on_change = Mock()
+    uut = CircuitBreaker("chime", {"failure_threshold": 3, "window": 60, "probe_interval": 30}, on_change=on_change)
+    with patch("custom_components.supernotify.circuit_breaker.time.monotonic", clock):
+        uut.record_failure()
+        uut.record_failure()
+        uut.record_success()
+        uut.record_failure()
+        uut.record_failure()
+        assert uut.state == CircuitState.CLOSED
+        assert uut.allow()
+        uut.record_failure()
+        assert uut.state == CircuitState.OPEN
+        assert uut.opened_at is not None
+        on_change.assert_called_once()
+
+        assert not uut.allow()
+        assert not uut.allow()
+        assert uut.attributes()["rejected"] == 2
+
+
+def test_failures_outside_window_forgotten() -> None:
+    clock = Clock()
+    uut = CircuitBreaker("chime", {"failure_threshold": 2, "window": 60})
+    with patch("custom_components.supernotify.circuit_breaker.time.monotonic", clock):
+        uut.record_failure()
+        clock.now += 61
+        uut.record_failure()
+        assert uut.state == CircuitState.CLOSED
+        clock.now += 1
+        uut.record_failure()
+        assert uut.state == CircuitState.OPEN
+
+
+def test_half_open_probes_until_recovered() -> None:
+    clock = Clock()
+    uut = CircuitBreaker("chime", {"failure_threshold": 1, "probe_interval": 30})
+    with patch("custom_components.supernotify.circuit_breaker.time.monotonic", clock):
+        uut.record_failure()
+        assert uut.state == CircuitState.OPEN
+
+        clock.now += 30
+        assert uut.allow()
+        assert uut.state == CircuitState.HALF_OPEN
+        # only one probe per interval
+        assert not uut.allow()
+        uut.record_failure()
+        assert uut.state == CircuitState.OPEN
+
+        clock.now += 29
+        assert not uut.allow()
+        clock.now += 1
+        assert uut.allow()
+        uut.record_success()
+        assert uut.state == CircuitState.CLOSED
+        assert uut.opened_at is None
+        assert uut.allow()
+        assert uut.allow()
+        assert uut.open_count == 1
+
+
+def test_disabled_never_opens() -> None:
+    uut = CircuitBreaker("chime", {"enabled": False, "failure_threshold": 1})
+    for _ in range(10):
+        uut.record_failure()
+    assert uut.state == CircuitState.CLOSED
+    assert uut.allow()
+
+
+def test_allowance_lets_single_probe_through() -> None:
+    clock = Clock()
+    uut = CircuitBreaker("chime", {"failure_threshold": 1, "probe_interval": 30})
+    with patch("custom_components.supernotify.circuit_breaker.time.monotonic", clock):
+        assert uut.allowance(3) == 3
+        uut.record_failure()
+        assert uut.allowance(3) == 0
+        assert uut.allowance(0) == 0
+        clock.now += 30
+        assert uut.allowance(0) == 0
+        assert uut.state == CircuitState.OPEN
+        assert uut.allowance(3) == 1
+        assert uut.state == CircuitState.HALF_OPEN
+        assert uut.allowance(2) == 0
+        assert uut.rejected == 7
@@ -1,17 +1,24 @@
 import datetime as dt
+from collections.abc import Iterator
+from typing import Any
 from unittest.mock import Mock
 
+from cachetools import TTLCache
+
 from custom_components.supernotify.common import (
     CallRecord,
+    DupeCheckable,
     DupeChecker,
     boolify,
     ensure_dict,
     ensure_list,
+    fingerprint,
     safe_extend,
     safe_get,
 )
-from custom_components.supernotify.const import ATTR_DUPE_POLICY_MT, ATTR_DUPE_POLICY_NONE, CONF_DUPE_POLICY
+from custom_components.supernotify.const import ATTR_DUPE_POLICY_MT, ATTR_DUPE_POLICY_NONE, CONF_DUPE_POLICY, CONF_SIZE
 from custom_components.supernotify.envelope import Envelope
+from custom_components.supernotify.model import Target
 from custom_components.supernotify.notification import Notification
 
 
@@ -114,6 +121,72 @@ def test_dupe_policy_none_never_suppresses() -> None:
     assert uut.check(e2) is False
 
 
+def test_fingerprint_is_stable() -> None:
+    # fixed value, so fingerprints can be persisted and compared across restarts
+    assert fingerprint("message", "email", None) == "7b611f5f20b7b993250e5a8d364dceac"
+    assert fingerprint("ab", "c") != fingerprint("a", "bc")
+    assert fingerprint(None) != fingerprint("")
+
+
+def test_dupe_check_ignores_target_order() -> None:
+    delivery = Mock(name="tester")
+    uut = DupeChecker({})
+    e1 = Envelope(delivery, Notification(Mock(), "message here"), target=Target(["a@test.com", "b@test.com"]))
+    assert uut.check(e1) is False
+    e2 = Envelope(delivery, Notification(Mock(), "message here"), target=Target(["b@test.com", "a@test.com"]))
+    assert uut.check(e2) is True
+    e3 = Envelope(delivery, Notification(Mock(), "message here"), target=Target(["c@test.com", "a@test.com"]))
+    assert uut.check(e3) is False
+
+
+def test_dupe_check_remembers_max_priority() -> None:
+    delivery = Mock(name="tester")
+    uut = DupeChecker({})
+    assert uut.check(Envelope(delivery, Notification(Mock(), "msg"), data={"priority": "high"})) is False
+    assert uut.check(Envelope(delivery, Notification(Mock(), "msg"), data={"priority": "low"})) is True
+    assert uut.check(Envelope(delivery, Notification(Mock(), "msg"), data={"priority": "medium"})) is True
+    assert len(uut.cache) == 1
+
+
+class FixedCandidate(DupeCheckable):
+    def __init__(self, n: int) -> None:
+        self.id = str(n)
+        self.priority = "medium"
+        self._fingerprint = fingerprint(f"message {n}")
+
+    def fingerprint(self) -> str:
+        return self._fingerprint
+
+
+class UnscannableCache(TTLCache):
+    """Dupe check cache that fails on any scan, and records keyed lookups"""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.lookups: list[str] = []
+
+    def __iter__(self) -> Iterator[str]:
+        raise AssertionError("dupe check scanned the cache")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self.lookups.append(key)
+        return super().get(key, default)
+
+
+def test_dupe_check_is_keyed_lookup_whatever_cache_size() -> None:
+    for cache_size in (500, 20000):
+        uut = DupeChecker({CONF_SIZE: cache_size})
+        uut.cache = UnscannableCache(maxsize=cache_size, ttl=uut.ttl)
+        for n in range(cache_size):
+            assert uut.check(FixedCandidate(n)) is False
+        uut.cache.lookups.clear()
+
+        probes = [FixedCandidate(n) for n in range(cache_size - 500, cache_size + 500)]
+        assert [uut.check(probe) for probe in probes] == [True] * 500 + [False] * 500
+        # one lookup per check, on the candidate's own fingerprint
+        assert uut.cache.lookups == [probe.fingerprint() for probe in probes]
+
+
 class TestBoolify:
     def test_true_bool(self):
         assert boolify(True, default=False) is True
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from homeassistant.helpers import config_validation as cv
+
+from custom_components.supernotify.condition_cache import ConditionDependencies, MemoizedConditions, analyse_conditions
+from custom_components.supernotify.const import PRIORITY_CRITICAL, PRIORITY_LOW
+from custom_components.supernotify.hass_api import HomeAssistantAPI
+from custom_components.supernotify.model import ConditionVariables
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+
+def test_analyse_entities_and_variables() -> None:
+    deps = analyse_conditions(
+        cv.CONDITIONS_SCHEMA({
+            "condition": "and",
+            "conditions": [
+                {"condition": "state", "entity_id": "alarm_control_panel.home", "state": "armed_night"},
+                {"condition": "numeric_state", "entity_id": "sensor.temp", "above": "input_number.threshold"},
+                "{{ notification_priority == 'critical' and 'LONE_HOME' in occupancy }}",
+                {"condition": "template", "value_template": "{{ is_state('light.porch', 'on') or states.sun.sun.state }}"},
+            ],
+        })
+    )
+    assert deps == ConditionDependencies(
+        entity_ids=("alarm_control_panel.home", "input_number.threshold", "light.porch", "sensor.temp", "sun.sun"),
+        variables=("notification_priority", "occupancy"),
+    )
+
+
+def test_analyse_falls_back_to_always_evaluate() -> None:
+    assert not analyse_conditions({"condition": "time", "after": "22:00:00"}).cacheable
+    assert not analyse_conditions({"condition": "state", "entity_id": "light.porch", "state": "on", "for": 60}).cacheable
+    assert not analyse_conditions("{{ now().hour > 22 }}").cacheable
+    assert not analyse_conditions("{{ states(notification_data.entity) == 'on' }}").cacheable
+    assert not analyse_conditions("{{ states.light | selectattr('state', 'eq', 'on') | list | count > 0 }}").cacheable
+    assert not analyse_conditions("{{ expand('group.family') | count > 1 }}").cacheable
+    assert not analyse_conditions("{{ unclosed ").cacheable
+    assert analyse_conditions({"condition": "time", "after": "22:00:00", "enabled": False}).cacheable
+
+
+async def test_memoized_until_dependency_changes(hass: HomeAssistant) -> None:
+    hass_api = HomeAssistantAPI(hass)
+    uut = await hass_api.build_conditions(
+        cv.CONDITIONS_SCHEMA({
+            "condition": "and",
+            "conditions": [
+                {"condition": "state", "entity_id": "alarm_control_panel.home", "state": "armed_night"},
+                "{{ notification_priority == 'critical' }}",
+            ],
+        }),
+        strict=True,
+        validate=True,
+    )
+    assert isinstance(uut, MemoizedConditions)
+    critical = ConditionVariables([], [], [], PRIORITY_CRITICAL, {}, "message one")
+
+    hass.states.async_set("alarm_control_panel.home", "armed_night")
+    assert hass_api.evaluate_conditions(uut, critical)
+    assert hass_api.evaluate_conditions(uut, ConditionVariables([], [], [], PRIORITY_CRITICAL, {}, "message two"))
+    assert (uut.hits, uut.misses) == (1, 1)
+
+    assert not hass_api.evaluate_conditions(uut, ConditionVariables([], [], [], PRIORITY_LOW, {}))
+    assert uut.misses == 2
+
+    # no wait for state change listeners, picked up in the same loop iteration
+    hass.states.async_set("alarm_control_panel.home", "disarmed")
+    assert not hass_api.evaluate_conditions(uut, critical)
+    assert uut.misses == 3
+    hass.states.async_set("alarm_control_panel.home", "disarmed", {"changed_by": "keypad"})
+    assert not hass_api.evaluate_conditions(uut, critical)
+    assert uut.misses == 4
+    assert uut.attributes()["hits"] == 1
+
+
+async def test_uncacheable_always_evaluated(hass: HomeAssistant) -> None:
+    hass_api = HomeAssistantAPI(hass)
+    uut = await hass_api.build_conditions(cv.CONDITIONS_SCHEMA("{{ now().year > 2000 }}"), strict=True, validate=True)
+    assert isinstance(uut, MemoizedConditions)
+    cvars = ConditionVariables()
+    assert hass_api.evaluate_conditions(uut, cvars)
+    assert hass_api.evaluate_conditions(uut, cvars)
+    assert (uut.hits, uut.misses) == (0, 2)
@@ -45,7 +45,7 @@ async def test_and_conditions(hass: HomeAssistant) -> None:
     hass.states.async_set("alarm_control_panel.home_alarm_control", "armed_home")
     assert hass_api.evaluate_conditions(func, cvars)
 
-    cvars.notification_priority = PRIORITY_LOW
+    cvars = ConditionVariables(["scenario-no-danger", "sunny"], [], [], PRIORITY_LOW, {})
     assert not hass_api.evaluate_conditions(func, cvars)
 
 
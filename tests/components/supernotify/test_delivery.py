@@ -9,7 +9,11 @@ from custom_components.supernotify.const import (
     CONF_DELIVERY_DEFAULTS,
     CONF_DEVICE_DISCOVERY,
     CONF_DEVICE_DOMAIN,
+    CONF_OPTIONS,
     OCCUPANCY_ALL,
+    OPTION_DATA_KEYS_SELECT,
+    OPTION_DEVICE_MODEL_SELECT,
+    OPTION_TARGET_INCLUDE_RE,
     PRIORITY_VALUES,
     SELECTION_DEFAULT,
 )
@@ -32,6 +36,27 @@ async def test_target_selection() -> None:
     assert uut.select_targets(Target(["notify.pong", "weird_generic_a", "notify"])) == Target(["notify.pong"])
 
 
+async def test_matchers_compiled_once() -> None:
+    ctx = TestingContext(transport_types=[GenericTransport])
+    await ctx.test_initialize()
+    uut = Delivery(
+        "unit_testing",
+        {
+            CONF_ACTION: "notify.pong",
+            CONF_OPTIONS: {
+                OPTION_TARGET_INCLUDE_RE: [r"notify\..*"],  # deprecated, upgraded to target_select
+                OPTION_DATA_KEYS_SELECT: {"exclude": ["secret.*"]},
+                OPTION_DEVICE_MODEL_SELECT: ["Pixel.*"],
+            },
+        },
+        GenericTransport(ctx, {}),
+    )
+    assert uut.select_targets(Target(["notify.pong", "switch.ping"])) == Target(["notify.pong"])
+    assert uut.data_filter.apply({"secret_key": 1, "sound": "bell"}) == {"sound": "bell"}
+    assert uut.selection_rule(OPTION_DEVICE_MODEL_SELECT) is uut.selection_rule(OPTION_DEVICE_MODEL_SELECT)
+    assert uut.selection_rule(OPTION_DEVICE_MODEL_SELECT).match("Pixel 10")
+
+
 async def test_simple_create(mock_context: Context) -> None:
     uut = Delivery("unit_testing", {}, NotifyEntityTransport(mock_context, {}))
     assert await uut.initialize(mock_context)
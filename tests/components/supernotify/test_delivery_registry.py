@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any
 
+import pytest
 from homeassistant.const import CONF_ACTION, CONF_ENABLED, CONF_TARGET
 
 from custom_components.supernotify.const import (
     CONF_DELIVERY_DEFAULTS,
     CONF_SELECTION,
+    CONF_SELECTION_RANK,
     CONF_TRANSPORT,
     SELECTION_BY_SCENARIO,
     TRANSPORT_ALEXA,
@@ -18,6 +20,7 @@ from custom_components.supernotify.const import (
     TRANSPORT_PERSISTENT,
     TRANSPORT_SMS,
 )
+from custom_components.supernotify.schema import SelectionRank
 from custom_components.supernotify.transports.generic import GenericTransport
 from custom_components.supernotify.transports.notify_entity import NotifyEntityTransport
 
@@ -113,3 +116,51 @@ async def test_transport_defaults_used_for_missing_service(hass: HomeAssistant,
     await uut.initialize()
     assert list(uut.delivery_registry.deliveries.keys()) == ["chatty"]
     assert uut.delivery_registry.deliveries["chatty"].action == "notify.slackity"
+
+
+async def test_delivery_bitmask_index() -> None:
+    ctx = TestingContext(
+        deliveries={
+            "last": {CONF_TRANSPORT: TRANSPORT_GENERIC, CONF_ACTION: "notify.a", CONF_SELECTION_RANK: SelectionRank.LAST},
+            "first": {CONF_TRANSPORT: TRANSPORT_GENERIC, CONF_ACTION: "notify.b", CONF_SELECTION_RANK: SelectionRank.FIRST},
+            "off": {CONF_TRANSPORT: TRANSPORT_GENERIC, CONF_ACTION: "notify.c", CONF_ENABLED: False},
+        },
+        transport_types=[GenericTransport],
+    )
+    await ctx.test_initialize()
+    uut = ctx.delivery_registry
+
+    assert uut.names(0b111) == ["last", "first", "off"]
+    assert uut.names(uut.mask(["off", "unknown", "last"])) == ["last", "off"]
+    assert uut.names(uut.rank_mask(SelectionRank.FIRST)) == ["first"]
+    assert uut.names(uut.enabled_mask) == ["last", "first"]
+    assert uut.names(uut.implicit_mask) == ["last", "first"]
+
+    uut.enable("off")
+    uut.disable("first")
+    assert uut.names(uut.enabled_mask) == ["last", "off"]
+    # positions stay stable across re-initialization
+    uut.initialize_deliveries()
+    assert uut.mask(["first"]) == 0b010
+
+
+async def test_delivery_snapshots_versioned() -> None:
+    ctx = TestingContext(deliveries=DELIVERY, transport_types=[GenericTransport])
+    await ctx.test_initialize()
+    uut = ctx.delivery_registry
+    version = uut.version
+
+    assert uut.deliveries is uut.deliveries
+    assert uut.implicit_deliveries is uut.implicit_deliveries
+    with pytest.raises(TypeError):
+        uut.deliveries["hacked"] = uut.deliveries["chat"]  # type: ignore[index]
+
+    assert not uut.disable("persistent")  # not a configured delivery, no change
+    assert uut.version == version
+    enabled = uut.enabled_deliveries
+    assert uut.disable("chat")
+    assert uut.version == version + 1
+    assert "chat" in enabled  # earlier snapshot unaffected
+    assert "chat" not in uut.enabled_deliveries
+    assert "chat" in uut.disabled_deliveries
+    assert uut.implicit_deliveries == ()
@@ -1,8 +1,10 @@
 import time
 
-from custom_components.supernotify.const import CONF_TRANSPORT
-from custom_components.supernotify.envelope import Envelope
-from custom_components.supernotify.model import MessageOnlyPolicy
+import pytest
+
+from custom_components.supernotify.const import CONF_DATA, CONF_OPTIONS, CONF_TRANSPORT, OPTION_SIMPLIFY_TEXT
+from custom_components.supernotify.envelope import Envelope, EnvelopeData
+from custom_components.supernotify.model import MessageOnlyPolicy, Target
 from custom_components.supernotify.notification import Notification
 
 from .hass_setup_lib import TestingContext
@@ -115,3 +117,87 @@ async def test_grab_image_without_notification() -> None:
     uut = Envelope(context.delivery("DEFAULT_notify_entity"))
     result = await uut.grab_image()
     assert result is None
+
+
+async def test_text_rendered_once_per_notification() -> None:
+    ctx = TestingContext(
+        deliveries={
+            "push": {CONF_TRANSPORT: "notify_entity"},
+            "push_too": {CONF_TRANSPORT: "notify_entity"},
+            "plain": {CONF_TRANSPORT: "notify_entity", CONF_OPTIONS: {OPTION_SIMPLIFY_TEXT: True}},
+        }
+    )
+    await ctx.test_initialize()
+    notification = Notification(ctx, "Look at <b>this</b>", title="Alert", action_data={"debug": True})
+
+    pushed = [Envelope(ctx.delivery(d), notification) for d in ("push", "push_too", "push")]
+    simplified = Envelope(ctx.delivery("plain"), notification)
+    assert {e.message for e in pushed} == {"Look at <b>this</b>"}
+    assert simplified.message == "Look at bthis/b"
+    assert notification.debug_trace.text_renders == {
+        "message": {"rendered": 2, "reused": 2},
+        "title": {"rendered": 2, "reused": 2},
+    }
+
+
+def test_envelope_data_copy_on_write() -> None:
+    base = {"priority": "high", "push": {"sound": "bell"}, "tags": ["a"], "drop": 1}
+    uut = EnvelopeData(base)
+    assert uut["priority"] == "high"
+    assert uut._top == {}  # scalar reads never copy
+
+    uut.editable("push")["sound"] = "siren"
+    uut.editable("tags").append("b")
+    uut["priority"] = "low"
+    del uut["drop"]
+    uut["extra"] = True
+    assert base == {"priority": "high", "push": {"sound": "bell"}, "tags": ["a"], "drop": 1}
+    assert uut == {"priority": "low", "push": {"sound": "siren"}, "tags": ["a", "b"], "extra": True}
+    assert list(uut) == ["priority", "push", "tags", "extra"]
+    assert "drop" not in uut
+    assert uut.get("drop") is None
+    with pytest.raises(KeyError):
+        del uut["drop"]
+    uut["drop"] = 2
+    assert uut["drop"] == 2
+    assert uut.editable("missing") is None
+
+
+def test_envelope_data_reads_nested_values_without_copying() -> None:
+    push: dict[str, str] = {"sound": "bell"}
+    base = {"push": push, "tags": ["a"], "groups": {"x"}}
+    uut = EnvelopeData(base)
+
+    view = uut["push"]
+    assert view == {"sound": "bell"}
+    push["sound"] = "chime"
+    assert view["sound"] == "chime"  # a view onto the shared value, not a copy
+    assert uut._top == {}
+    with pytest.raises(TypeError):
+        view["sound"] = "siren"  # type: ignore[index]
+    assert uut["tags"] == ("a",)
+    assert uut["groups"] == frozenset({"x"})
+    assert uut == base
+
+    plain = uut.copy()
+    plain["push"]["sound"] = "siren"
+    plain["tags"].append("b")
+    assert base == {"push": {"sound": "chime"}, "tags": ["a"], "groups": {"x"}}
+
+
+async def test_envelopes_share_data_without_leaking_changes() -> None:
+    ctx = TestingContext(
+        deliveries={"push": {CONF_TRANSPORT: "notify_entity", CONF_DATA: {"push": {"sound": "bell"}}}},
+    )
+    await ctx.test_initialize()
+    notification = Notification(ctx, "testing", action_data={"delivery": {"push": {"data": {"message": "override", "ttl": 0}}}})
+    await notification.initialize()
+    delivery = ctx.delivery("push")
+    first, second = notification.generate_envelopes(delivery, [Target(["notify.a"]), Target(["notify.b"])])
+
+    first.data.editable("push")["sound"] = "siren"
+    assert second.data["push"] == {"sound": "bell"}
+    assert delivery.data == {"push": {"sound": "bell"}}
+    # per delivery override of message applies to every envelope, and isn't passed as data
+    assert first.message == second.message == "override"
+    assert dict(second.data) == {"push": {"sound": "bell"}, "ttl": 0}
@@ -105,6 +105,17 @@ async def test_evaluates_respects_conditionvars(hass: HomeAssistant, validate: b
     assert hass_api.evaluate_conditions(checker, ConditionVariables())
 
 
+def test_template_compiled_once(hass: HomeAssistant) -> None:
+    uut = HomeAssistantAPI(hass)
+    first = uut.template("{{ notification_message | upper }}")
+    assert first.async_render(variables={"notification_message": "one"}) == "ONE"
+    second = uut.template("{{ notification_message | upper }}")
+    assert second is first
+    assert second.async_render(variables={"notification_message": "two"}) == "TWO"
+    assert uut.template("{{ notification_title }}") is not first
+    assert uut.template_cache_attributes() == {"size": 2, "maxsize": 256, "hits": 1, "misses": 2, "hit_rate": 0.333}
+
+
 def test_roundtrips_entity_state(hass: HomeAssistant) -> None:
     hass_api = HomeAssistantAPI(hass)
 
@@ -1,6 +1,24 @@
+import re
+from collections.abc import Callable
+from unittest.mock import patch
+
+import pytest
+import voluptuous as vol
+from homeassistant.core import valid_entity_id
 from homeassistant.exceptions import HomeAssistantError
 
-from custom_components.supernotify.model import DataFilter, DebugTrace, SelectionRule, Target, TargetRequired
+from custom_components.supernotify.const import RE_DEVICE_ID
+from custom_components.supernotify.model import (
+    ConditionVariables,
+    DataFilter,
+    DebugTrace,
+    NullDebugTrace,
+    SelectionRule,
+    Target,
+    TargetRequired,
+    compile_fullmatch,
+)
+from custom_components.supernotify.schema import phone
 
 from .hass_setup_lib import assert_json_round_trip
 
@@ -122,6 +140,94 @@ def test_target_sorts_out_big_flat_list() -> None:
     assert uut.custom_ids("_UNKNOWN_") == ["@joey", "00001111122223333444455556666"]
 
 
+def test_target_classification_remembered() -> None:
+    targets = ["classified@mctest.org", "switch.classified", "person.classified", "+4350404180001", "@classified"]
+    with patch.object(Target, "is_email", wraps=Target.is_email) as is_email:
+        first = Target(targets)
+        assert is_email.call_count == 4
+        assert Target(list(reversed(targets))) == first
+        assert Target({"email": "classified@mctest.org"}).email == ["classified@mctest.org"]
+        assert is_email.call_count == 4
+    assert Target.classify("classified@mctest.org") == "email"
+    assert Target.classify("@classified") is None
+
+
+def test_target_classification_unchanged_by_caching() -> None:
+    def reference(targets: list[str]) -> dict[str, list[str]]:
+        # classification before caching, straight from the schema validators
+        def is_phone(t: str) -> bool:
+            try:
+                return phone(t) is not None
+            except vol.Invalid:
+                return False
+
+        def is_email(t: str) -> bool:
+            try:
+                return vol.Email()(t) is not None  # type: ignore[call-arg]
+            except vol.Invalid:
+                return False
+
+        validators: dict[str, Callable[[str], bool]] = {
+            "entity_id": lambda t: valid_entity_id(t) and not t.startswith("person."),
+            "device_id": lambda t: re.fullmatch(RE_DEVICE_ID, t) is not None,
+            "email": is_email,
+            "phone": is_phone,
+            "mobile_app_id": lambda t: not valid_entity_id(t) and t.startswith("mobile_app_"),
+            "person_id": lambda t: t.startswith("person.") and valid_entity_id(t),
+        }
+        result: dict[str, list[str]] = {}
+        left = targets
+        for category, validator in validators.items():
+            matched = [t for t in left if validator(t)]
+            if matched:
+                result[category] = matched
+                left = [t for t in left if t not in matched]
+        if left:
+            result["_UNKNOWN_"] = left
+        return result
+
+    targets = [
+        "person.joe_mctest",
+        "person.jane_mctest",
+        "joe@mctest.org",
+        "joe.mctoe@kmail.com",
+        "home@24acacia.ave",
+        "hass@localhost.org",
+        "a@b",
+        "+447700900123",
+        "+4350404183736",
+        "+43985951039393",
+        "+3294924848",
+        "0123456789",
+        "01234567",
+        "123456789",
+        "+44 (20) 7946.0958",
+        "mobile_app_joe_phone",
+        "switch.lounge",
+        "00001111222233334444555566667777",
+        "00001111122223333444455556666",
+        "@joey",
+    ]
+    assert Target(targets).as_dict() == reference(targets)
+    # and again once remembered
+    assert Target(list(reversed(targets))).as_dict() == reference(list(reversed(targets)))
+    assert Target(targets).phone == [
+        "+447700900123",
+        "+4350404183736",
+        "+43985951039393",
+        "+3294924848",
+        "0123456789",
+        "01234567",
+        "123456789",
+    ]
+    assert Target(targets).email == [
+        "joe@mctest.org",
+        "joe.mctoe@kmail.com",
+        "home@24acacia.ave",
+        "hass@localhost.org",
+    ]
+
+
 def test_has_resolved() -> None:
     assert not Target({"label_id": "tag001"}).has_resolved_target()
     assert not Target({"person_id": "person.cuth_bert"}).has_resolved_target()
@@ -199,6 +305,81 @@ def test_split_by_target_data():
     ]
 
 
+def test_target_algebra_keeps_order_and_dedupes() -> None:
+    uut = Target({
+        "entity_id": ["switch.plug_3", "switch.plug_1", "switch.plug_2"],
+        "email": ["joe@mctest.org", "mae@mctest.org"],
+    })
+    other = Target({"entity_id": ["switch.plug_1", "switch.plug_4", "switch.plug_3"], "email": ["mae@mctest.org"]})
+
+    assert (uut + other).as_dict() == {
+        "entity_id": ["switch.plug_3", "switch.plug_1", "switch.plug_2", "switch.plug_4"],
+        "email": ["joe@mctest.org", "mae@mctest.org"],
+    }
+    assert (uut - other).as_dict() == {"entity_id": ["switch.plug_2"], "email": ["joe@mctest.org"]}
+    assert (other - uut).as_dict() == {"entity_id": ["switch.plug_4"]}
+    assert len(uut + other) == 6
+
+    copied = uut.safe_copy()
+    assert copied == uut
+    copied.extend("entity_id", "switch.plug_9")
+    assert "switch.plug_9" not in uut.entity_ids
+
+
+def test_target_view_reflects_changes() -> None:
+    uut = Target(["switch.plug_1", "switch.plug_2"])
+    assert uut.entity_ids == ["switch.plug_1", "switch.plug_2"]
+    uut.extend("entity_id", ["switch.plug_2", "switch.plug_3"])
+    assert uut.entity_ids == ["switch.plug_1", "switch.plug_2", "switch.plug_3"]
+    uut.remove("entity_id", "switch.plug_1")
+    assert uut.entity_ids == ["switch.plug_2", "switch.plug_3"]
+    assert uut.targets == {"entity_id": ["switch.plug_2", "switch.plug_3"]}
+
+
+def test_split_by_target_data_groups_by_data() -> None:
+    family, friends = {"chat": 1}, {"chat": 2}
+    uut = Target(["switch.kitchen"], target_data=family, target_specific_data=True)
+    uut += Target(["switch.lounge"], target_data=friends, target_specific_data=True)
+    uut += Target(["switch.hall"], target_data=family, target_specific_data=True)
+    uut += Target(["switch.porch"], target_data=friends, target_specific_data=True)
+    uut += Target(["switch.garage"])
+    assert [t.as_dict() for t in uut.split_by_target_data()] == [
+        {"entity_id": ["switch.kitchen", "switch.hall"]},
+        {"entity_id": ["switch.lounge", "switch.porch"]},
+        {"entity_id": ["switch.garage"]},
+    ]
+    assert uut.without({("entity_id", "switch.hall"), ("entity_id", "switch.lounge")}).entity_ids == [
+        "switch.kitchen",
+        "switch.porch",
+        "switch.garage",
+    ]
+
+
+def test_split_by_target_data_with_equal_data_objects() -> None:
+    uut = Target(["switch.garage"], target_data={"room": "garage"})
+    uut += Target(["joe@mctest.org"], target_data={"chat": 1}, target_specific_data=True)
+    # equal but a different object, added straight after, so treated as a copy of the same data
+    uut += Target(["mae@mctest.org"], target_data={"chat": 1}, target_specific_data=True)
+    uut += Target(["kid@mctest.org"], target_data={"chat": 2}, target_specific_data=True)
+    # equal to the first, but a different object added later, so kept apart
+    uut += Target(["gran@mctest.org", "switch.hall"], target_data={"chat": 1}, target_specific_data=True)
+
+    split = uut.split_by_target_data()
+    assert [(t.as_dict(), t.target_data) for t in split] == [
+        ({"email": ["joe@mctest.org", "mae@mctest.org"]}, {"chat": 1}),
+        ({"email": ["kid@mctest.org"]}, {"chat": 2}),
+        ({"email": ["gran@mctest.org"], "entity_id": ["switch.hall"]}, {"chat": 1}),
+        ({"entity_id": ["switch.garage"]}, {"room": "garage"}),
+    ]
+    assert sum(len(t) for t in split) == len(uut)
+    assert all(not t.target_specific_data for t in split)
+
+    unspecific = Target(["switch.garage"], target_data={"room": "garage"})
+    assert [(t.as_dict(), t.target_data) for t in unspecific.split_by_target_data()] == [
+        ({"entity_id": ["switch.garage"]}, {"room": "garage"})
+    ]
+
+
 def test_target_required() -> None:
     assert TargetRequired("always") == TargetRequired.ALWAYS
     assert TargetRequired("never") == TargetRequired.NEVER
@@ -225,6 +406,18 @@ def test_selection_rule_construction():
     assert uut.exclude == ["Amazon.*"]
 
 
+def test_compile_fullmatch() -> None:
+    merged = compile_fullmatch([r"notify\.[a-z_]+", "group.*"])
+    assert merged("notify.kitchen")
+    assert merged("group.family")
+    assert not merged("notify.kitchen speaker")
+    assert not merged("light.notify")
+    # patterns that can't share one expression fall back to matching one by one
+    assert compile_fullmatch([r"(a)\1", r"(b)"])("aa")
+    assert compile_fullmatch([r"(?i)abc", "xyz"])("ABC")
+    assert compile_fullmatch([r"(?P<x>a)", r"(?P<x>b)"])("b")
+
+
 def test_selection_rule_match():
     uut = SelectionRule({"include": ["Goog.*", "Nest.*"], "exclude": [".*Legacy"]})
     assert uut.match("Google Pixie")
@@ -308,3 +501,47 @@ def test_debug_trace_for_targets():
     assert uut.contents()["resolved"]["omni"]["stage_4"] == {"email": ["joe@mctoe.com"]}
     assert uut.contents()["resolved"]["omni"]["stage_5"] == {"email": ["joe@mctoe.com", "home@24acacia.ave"]}
     assert uut.contents()["resolved"]["omni"]["stage_6"] == {}
+
+
+def test_null_debug_trace_records_nothing() -> None:
+    stages = [f"{i}00_stage" for i in range(15)]
+    targets = [Target(["switch.hall", "joe@mctoe.com", "+447700900123"]), Target(["switch.porch"])]
+
+    def trace(uut: DebugTrace) -> None:
+        # as for generate_targets on a single delivery
+        for stage in stages:
+            uut.record_target("push", stage, targets)
+        uut.record_delivery_selection("initial", ["push", "email"])
+        uut.record_text_render("message", reused=False)
+
+    untraced = NullDebugTrace("message", "title", {}, ["switch.hall"])
+    trace(untraced)
+    assert untraced.contents() == {
+        "arguments": {"message": "message", "title": "title", "data": {}, "target": ["switch.hall"]},
+        "traced": False,
+    }
+    assert_json_round_trip(untraced.contents())
+
+
+def test_condition_variables_immutable() -> None:
+    uut = ConditionVariables(["day"], [], [], "high", {}, "hello", notification_data={"camera": "doorbell"})
+    view = uut.as_dict()
+    assert view is uut.as_dict()
+    assert view["applied_scenarios"] == ("day",)
+    with pytest.raises(TypeError):
+        view["notification_priority"] = "low"  # type: ignore[index]
+    with pytest.raises(TypeError):
+        uut.notification_data["camera"] = "garden"  # type: ignore[index]
+    with pytest.raises(AttributeError):
+        uut.notification_priority = "low"  # type: ignore[misc]
+
+    overlaid = uut.overlay(notification_message="rendered")
+    assert overlaid["notification_message"] == "rendered"
+    assert overlaid["notification_priority"] == "high"
+    assert view["notification_message"] == "hello"
+
+    assert uut == ConditionVariables(["day"], [], [], "high", {}, "hello", notification_data={"camera": "doorbell"})
+    with pytest.raises(TypeError):
+        hash(uut)
+    assert uut.contents()["applied_scenarios"] == ["day"]
+    assert_json_round_trip(uut.contents())
@@ -1,24 +1,33 @@
+import asyncio
 import tempfile
+import time
 from pathlib import Path
-from unittest.mock import patch
+from typing import Any
+from unittest.mock import ANY, patch
 
 import pytest
 import voluptuous as vol
-from homeassistant.const import CONF_ACTION, CONF_EMAIL, CONF_TARGET
+from homeassistant.const import CONF_ACTION, CONF_EMAIL, CONF_TARGET, CONF_TIMEOUT
 from pytest_unordered import unordered
 
+from custom_components.supernotify.circuit_breaker import CircuitState
 from custom_components.supernotify.const import (
     ATTR_MEDIA_CAMERA_ENTITY_ID,
     ATTR_MEDIA_SNAPSHOT_URL,
     ATTR_PRIORITY,
     ATTR_SCENARIOS_APPLY,
+    CONF_CIRCUIT_BREAKER,
+    CONF_CONCURRENCY,
     CONF_DATA,
     CONF_DELIVERY,
+    CONF_FAILURE_THRESHOLD,
     CONF_MEDIA,
     CONF_MOBILE_APP_ID,
     CONF_MOBILE_DEVICES,
     CONF_OPTIONS,
     CONF_PERSON,
+    CONF_PRIORITY,
+    CONF_PROBE_INTERVAL,
     CONF_SELECTION,
     CONF_SELECTION_RANK,
     CONF_TARGET_USAGE,
@@ -27,14 +36,18 @@ from custom_components.supernotify.const import (
     DELIVERY_SELECTION_EXPLICIT,
     DELIVERY_SELECTION_IMPLICIT,
     OPTION_TARGET_CATEGORIES,
+    SELECTION_FALLBACK,
+    SELECTION_FALLBACK_ON_ERROR,
     TRANSPORT_EMAIL,
     TRANSPORT_GENERIC,
     TRANSPORT_MOBILE_PUSH,
+    TRANSPORT_NOTIFY_ENTITY,
+    TRANSPORT_PERSISTENT,
 )
 from custom_components.supernotify.delivery import Delivery
 from custom_components.supernotify.envelope import Envelope
 from custom_components.supernotify.media_grab import snap_notification_image
-from custom_components.supernotify.model import Target
+from custom_components.supernotify.model import ActionData, NullDebugTrace, SuppressionReason, Target
 from custom_components.supernotify.notification import Notification
 from custom_components.supernotify.schema import SelectionRank
 from custom_components.supernotify.transports.email import EmailTransport
@@ -212,7 +225,7 @@ async def test_scenario_delivery_enable() -> None:
         deliveries=DELIVERIES, transports=TRANSPORTS, scenarios={"mockery": {"delivery": {"chime": {"enabled": True}}}}
     )
     await ctx.test_initialize()
-    ctx.delivery_registry.deliveries["chime"].enabled = False
+    ctx.delivery_registry.disable("chime")
 
     uut = Notification(ctx, "testing 123", action_data={ATTR_SCENARIOS_APPLY: "mockery"})
     await uut.initialize()
@@ -454,3 +467,391 @@ async def test_delivery_selection_order() -> None:
     assert next(iter(uut.selected_deliveries)) == "eager"
     assert list(uut.selected_deliveries)[-2:] == unordered("fallback", "naturally_last")
     assert list(uut.selected_deliveries)[1:4] == unordered("DEFAULT_mobile_push", "whatever", "or_whatever")
+
+
+async def test_delivery_rank_stages() -> None:
+    ctx = TestingContext(
+        deliveries={
+            "eager": {CONF_TRANSPORT: "generic", CONF_ACTION: "a.b", CONF_SELECTION_RANK: SelectionRank.FIRST},
+            "whatever": {CONF_TRANSPORT: "generic", CONF_ACTION: "a.b", CONF_SELECTION_RANK: SelectionRank.ANY},
+            "or_whatever": {CONF_TRANSPORT: "generic", CONF_ACTION: "a.b", CONF_SELECTION_RANK: SelectionRank.ANY},
+            "tail": {CONF_TRANSPORT: "generic", CONF_ACTION: "a.b", CONF_SELECTION_RANK: SelectionRank.LAST},
+        },
+        transports={TRANSPORT_MOBILE_PUSH: {"enabled": False}},
+    )
+    await ctx.test_initialize()
+    uut = Notification(ctx, "testing 123")
+    await uut.initialize()
+    events: list[str] = []
+
+    async def call_transport(delivery: Delivery, recipients: list[str] | None = None) -> None:
+        events.append(f"start {delivery.name}")
+        await asyncio.sleep(0.03 if delivery.name == "whatever" else 0.01)
+        events.append(f"end {delivery.name}")
+
+    with patch.object(uut, "call_transport", side_effect=call_transport):
+        await uut.deliver()
+
+    assert events[:2] == ["start eager", "end eager"]
+    assert events[2:6] == ["start whatever", "start or_whatever", "end or_whatever", "end whatever"]
+    # default notify_entity delivery also ranked LAST
+    assert events[6:8] == unordered("start tail", "start DEFAULT_notify_entity")
+    assert events[8:] == unordered("end tail", "end DEFAULT_notify_entity")
+
+
+async def test_fallbacks_delivered_concurrently() -> None:
+    ctx = TestingContext(
+        deliveries={
+            "broken": {CONF_TRANSPORT: "generic", CONF_ACTION: "a.b"},
+            "backup": {CONF_TRANSPORT: "generic", CONF_ACTION: "a.c", CONF_SELECTION: [SELECTION_FALLBACK_ON_ERROR]},
+            "other_backup": {CONF_TRANSPORT: "generic", CONF_ACTION: "a.d", CONF_SELECTION: [SELECTION_FALLBACK_ON_ERROR]},
+            "default_backup": {CONF_TRANSPORT: "generic", CONF_ACTION: "a.e", CONF_SELECTION: [SELECTION_FALLBACK]},
+        },
+        transports={TRANSPORT_MOBILE_PUSH: {"enabled": False}, TRANSPORT_NOTIFY_ENTITY: {"enabled": False}},
+    )
+    await ctx.test_initialize()
+    uut = Notification(ctx, "testing 123")
+    await uut.initialize()
+    assert list(uut.selected_deliveries) == ["broken"]
+    called: list[str] = []
+    overlapped: list[str] = []
+    # each fallback waits for the other to start, so would time out if delivered one at a time
+    both_started = asyncio.Barrier(2)
+
+    async def call_transport(delivery: Delivery, recipients: list[str] | None = None) -> None:
+        called.append(delivery.name)
+        if delivery.name == "broken":
+            uut.failed += 1
+        else:
+            async with asyncio.timeout(1):
+                await both_started.wait()
+            overlapped.append(delivery.name)
+
+    with patch.object(uut, "call_transport", side_effect=call_transport):
+        await uut.deliver()
+
+    assert called == ["broken", "backup", "other_backup"]
+    assert overlapped == unordered("backup", "other_backup")
+    assert uut.fallback == 2
+
+
+async def test_delivery_selection_plan_reused() -> None:
+    ctx = TestingContext(deliveries=DELIVERIES, transports=TRANSPORTS, scenarios={"mockery": {}})
+    await ctx.test_initialize()
+    plans = ctx.delivery_registry.selection_plans
+
+    first = Notification(ctx, "testing 123", action_data={ATTR_SCENARIOS_APPLY: "mockery"})
+    await first.initialize()
+    second = Notification(ctx, "testing 456", action_data={ATTR_SCENARIOS_APPLY: "mockery"})
+    await second.initialize()
+    assert (plans.misses, plans.hits) == (1, 1)
+    assert list(second.selected_deliveries) == list(first.selected_deliveries)
+    assert second.debug_trace.delivery_selection == first.debug_trace.delivery_selection
+    # results handed out are copies, safe to modify per notification
+    assert second.selected_deliveries is not first.selected_deliveries
+
+    overridden = Notification(ctx, "testing 789", action_data={CONF_DELIVERY: {"mobile": {"enabled": False}}})
+    await overridden.initialize()
+    assert plans.misses == 2
+    assert "mobile" not in overridden.selected_deliveries
+
+
+async def test_delivery_selection_plan_invalidated_by_toggle() -> None:
+    ctx = TestingContext(deliveries=DELIVERIES, transports=TRANSPORTS)
+    await ctx.test_initialize()
+
+    uut = Notification(ctx, "testing 123")
+    await uut.initialize()
+    assert "chime" in uut.selected_deliveries
+    assert len(ctx.delivery_registry.selection_plans) == 1
+
+    assert ctx.delivery_registry.disable("chime")
+    assert len(ctx.delivery_registry.selection_plans) == 0
+    uut = Notification(ctx, "testing 123")
+    await uut.initialize()
+    assert "chime" not in uut.selected_deliveries
+
+
+async def test_envelopes_dispatched_concurrently() -> None:
+    ctx = TestingContext(
+        deliveries={"chat": {CONF_TRANSPORT: TRANSPORT_GENERIC, CONF_ACTION: "notify.chat"}},
+        transports={TRANSPORT_GENERIC: {CONF_CONCURRENCY: 2}},
+    )
+    await ctx.test_initialize()
+    delivery = ctx.delivery("chat")
+    uut = Notification(ctx, "hello")
+    await uut.initialize()
+    envelopes = [Envelope(delivery, uut, target=Target(f"switch.plug_{i}")) for i in range(6)]
+    in_flight: list[int] = [0, 0]
+
+    async def slow_deliver(envelope: Envelope, debug_trace: Any = None) -> bool:
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight)
+        # last envelope finishes first
+        await asyncio.sleep(0.06 - 0.01 * int(envelope.target.entity_ids[0][-1]))
+        in_flight[0] -= 1
+        if envelope.target.entity_ids == ["switch.plug_3"]:
+            raise OSError("plug 3 unplugged")
+        envelope.delivered = True
+        return True
+
+    with (
+        patch.object(uut, "generate_envelopes", return_value=envelopes),
+        patch.object(delivery.transport, "deliver", side_effect=slow_deliver),
+    ):
+        started = time.monotonic()
+        await uut.call_transport(delivery)
+        elapsed = time.monotonic() - started
+
+    assert in_flight[1] == 2  # never more than the transport concurrency, and never just one at a time
+    assert uut.delivered == 5
+    assert uut.failed == 1
+    assert [e.target.entity_ids[0] for e in uut.deliveries["chat"]["success"]] == [  # type: ignore[union-attr]
+        "switch.plug_0",
+        "switch.plug_1",
+        "switch.plug_2",
+        "switch.plug_4",
+        "switch.plug_5",
+    ]
+    assert 0 < uut.delivery_elapsed["chat"] <= round(elapsed, 3)  # recorded to the millisecond
+    assert uut.contents()["delivery_elapsed"] == {"chat": uut.delivery_elapsed["chat"]}
+
+
+async def test_no_time_limit_unless_configured() -> None:
+    ctx = TestingContext(deliveries={"chat": {CONF_TRANSPORT: TRANSPORT_GENERIC, CONF_ACTION: "notify.chat"}})
+    await ctx.test_initialize()
+    delivery = ctx.delivery("chat")
+    uut = Notification(ctx, "hello")
+    await uut.initialize()
+    await uut.deliver()
+
+    assert delivery.timeout is None
+    assert ctx.deadline is None
+    assert uut.time_limit(delivery) is None
+
+
+async def test_delivery_timeout_falls_back() -> None:
+    ctx = TestingContext(
+        deliveries={
+            "slow": {CONF_TRANSPORT: TRANSPORT_GENERIC, CONF_ACTION: "notify.slow", CONF_TIMEOUT: 0.05},
+            "backup": {
+                CONF_TRANSPORT: TRANSPORT_GENERIC,
+                CONF_ACTION: "notify.backup",
+                CONF_SELECTION: [SELECTION_FALLBACK_ON_ERROR],
+            },
+        },
+        transports={TRANSPORT_MOBILE_PUSH: {"enabled": False}, TRANSPORT_NOTIFY_ENTITY: {"enabled": False}},
+    )
+    await ctx.test_initialize()
+    uut = Notification(ctx, "hello")
+    await uut.initialize()
+
+    async def deliver(envelope: Envelope, debug_trace: Any = None) -> bool:
+        if envelope.delivery.name == "slow":
+            await asyncio.sleep(1)
+        envelope.delivered = True
+        return True
+
+    with patch.object(ctx.delivery("slow").transport, "deliver", side_effect=deliver):
+        started = time.monotonic()
+        await uut.deliver()
+        elapsed = time.monotonic() - started
+
+    assert elapsed < 0.5
+    assert uut.failed == 1
+    assert uut.fallback == 1
+    assert uut.delivered == 1
+    timed_out: Envelope = uut.deliveries["slow"]["error"][0]  # type: ignore[index]
+    assert timed_out.skip_reason == SuppressionReason.TIMEOUT
+    assert timed_out.delivery_error and timed_out.delivery_error[0].startswith("Timed out")
+    assert uut.deliveries["backup"]["success"]
+
+
+async def test_open_circuit_skips_transport_and_falls_back() -> None:
+    ctx = TestingContext(
+        deliveries={
+            "broken": {CONF_TRANSPORT: TRANSPORT_GENERIC, CONF_ACTION: "notify.broken"},
+            "backup": {CONF_TRANSPORT: TRANSPORT_PERSISTENT, CONF_SELECTION: [SELECTION_FALLBACK_ON_ERROR]},
+        },
+        transports={
+            TRANSPORT_GENERIC: {CONF_CIRCUIT_BREAKER: {CONF_FAILURE_THRESHOLD: 2}},
+            TRANSPORT_MOBILE_PUSH: {"enabled": False},
+            TRANSPORT_NOTIFY_ENTITY: {"enabled": False},
+        },
+    )
+    await ctx.test_initialize()
+    broken = ctx.delivery("broken").transport
+    backup = ctx.delivery("backup").transport
+
+    async def deliver(envelope: Envelope, debug_trace: Any = None) -> bool:
+        envelope.delivered = True
+        return True
+
+    with (
+        patch.object(broken, "deliver", side_effect=OSError("integration down")) as broken_deliver,
+        patch.object(backup, "deliver", side_effect=deliver),
+        patch.object(ctx.hass_api, "set_state") as set_state,
+    ):
+        for message in ("first", "second"):
+            uut = Notification(ctx, message)
+            await uut.initialize()
+            await uut.deliver()
+            assert uut.failed == 1
+        assert broken.circuit_breaker.state == CircuitState.OPEN
+        set_state.assert_called_with(f"binary_sensor.supernotify_transport_{TRANSPORT_GENERIC}", "on", ANY)
+        assert set_state.call_args[0][2]["circuit_breaker"]["state"] == "open"
+
+        uut = Notification(ctx, "third")
+        await uut.initialize()
+        await uut.deliver()
+
+    assert broken_deliver.call_count == 2
+    assert uut.failed == 0
+    assert uut.circuit_open == 1
+    assert uut.deliveries["broken"]["suppressed"][0].skip_reason == SuppressionReason.CIRCUIT_OPEN  # type: ignore[index]
+    assert uut.fallback == 1
+    assert uut.delivered == 1
+
+
+async def test_half_open_circuit_sends_single_probe() -> None:
+    ctx = TestingContext(
+        deliveries={"chime": {CONF_TRANSPORT: TRANSPORT_GENERIC, CONF_ACTION: "notify.chime", CONF_PRIORITY: ["high"]}},
+        recipients=[
+            {CONF_PERSON: "person.joe", CONF_DELIVERY: {"chime": {CONF_TARGET: ["switch.joe"], CONF_DATA: {"tune": 1}}}},
+            {CONF_PERSON: "person.mae", CONF_DELIVERY: {"chime": {CONF_TARGET: ["switch.mae"], CONF_DATA: {"tune": 2}}}},
+        ],
+        transports={
+            TRANSPORT_GENERIC: {CONF_CIRCUIT_BREAKER: {CONF_FAILURE_THRESHOLD: 1, CONF_PROBE_INTERVAL: 0}},
+            TRANSPORT_MOBILE_PUSH: {"enabled": False},
+            TRANSPORT_NOTIFY_ENTITY: {"enabled": False},
+        },
+    )
+    await ctx.test_initialize()
+    breaker = ctx.delivery("chime").transport.circuit_breaker
+    working: bool = False
+    calls: list[Envelope] = []
+
+    async def deliver(envelope: Envelope, debug_trace: Any = None) -> bool:
+        calls.append(envelope)
+        if not working:
+            raise OSError("integration down")
+        envelope.delivered = True
+        return True
+
+    async def notify(message: str, priority: str = "high") -> Notification:
+        calls.clear()
+        uut = Notification(ctx, message, action_data={ATTR_PRIORITY: priority})
+        await uut.initialize()
+        await uut.deliver()
+        return uut
+
+    with patch.object(ctx.delivery("chime").transport, "deliver", side_effect=deliver):
+        uut = await notify("first")
+        assert len(calls) == 3
+        assert breaker.state == CircuitState.OPEN
+
+        # skipped on priority before any envelope, so doesn't use up the probe
+        uut = await notify("second", priority="low")
+        assert not calls
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.rejected == 0
+
+        uut = await notify("third")
+        assert len(calls) == 1
+        assert uut.failed == 1
+        assert uut.circuit_open == 2
+        assert breaker.state == CircuitState.OPEN
+
+        working = True
+        uut = await notify("fourth")
+        assert len(calls) == 1
+        assert (uut.delivered, uut.circuit_open) == (1, 2)
+        assert breaker.state == CircuitState.CLOSED
+
+        uut = await notify("fifth")
+        assert len(calls) == 3
+        assert (uut.delivered, uut.circuit_open) == (3, 0)
+    assert breaker.rejected == 4
+
+
+async def test_notification_deadline_bounds_all_deliveries() -> None:
+    ctx = TestingContext(
+        deliveries={
+            "slow": {CONF_TRANSPORT: TRANSPORT_GENERIC, CONF_ACTION: "notify.slow"},
+            "slower": {CONF_TRANSPORT: TRANSPORT_GENERIC, CONF_ACTION: "notify.slower", CONF_TIMEOUT: 10},
+        },
+        transports={TRANSPORT_MOBILE_PUSH: {"enabled": False}, TRANSPORT_NOTIFY_ENTITY: {"enabled": False}},
+        deadline=0.05,
+    )
+    await ctx.test_initialize()
+    uut = Notification(ctx, "hello")
+    await uut.initialize()
+
+    async def deliver(envelope: Envelope, debug_trace: Any = None) -> bool:
+        await asyncio.sleep(1)
+        return True
+
+    with patch.object(ctx.delivery("slow").transport, "deliver", side_effect=deliver):
+        started = time.monotonic()
+        await uut.deliver()
+        elapsed = time.monotonic() - started
+
+    assert elapsed < 0.5
+    assert uut.failed == 2
+    assert uut.delivered == 0
+
+
+async def test_null_debug_trace_unless_trace_required() -> None:
+    ctx = TestingContext(deliveries={"chat": {CONF_TRANSPORT: TRANSPORT_GENERIC, CONF_ACTION: "notify.chat"}})
+    await ctx.test_initialize()
+    assert not ctx.archive.trace_required()
+
+    untraced = Notification(ctx, "door open", target=["switch.bell"])
+    await untraced.initialize()
+    await untraced.deliver()
+    assert isinstance(untraced.debug_trace, NullDebugTrace)
+    assert untraced.debug_trace.contents() == {
+        "arguments": {"message": "door open", "title": None, "data": {}, "target": ["switch.bell"]},
+        "traced": False,
+    }
+
+    traced = Notification(ctx, "door open", target=["switch.bell"], action_data={"debug": True})
+    await traced.initialize()
+    await traced.deliver()
+    assert not isinstance(traced.debug_trace, NullDebugTrace)
+    assert traced.debug_trace.contents()["delivery_selection"]
+
+
+def test_action_data_parse_splits_known_and_passthrough() -> None:
+    uut = ActionData.parse({
+        "priority": "high",
+        "apply_scenarios": "home",
+        "delivery": {"mobile": {"data": {"push": {"sound": "alarm"}}}},
+        "data": {"clickAction": "/lovelace/cameras"},
+        "priorty": "typo",
+        "push": {"sound": "chime"},
+    })
+    assert uut.priority == "high"
+    assert uut.applied_scenarios == ["home"]
+    assert uut.delivery == {"mobile": {"data": {"push": {"sound": "alarm"}}}}
+    # unknown keys, even near misses, pass through to transports along with nested data
+    assert uut.extra_data == {"priorty": "typo", "push": {"sound": "chime"}, "clickAction": "/lovelace/cameras"}
+
+    assert ActionData.parse(None) == ActionData()
+    assert ActionData.parse({"passthrough": True}) == ActionData(extra_data={"passthrough": True})
+
+
+@pytest.mark.parametrize(
+    "action_data",
+    [
+        {"delivery_selection": "sometimes", "passthrough": True},
+        {"recipients": ["not an entity"]},
+        {"debug": "perhaps"},
+        {"apply_scenarios": [{"name": "home"}]},
+        {"actions": [{"action_url": "not a url"}]},
+        {"data": "not a dict"},
+    ],
+)
+def test_action_data_parse_rejects_malformed(action_data: dict[str, Any]) -> None:
+    with pytest.raises(vol.Error):
+        ActionData.parse(action_data)
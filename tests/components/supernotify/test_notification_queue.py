@@ -0,0 +1,149 @@
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+from homeassistant.const import CONF_ENABLED
+from homeassistant.core import HomeAssistant
+from pytest_unordered import unordered
+
+from custom_components.supernotify.const import (
+    ATTR_BLOCKING,
+    ATTR_PRIORITY,
+    CONF_QUEUE_WORKERS,
+    CONF_SIZE,
+    PRIORITY_CRITICAL,
+    PRIORITY_LOW,
+    PRIORITY_MEDIUM,
+)
+from custom_components.supernotify.hass_api import HomeAssistantAPI
+from custom_components.supernotify.notification_queue import (
+    QUEUE_DEPTH_ENTITY_ID,
+    QUEUE_WAIT_ENTITY_ID,
+    NotificationQueue,
+    priority_rank,
+)
+from custom_components.supernotify.notify import SupernotifyAction
+
+
+def test_priority_rank() -> None:
+    assert priority_rank(PRIORITY_CRITICAL) == 5
+    assert priority_rank(PRIORITY_LOW) == 2
+    assert priority_rank(None) == 3
+    assert priority_rank("unknown") == 3
+    assert priority_rank(4) == 4
+    assert priority_rank("4") == 4
+
+
+def test_disabled_by_default(mock_hass_api: HomeAssistantAPI) -> None:
+    uut = NotificationQueue(None, mock_hass_api)
+    uut.start(Mock())
+    assert not uut.running
+    mock_hass_api.create_background_task.assert_not_called()  # type: ignore
+
+
+async def test_critical_overtakes_queued(hass: HomeAssistant) -> None:
+    delivered: list[str] = []
+    gate = asyncio.Event()
+
+    async def handler(name: str) -> None:
+        await gate.wait()
+        delivered.append(name)
+
+    uut = NotificationQueue({CONF_ENABLED: True, CONF_QUEUE_WORKERS: 1, CONF_SIZE: 10}, HomeAssistantAPI(hass))
+    uut.start(handler)
+    await uut.put(PRIORITY_MEDIUM, "blocker")
+    await asyncio.sleep(0)  # worker picks up blocker and waits on gate
+    await uut.put(PRIORITY_LOW, "low")
+    await uut.put(PRIORITY_MEDIUM, "medium")
+    await uut.put(PRIORITY_CRITICAL, "critical")
+    assert uut.depth == 3
+    gate.set()
+    await uut.join()
+    assert delivered == ["blocker", "critical", "medium", "low"]
+    assert uut.processed == 4
+    assert hass.states.get(QUEUE_DEPTH_ENTITY_ID).state == "0"  # type: ignore
+    assert hass.states.get(QUEUE_WAIT_ENTITY_ID) is not None
+    await uut.stop()
+    assert not uut.running
+
+
+async def test_worker_survives_handler_failure(hass: HomeAssistant) -> None:
+    delivered: list[str] = []
+
+    async def handler(name: str) -> None:
+        if name == "bad":
+            raise ValueError("bad notification")
+        delivered.append(name)
+
+    uut = NotificationQueue({CONF_ENABLED: True, CONF_QUEUE_WORKERS: 2}, HomeAssistantAPI(hass))
+    uut.start(handler)
+    await uut.put(PRIORITY_MEDIUM, "bad")
+    await uut.put(PRIORITY_MEDIUM, "good")
+    await uut.join()
+    assert delivered == ["good"]
+    await uut.stop()
+
+
+async def test_queued_send_message(hass: HomeAssistant) -> None:
+    uut = SupernotifyAction(hass, queue={CONF_ENABLED: True, CONF_QUEUE_WORKERS: 2})
+    await uut.initialize()
+    assert uut.queue.running
+    await uut.async_send_message("queued message", data={ATTR_PRIORITY: PRIORITY_CRITICAL})
+    await uut.queue.join()
+    assert uut.last_notification is not None
+    assert uut.last_notification.message == "queued message"
+
+    await uut.async_send_message("blocking message", data={ATTR_BLOCKING: True})
+    assert uut.last_notification.message == "blocking message"
+    assert ATTR_BLOCKING not in uut.last_notification.extra_data
+    assert uut.queue.processed == 1
+    await uut.queue.stop()
+
+
+async def test_stop_delivers_queued(hass: HomeAssistant) -> None:
+    delivered: list[str] = []
+    gate = asyncio.Event()
+
+    async def handler(name: str) -> None:
+        await gate.wait()
+        delivered.append(name)
+
+    uut = NotificationQueue({CONF_ENABLED: True, CONF_QUEUE_WORKERS: 1, CONF_SIZE: 2}, HomeAssistantAPI(hass))
+    uut.start(handler)
+    await uut.put(PRIORITY_MEDIUM, "first")
+    await asyncio.sleep(0)  # worker picks up first and waits on gate
+    await uut.put(PRIORITY_MEDIUM, "second")
+    await uut.put(PRIORITY_MEDIUM, "third")
+    waiting = asyncio.create_task(uut.put(PRIORITY_MEDIUM, "fourth"))  # queue full
+    await asyncio.sleep(0)
+
+    stopping = asyncio.create_task(uut.stop())
+    await asyncio.sleep(0)
+    late = asyncio.create_task(uut.put(PRIORITY_MEDIUM, "late"))
+    gate.set()
+    await asyncio.gather(stopping, waiting, late)
+
+    assert delivered == unordered("first", "second", "third", "fourth", "late")
+    assert uut.abandoned == 0
+    assert not uut.running
+
+
+async def test_stop_gives_up_after_drain_timeout(hass: HomeAssistant) -> None:
+    async def handler(name: str) -> None:
+        await asyncio.Event().wait()
+
+    uut = NotificationQueue({CONF_ENABLED: True, CONF_QUEUE_WORKERS: 1, CONF_SIZE: 1}, HomeAssistantAPI(hass))
+    uut.start(handler)
+    await uut.put(PRIORITY_MEDIUM, "stuck")
+    await asyncio.sleep(0)
+    await uut.put(PRIORITY_MEDIUM, "queued")
+    waiting = asyncio.create_task(uut.put(PRIORITY_MEDIUM, "waiting"))
+    await asyncio.sleep(0)
+
+    await uut.stop(drain_timeout=0.01)
+
+    with pytest.raises(RuntimeError):
+        await waiting
+    assert uut.abandoned == 1
+    assert uut.depth == 0
+    assert not uut.running
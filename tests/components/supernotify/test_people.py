@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+from datetime import timedelta
 from typing import TYPE_CHECKING
 
 from homeassistant.components import person
+from homeassistant.const import CONF_EMAIL, CONF_ENABLED, CONF_TARGET, STATE_HOME
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
 from pytest_unordered import unordered
 
+from custom_components.supernotify.const import CONF_DATA, CONF_DELIVERY, CONF_PERSON
 from custom_components.supernotify.hass_api import HomeAssistantAPI
+from custom_components.supernotify.model import ConditionVariables
 from custom_components.supernotify.notification import Notification
-from custom_components.supernotify.people import PeopleRegistry, Recipient
+from custom_components.supernotify.people import REDISCOVERY_DELAY, PeopleRegistry, Recipient
 from custom_components.supernotify.transports.mobile_push import MobilePushTransport
 
 from .hass_setup_lib import TestingContext, register_mobile_app
@@ -120,3 +126,87 @@ async def test_filter_recipients(hass: HomeAssistant) -> None:
 
     assert {r.entity_id for r in uut.filter_recipients_by_occupancy("only_out")} == {"person.mae_mctest"}
     assert {r.entity_id for r in uut.filter_recipients_by_occupancy("only_in")} == {"person.joe_mctest"}
+
+
+def test_precomputed_recipient_targets(hass: HomeAssistant) -> None:
+    uut = PeopleRegistry(
+        [
+            {
+                CONF_PERSON: "person.joe",
+                CONF_EMAIL: "joe@home.net",
+                CONF_DELIVERY: {
+                    "chat": {CONF_TARGET: ["@joe"], CONF_DATA: {"priority": "high"}},
+                    "email": {CONF_ENABLED: False, CONF_TARGET: ["joe@work.net"]},
+                },
+            },
+            {CONF_PERSON: "person.mae", CONF_EMAIL: "mae@home.net"},
+        ],
+        HomeAssistantAPI(hass),
+    )
+    uut.initialize()
+    joe = uut.people["person.joe"]
+    mae = uut.people["person.mae"]
+
+    chat_target = uut.recipient_target(joe, "chat")
+    assert chat_target == joe.target("chat")
+    assert chat_target.email == ["joe@home.net"]
+    assert chat_target.target_specific_data
+    assert uut.recipient_target(joe, "email") == uut.recipient_target(joe, "sms")
+    assert uut.recipient_target(joe, "email").email == ["joe@home.net"]
+    assert uut.recipient_target(mae, "chat").email == ["mae@home.net"]
+
+    # callers get a copy, so changing it leaves the table intact
+    chat_target.extend(CONF_EMAIL, ["joe@elsewhere.net"])
+    assert uut.recipient_target(joe, "chat").email == ["joe@home.net"]
+    assert "joe@elsewhere.net" not in joe.target("chat").email
+
+    joe.delivery_overrides["email"].enabled = True
+    uut.recipient_changed("person.joe")
+    assert "joe@work.net" in uut.recipient_target(joe, "email").email
+
+
+async def test_recipient_targets_refreshed_on_device_registry_change(
+    hass: HomeAssistant, device_registry: device_registry.DeviceRegistry
+) -> None:
+    hass_api = HomeAssistantAPI(hass)
+    register_mobile_app(hass_api, person="person.joe", device_name="Joes Phone")
+    uut = PeopleRegistry([{CONF_PERSON: "person.joe", CONF_DELIVERY: {"chat": {CONF_DATA: {"push": "yes"}}}}], hass_api)
+    uut.initialize()
+    joe = uut.people["person.joe"]
+    assert uut.recipient_target(joe, "chat").mobile_app_ids == ["mobile_app_joes_phone"]
+
+    register_mobile_app(hass_api, person="person.joe", device_name="Joes Tablet")
+    await hass.async_block_till_done()
+    assert uut.recipient_target(joe, "chat").mobile_app_ids == ["mobile_app_joes_phone"]
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=REDISCOVERY_DELAY + 1))
+    await hass.async_block_till_done()
+
+    assert uut.recipient_target(joe, "chat").mobile_app_ids == unordered("mobile_app_joes_phone", "mobile_app_joes_tablet")
+    assert uut.recipient_target(joe, "email").mobile_app_ids == unordered("mobile_app_joes_phone", "mobile_app_joes_tablet")
+    assert uut.people["person.joe"].enabled_mobile_devices.keys() == {"mobile_app_joes_phone", "mobile_app_joes_tablet"}
+
+
+async def test_occupancy_tracked_from_state_changes(hass: HomeAssistant) -> None:
+    hass.states.async_set("person.joe", "home")
+    hass.states.async_set("person.mae", "home")
+    hass_api = HomeAssistantAPI(hass)
+    uut = PeopleRegistry([{CONF_PERSON: "person.joe"}, {CONF_PERSON: "person.mae"}], hass_api)
+    uut.initialize()
+
+    occupancy = uut.determine_occupancy()
+    assert len(occupancy[STATE_HOME]) == 2
+    assert uut.determine_occupancy() is occupancy  # not rebuilt until something changes
+    assert ConditionVariables(occupiers=occupancy).occupancy == ("ALL_HOME",)
+
+    # seen straight away, without waiting for the state change event to be processed
+    hass.states.async_set("person.mae", "not_home")
+    occupancy_later = uut.determine_occupancy()
+    assert [r.entity_id for r in occupancy_later[STATE_HOME]] == ["person.joe"]
+    assert ConditionVariables(occupiers=occupancy_later).occupancy == ("LONE_HOME", "SOME_HOME")
+    # snapshot taken earlier, as by a notification in progress, is unchanged
+    assert len(occupancy[STATE_HOME]) == 2
+    assert uut.filter_recipients_by_occupancy("only_out", occupancy) == []
+
+    uut.people["person.joe"].enabled = False
+    uut.recipient_changed("person.joe")
+    assert uut.filter_recipients_by_occupancy("only_in") == []
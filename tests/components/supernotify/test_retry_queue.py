@@ -0,0 +1,242 @@
+import asyncio
+import time
+from typing import Any
+from unittest.mock import Mock, patch
+
+import pytest
+from homeassistant.const import CONF_ACTION, CONF_ENABLED, CONF_TIMEOUT, EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import HomeAssistant
+
+from custom_components.supernotify.const import (
+    ATTR_PRIORITY,
+    CONF_BACKOFF,
+    CONF_MAX_ATTEMPTS,
+    CONF_MAX_BACKOFF,
+    CONF_PRIORITY,
+    CONF_SELECTION,
+    CONF_SIZE,
+    CONF_TRANSPORT,
+    PRIORITY_CRITICAL,
+    PRIORITY_LOW,
+    PRIORITY_MEDIUM,
+    SELECTION_FALLBACK_ON_ERROR,
+    TRANSPORT_GENERIC,
+    TRANSPORT_MOBILE_PUSH,
+    TRANSPORT_NOTIFY_ENTITY,
+    TRANSPORT_PERSISTENT,
+)
+from custom_components.supernotify.envelope import Envelope
+from custom_components.supernotify.hass_api import HomeAssistantAPI
+from custom_components.supernotify.model import Target
+from custom_components.supernotify.notification import Notification
+from custom_components.supernotify.retry_queue import RETRY_AGE_ENTITY_ID, RETRY_DEPTH_ENTITY_ID, STORAGE_KEY, RetryQueue
+from tests.components.supernotify.hass_setup_lib import TestingContext
+
+
+async def failed_envelope(ctx: TestingContext, **action_data: Any) -> Envelope:
+    notification = Notification(ctx, "door open", title="Alarm", action_data=action_data)
+    await notification.initialize()
+    envelope = Envelope(ctx.delivery("chat"), notification, target=Target("switch.bell"), data={"colour": "red"})
+    envelope.error_count = 1
+    envelope.delivery_error = ["OSError: integration down\n"]
+    return envelope
+
+
+async def chat_context() -> TestingContext:
+    ctx = TestingContext(deliveries={"chat": {CONF_TRANSPORT: TRANSPORT_GENERIC, CONF_ACTION: "notify.chat"}})
+    await ctx.test_initialize()
+    return ctx
+
+
+def test_backoff_grows_with_jitter_up_to_limit(mock_hass_api: HomeAssistantAPI) -> None:
+    uut = RetryQueue(
+        {
+            CONF_ENABLED: True,
+            CONF_BACKOFF: 10,
+            CONF_MAX_BACKOFF: 60,
+            CONF_PRIORITY: {PRIORITY_CRITICAL: {CONF_BACKOFF: 1}, PRIORITY_LOW: {CONF_MAX_ATTEMPTS: 0}},
+        },
+        mock_hass_api,
+        Mock(),
+    )
+    assert 5 <= uut.backoff(None, 1) <= 10
+    assert 10 <= uut.backoff(None, 2) <= 20
+    assert 30 <= uut.backoff(None, 6) <= 60
+    assert 0.5 <= uut.backoff(PRIORITY_CRITICAL, 1) <= 1
+    assert uut.policy(PRIORITY_LOW)[CONF_MAX_ATTEMPTS] == 0
+    assert uut.policy(PRIORITY_CRITICAL)[CONF_MAX_ATTEMPTS] == 5
+
+
+async def test_disabled_by_default(mock_hass_api: HomeAssistantAPI) -> None:
+    ctx = await chat_context()
+    uut = RetryQueue(None, mock_hass_api, ctx.delivery_registry)
+    await uut.initialize()
+    assert not uut.add(await failed_envelope(ctx))
+    mock_hass_api.create_store.assert_not_called()  # type: ignore
+
+
+async def test_envelope_snapshot_round_trip() -> None:
+    ctx = await chat_context()
+    envelope = await failed_envelope(ctx, priority=PRIORITY_CRITICAL)
+    restored = Envelope.restore(ctx.delivery("chat"), envelope.snapshot())
+    assert restored == envelope
+    assert (restored.message, restored.title, restored.priority) == ("door open", "Alarm", PRIORITY_CRITICAL)
+    assert restored.target.entity_ids == ["switch.bell"]
+
+
+async def test_retried_until_delivered(hass: HomeAssistant) -> None:
+    ctx = await chat_context()
+    uut = RetryQueue({CONF_ENABLED: True, CONF_BACKOFF: 0.01}, HomeAssistantAPI(hass), ctx.delivery_registry)
+    await uut.initialize()
+    attempts: list[str | None] = []
+
+    async def deliver(envelope: Envelope, debug_trace: Any = None) -> bool:
+        attempts.append(envelope.message)
+        if len(attempts) == 1:
+            raise OSError("still down")
+        envelope.delivered = True
+        return True
+
+    with patch.object(ctx.delivery("chat").transport, "deliver", side_effect=deliver):
+        assert uut.add(await failed_envelope(ctx))
+        assert hass.states.get(RETRY_DEPTH_ENTITY_ID).state == "1"  # type: ignore[union-attr]
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            await hass.async_block_till_done()
+            if not uut.entries:
+                break
+
+    assert attempts == ["door open", "door open"]
+    assert (uut.retried, uut.recovered, uut.abandoned) == (2, 1, 0)
+    assert hass.states.get(RETRY_DEPTH_ENTITY_ID).state == "0"  # type: ignore[union-attr]
+    assert hass.states.get(RETRY_AGE_ENTITY_ID).state == "0.0"  # type: ignore[union-attr]
+    uut.stop()
+
+
+async def test_abandoned_after_max_attempts(mock_hass_api: HomeAssistantAPI) -> None:
+    ctx = await chat_context()
+    uut = RetryQueue({CONF_ENABLED: True, CONF_MAX_ATTEMPTS: 2}, mock_hass_api, ctx.delivery_registry)
+    with patch.object(ctx.delivery("chat").transport, "deliver", side_effect=OSError("still down")):
+        uut.add(await failed_envelope(ctx))
+        for attempt in (1, 2):
+            next(iter(uut.entries.values())).next_attempt = time.time()
+            await uut.retry_due()
+            assert uut.retried == attempt
+    assert not uut.entries
+    assert uut.abandoned == 1
+    mock_hass_api.call_later.assert_called()  # type: ignore
+
+
+async def test_abandoned_when_retry_times_out(mock_hass_api: HomeAssistantAPI) -> None:
+    ctx = TestingContext(
+        deliveries={"chat": {CONF_TRANSPORT: TRANSPORT_GENERIC, CONF_ACTION: "notify.chat", CONF_TIMEOUT: 0.01}}
+    )
+    await ctx.test_initialize()
+    uut = RetryQueue({CONF_ENABLED: True, CONF_MAX_ATTEMPTS: 5}, mock_hass_api, ctx.delivery_registry)
+
+    async def hang(envelope: Envelope, debug_trace: Any = None) -> bool:
+        await asyncio.sleep(10)
+        return True
+
+    with patch.object(ctx.delivery("chat").transport, "deliver", side_effect=hang):
+        uut.add(await failed_envelope(ctx))
+        entry = next(iter(uut.entries.values()))
+        entry.next_attempt = time.time()
+        await uut.retry_due()
+
+    # may have been delivered after all, so not tried again
+    assert not uut.entries
+    assert (uut.retried, uut.abandoned) == (1, 1)
+    assert entry.last_error == "Timed out after 0.01s"
+
+
+async def test_unserializable_envelope_not_queued(mock_hass_api: HomeAssistantAPI) -> None:
+    ctx = await chat_context()
+    uut = RetryQueue({CONF_ENABLED: True}, mock_hass_api, ctx.delivery_registry)
+    envelope = await failed_envelope(ctx)
+    envelope.data["camera"] = object()
+
+    assert not uut.add(envelope)
+    assert uut.add(await failed_envelope(ctx))
+    assert uut.depth == 1
+    assert uut.dump()
+
+
+async def test_oldest_dropped_when_full(mock_hass_api: HomeAssistantAPI) -> None:
+    ctx = await chat_context()
+    uut = RetryQueue({CONF_ENABLED: True, CONF_SIZE: 2}, mock_hass_api, ctx.delivery_registry)
+    for _ in range(3):
+        uut.add(await failed_envelope(ctx))
+    assert uut.depth == 2
+    assert uut.abandoned == 1
+
+
+async def test_persisted_across_restart(hass: HomeAssistant, hass_storage: dict[str, Any]) -> None:
+    ctx = await chat_context()
+    uut = RetryQueue({CONF_ENABLED: True}, HomeAssistantAPI(hass), ctx.delivery_registry)
+    await uut.initialize()
+    uut.add(await failed_envelope(ctx))
+    uut.stop()
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+    assert len(hass_storage[STORAGE_KEY]["data"]["entries"]) == 1
+
+    restarted = RetryQueue({CONF_ENABLED: True}, HomeAssistantAPI(hass), ctx.delivery_registry)
+    await restarted.initialize()
+    assert [e.dump() for e in restarted.entries.values()] == [e.dump() for e in uut.entries.values()]
+    restarted.stop()
+
+
+async def test_failed_notification_envelopes_queued(mock_hass_api: HomeAssistantAPI) -> None:
+    ctx = await chat_context()
+    ctx.retry_queue = RetryQueue({CONF_ENABLED: True}, mock_hass_api, ctx.delivery_registry)
+    uut = Notification(ctx, "door open", target="switch.bell")
+    await uut.initialize()
+    with patch.object(ctx.delivery("chat").transport, "deliver", side_effect=OSError("integration down")):
+        await uut.call_transport(ctx.delivery("chat"))
+    assert uut.failed == 1
+    assert uut.retry_queued == 1
+    queued = next(iter(ctx.retry_queue.entries.values()))
+    assert queued.envelope["message"] == "door open"
+    assert queued.last_error == "OSError: integration down"
+
+
+@pytest.mark.parametrize(
+    ("failure", "priority", "queued"),
+    [
+        (OSError("integration down"), PRIORITY_MEDIUM, True),
+        (OSError("integration down"), PRIORITY_LOW, False),
+        (TimeoutError(), PRIORITY_MEDIUM, False),
+    ],
+)
+async def test_fallback_only_when_not_queued(
+    mock_hass_api: HomeAssistantAPI, failure: BaseException, priority: str, queued: bool
+) -> None:
+    ctx = TestingContext(
+        deliveries={
+            "chat": {CONF_TRANSPORT: TRANSPORT_GENERIC, CONF_ACTION: "notify.chat"},
+            "backup": {CONF_TRANSPORT: TRANSPORT_PERSISTENT, CONF_SELECTION: [SELECTION_FALLBACK_ON_ERROR]},
+        },
+        transports={TRANSPORT_MOBILE_PUSH: {CONF_ENABLED: False}, TRANSPORT_NOTIFY_ENTITY: {CONF_ENABLED: False}},
+    )
+    await ctx.test_initialize()
+    ctx.retry_queue = RetryQueue(
+        {CONF_ENABLED: True, CONF_PRIORITY: {PRIORITY_LOW: {CONF_MAX_ATTEMPTS: 0}}}, mock_hass_api, ctx.delivery_registry
+    )
+
+    async def deliver(envelope: Envelope, debug_trace: Any = None) -> bool:
+        envelope.delivered = True
+        return True
+
+    uut = Notification(ctx, "door open", target="switch.bell", action_data={ATTR_PRIORITY: priority})
+    await uut.initialize()
+    with (
+        patch.object(ctx.delivery("chat").transport, "deliver", side_effect=failure),
+        patch.object(ctx.delivery("backup").transport, "deliver", side_effect=deliver) as backup,
+    ):
+        await uut.deliver()
+
+    assert uut.failed == 1
+    # either retried later or sent by the fallback now, never both
+    assert ctx.retry_queue.depth == uut.retry_queued == int(queued)
+    assert backup.call_count == uut.fallback == int(not queued)
@@ -507,7 +507,7 @@ async def test_secondary_scenario(hass: HomeAssistant, mock_delivery_registry) -
     assert await uut.validate()
 
     assert not uut.evaluate(cvars)
-    cvars.applied_scenarios.append("scenario-possible-danger")
+    cvars = ConditionVariables(["scenario-no-danger", "sunny", "scenario-possible-danger"], [], [], PRIORITY_MEDIUM, {})
     assert uut.evaluate(cvars)
 
 
@@ -0,0 +1,85 @@
+import time
+from datetime import timedelta
+from typing import Any
+from unittest.mock import Mock
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import HomeAssistant
+
+from custom_components.supernotify.common import DupeChecker
+from custom_components.supernotify.envelope import Envelope
+from custom_components.supernotify.hass_api import HomeAssistantAPI
+from custom_components.supernotify.model import CommandType, GlobalTargetType, QualifiedTargetType, RecipientType
+from custom_components.supernotify.notification import Notification
+from custom_components.supernotify.snoozer import Snoozer
+from custom_components.supernotify.state_store import KEY_DUPES, KEY_SNOOZES, STORAGE_KEY, StateStore
+
+
+async def test_restores_unexpired_state(hass: HomeAssistant, hass_storage: dict[str, Any]) -> None:
+    now = time.time()
+    hass_storage[STORAGE_KEY] = {
+        "version": 1,
+        "key": STORAGE_KEY,
+        "data": {
+            KEY_DUPES: {"fresh": [3, now - 10], "stale": [3, now - 1000]},
+            KEY_SNOOZES: [
+                ["EVERYTHING", None, "EVERYONE", None, "test", now - 10, now + 600],
+                ["DELIVERY", "email", "USER", "person.joe", "test", now - 1000, now - 500],
+            ],
+        },
+    }
+    dupe_checker = DupeChecker({})
+    snoozer = Snoozer()
+    uut = StateStore(HomeAssistantAPI(hass), dupe_checker, snoozer)
+    await uut.initialize()
+
+    assert list(dupe_checker.cache.keys()) == ["fresh"]
+    assert len(snoozer.snoozes) == 1
+    assert snoozer.is_global_snooze()
+
+
+async def test_changes_saved_on_delay(hass: HomeAssistant, hass_storage: dict[str, Any]) -> None:
+    dupe_checker = DupeChecker({})
+    snoozer = Snoozer()
+    uut = StateStore(HomeAssistantAPI(hass), dupe_checker, snoozer)
+    await uut.initialize()
+
+    delivery = Mock(name="tester")
+    assert dupe_checker.check(Envelope(delivery, Notification(Mock(), "message here"))) is False
+    snoozer.register_snooze(
+        CommandType.SNOOZE, QualifiedTargetType.DELIVERY, "email", RecipientType.USER, "person.joe", timedelta(hours=1)
+    )
+    assert STORAGE_KEY not in hass_storage
+
+    # writes coalesced into one delayed save, flushed at latest when HomeAssistant stops
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+    saved = hass_storage[STORAGE_KEY]["data"]
+    assert len(saved[KEY_DUPES]) == 1
+    assert saved[KEY_SNOOZES][0][:4] == ["DELIVERY", "email", "USER", "person.joe"]
+
+    # round trip into a fresh instance, as after restart
+    restarted_dupe_checker = DupeChecker({})
+    restarted_snoozer = Snoozer()
+    await StateStore(HomeAssistantAPI(hass), restarted_dupe_checker, restarted_snoozer).initialize()
+    assert restarted_dupe_checker.check(Envelope(delivery, Notification(Mock(), "message here"))) is True
+    assert list(restarted_snoozer.snoozes.values()) == list(snoozer.snoozes.values())
+
+
+async def test_immediate_save(hass: HomeAssistant, hass_storage: dict[str, Any]) -> None:
+    snoozer = Snoozer()
+    uut = StateStore(HomeAssistantAPI(hass), DupeChecker({}), snoozer)
+    await uut.initialize()
+    snoozer.register_snooze(CommandType.SILENCE, GlobalTargetType.NONCRITICAL, None, RecipientType.EVERYONE, None, None)
+    await uut.save()
+    assert hass_storage[STORAGE_KEY]["data"][KEY_SNOOZES][0][-1] is None
+
+
+async def test_survives_unavailable_storage(mock_hass_api: HomeAssistantAPI) -> None:
+    mock_hass_api.create_store.side_effect = OSError("read only")  # type: ignore
+    snoozer = Snoozer()
+    uut = StateStore(mock_hass_api, DupeChecker({}), snoozer)
+    await uut.initialize()
+    snoozer.clear()
+    uut.schedule_save()
+    await uut.save()
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import unicodedata
 from typing import TYPE_CHECKING
 from unittest.mock import Mock
+from urllib.parse import urlparse
 
 import pytest
 from homeassistant.const import ATTR_NAME, CONF_DEBUG, CONF_ENABLED
@@ -13,6 +15,7 @@ from custom_components.supernotify.envelope import Envelope
 from custom_components.supernotify.model import DeliveryConfig, Target, TransportConfig, TransportFeature
 from custom_components.supernotify.notification import Notification
 from custom_components.supernotify.notify import TRANSPORTS
+from custom_components.supernotify.transport import SimplifyTable
 from custom_components.supernotify.transports.generic import GenericTransport
 
 from .doubles_lib import DummyService
@@ -37,6 +40,32 @@ def test_simplify_text() -> None:
     assert uut.simplify("NoSpecialChars123") == "NoSpecialChars123"
 
 
+def test_simplify_long_emoji_text() -> None:
+    def reference(text: str, strip_urls: bool) -> str:
+        # implementation before precompiled tables, one urlparse per word and one category lookup per character
+        if strip_urls:
+            text = " ".join(word for word in text.split() if not urlparse(word).scheme)
+        text = text.translate(str.maketrans("_", " ", "()£$<>"))
+        return "".join(c for c in text if unicodedata.category(c) not in ("So", "Sk", "Sm", "Mn"))
+
+    uut = GenericTransport(Mock())
+    text = (
+        "🚨 Alarm_triggered at café ⚠️ (front door) 🔥🔥 see https://home.local/cam?id=1 or mailto:me@here "
+        "naïve résumé ± 5°C ✅ Warning: 10:30 £42 <b>x</b> 👨‍👩‍👧 done. "
+    ) * 200
+    for strip_urls in (False, True):
+        assert uut.simplify(text, strip_urls=strip_urls) == reference(text, strip_urls)
+
+
+def test_simplify_table_bounded() -> None:
+    uut = SimplifyTable(str.maketrans("_", " ", "()"), maxsize=16)
+    text = "".join(chr(c) for c in range(0x2190, 0x2190 + 64)) + "a_(b)é"
+    assert text.translate(uut) == "a bé"
+    assert len(uut) <= 16
+    # fixed replacements survive eviction
+    assert "x_(y)".translate(uut) == "x y"
+
+
 async def test_call_action_simple(hass: HomeAssistant) -> None:
     ctx = TestingContext(homeassistant=hass)
     await ctx.test_initialize()
@@ -13,7 +13,8 @@ Covers:
              tts_char_speed, string boolean "false" handling)
 """
 
-from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, call, patch
 
 import pytest
 
@@ -25,6 +26,7 @@ from custom_components.supernotify.transports.alexa_media_player import (
     PAUSE_CHARS,
     AlexaMediaPlayerTransport,
     _estimate_tts_duration,
+    _restoring,
 )
 
 
@@ -309,6 +311,25 @@ class TestDeliver:
         assert "media_pause" in names
         assert "media_play" in names
 
+    @pytest.mark.asyncio
+    async def test_long_announcement_restored_after_delivery_timeout(self):
+        """Volume and music restored once spoken, even if the delivery times out while waiting."""
+        t = _make_transport({"media_player.sala": {"state": "playing", "volume_level": 0.5}})
+        envelope = _make_envelope("A long announcement", data={"volume": 0.8}, entity_ids=["media_player.sala"])
+        with (
+            patch("custom_components.supernotify.transports.alexa_media_player._estimate_tts_duration", return_value=0.5),
+            patch("custom_components.supernotify.transports.alexa_media_player._MUSIC_RESUME_DELAY", 0),
+        ):
+            with pytest.raises(TimeoutError):
+                async with asyncio.timeout(0.01):
+                    await t.deliver(envelope)
+            assert _service_names(t) == ["media_pause", "volume_set"]
+            await asyncio.gather(*_restoring)
+        assert t.hass_api.call_service.call_args_list[2:] == [
+            call("media_player", "volume_set", service_data={"entity_id": "media_player.sala", "volume_level": 0.5}),
+            call("media_player", "media_play", service_data={"entity_id": "media_player.sala"}),
+        ]
+
     @pytest.mark.asyncio
     async def test_volume_template_resolved(self):
         """Jinja2 volume template must be resolved to float before volume_set."""